@@ -1,26 +1,50 @@
 # Forbidden Bourbon Command Center v12.1 — Blog Hub + Auto-Scheduler + 6 Platforms
 import os
 import json
+import queue as queue_module
 import threading
 import time as time_module
 import random
+import heapq
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from flask import (Flask, render_template, request, jsonify, redirect, 
-                   url_for, flash, send_from_directory)
+                   url_for, flash, send_from_directory, Response)
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.utils import secure_filename
 
 import database as db
 import ga4
-from publisher import publish_to_platform, PublishResult
+import jobs
+import media
+from publisher import publish_many, quotas_for, PublishResult, reddit_submit, medium_user_id
+import credentials
+import resilience
+from credentials import CredentialError
+from recurrence import RRule, RRuleError
+
+
+class JSONProvider(DefaultJSONProvider):
+    """jsonify() for db row models; timestamps keep the DB's text format"""
+    @staticmethod
+    def default(o):
+        if isinstance(o, db.Row):
+            return o.to_dict()
+        if isinstance(o, datetime):
+            return o.strftime('%Y-%m-%d %H:%M:%S')
+        return DefaultJSONProvider.default(o)
+
 
 app = Flask(__name__)
+app.json = JSONProvider(app)
 app.secret_key = os.environ.get('SECRET_KEY', 'forbidden-command-center-2025')
 
 # Upload config
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'mp4'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+app.config['MAX_CONTENT_LENGTH'] = 64 * 1024 * 1024  # 64MB per request (several images of up to 16MB)
+MAX_POST_IMAGES = 10
 
 # API key helper - checks env vars first, then database
 def get_api_key(provider):
@@ -32,12 +56,6 @@ def get_api_key(provider):
     platform = db.get_platform(provider)
     return platform.get('api_key', '') if platform else ''
 
-# Ensure upload directory exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-# Initialize database and seed content
-db.init_db()
-
 # Force-seed blog platforms (may not exist in older databases)
 def ensure_blog_platforms():
     try:
@@ -96,37 +114,29 @@ def ensure_blog_platforms():
     except Exception as e:
         print(f"Blog platforms seed: {e}")
 
-ensure_blog_platforms()
-
 # Ensure brand_mentions table exists
-try:
-    conn = db.get_db()
-    if db.USE_POSTGRES:
-        conn.cursor().execute('''CREATE TABLE IF NOT EXISTS brand_mentions (
-            id SERIAL PRIMARY KEY, title TEXT NOT NULL, url TEXT DEFAULT '', source TEXT DEFAULT '',
-            source_type TEXT DEFAULT 'article', snippet TEXT DEFAULT '', full_content TEXT DEFAULT '',
-            author TEXT DEFAULT '', sentiment TEXT DEFAULT 'neutral', date_found TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            date_published TEXT DEFAULT '', starred INTEGER DEFAULT 0, notes TEXT DEFAULT '',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    else:
-        conn.execute('''CREATE TABLE IF NOT EXISTS brand_mentions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, url TEXT DEFAULT '', source TEXT DEFAULT '',
-            source_type TEXT DEFAULT 'article', snippet TEXT DEFAULT '', full_content TEXT DEFAULT '',
-            author TEXT DEFAULT '', sentiment TEXT DEFAULT 'neutral', date_found TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            date_published TEXT DEFAULT '', starred INTEGER DEFAULT 0, notes TEXT DEFAULT '',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    conn.commit()
-    conn.close()
-    print("[Startup] Brand mentions table verified")
-except Exception as e:
-    print(f"Brand mentions table: {e}")
-
-# Auto-seed content library on first run
-try:
-    from seed_content import seed
-    seed()
-except Exception as e:
-    print(f"Seed note: {e}")
+def ensure_brand_mentions_table():
+    try:
+        conn = db.get_db()
+        if db.USE_POSTGRES:
+            conn.cursor().execute('''CREATE TABLE IF NOT EXISTS brand_mentions (
+                id SERIAL PRIMARY KEY, title TEXT NOT NULL, url TEXT DEFAULT '', source TEXT DEFAULT '',
+                source_type TEXT DEFAULT 'article', snippet TEXT DEFAULT '', full_content TEXT DEFAULT '',
+                author TEXT DEFAULT '', sentiment TEXT DEFAULT 'neutral', date_found TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                date_published TEXT DEFAULT '', starred INTEGER DEFAULT 0, notes TEXT DEFAULT '',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+        else:
+            conn.execute('''CREATE TABLE IF NOT EXISTS brand_mentions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, url TEXT DEFAULT '', source TEXT DEFAULT '',
+                source_type TEXT DEFAULT 'article', snippet TEXT DEFAULT '', full_content TEXT DEFAULT '',
+                author TEXT DEFAULT '', sentiment TEXT DEFAULT 'neutral', date_found TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                date_published TEXT DEFAULT '', starred INTEGER DEFAULT 0, notes TEXT DEFAULT '',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+        conn.commit()
+        conn.close()
+        print("[Startup] Brand mentions table verified")
+    except Exception as e:
+        print(f"Brand mentions table: {e}")
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -135,12 +145,18 @@ def allowed_file(filename):
 # TEMPLATE FILTERS
 # ============================================================
 
+def _as_datetime(value):
+    """Row models hand templates datetimes; older callers may still pass text"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
 @app.template_filter('timeago')
-def timeago_filter(dt_string):
-    if not dt_string:
+def timeago_filter(value):
+    if not value:
         return ''
     try:
-        dt = datetime.strptime(dt_string, '%Y-%m-%d %H:%M:%S')
+        dt = _as_datetime(value)
         now = datetime.utcnow()
         diff = now - dt
         
@@ -155,27 +171,43 @@ def timeago_filter(dt_string):
         else:
             return 'just now'
     except:
-        return dt_string
+        return value
 
 @app.template_filter('shortdate')
-def shortdate_filter(dt_string):
-    if not dt_string:
+def shortdate_filter(value):
+    if not value:
         return ''
     try:
-        dt = datetime.strptime(dt_string, '%Y-%m-%d %H:%M:%S')
-        return dt.strftime('%b %d, %I:%M %p')
+        return _as_datetime(value).strftime('%b %d, %I:%M %p')
     except:
-        return dt_string
+        return value
 
 @app.template_filter('caldate')
-def caldate_filter(dt_string):
-    if not dt_string:
+def caldate_filter(value):
+    if not value:
+        return ''
+    try:
+        return _as_datetime(value).strftime('%Y-%m-%dT%H:%M')
+    except:
+        return value
+
+@app.template_filter('isodate')
+def isodate_filter(value):
+    if not value:
         return ''
     try:
-        dt = datetime.strptime(dt_string, '%Y-%m-%d %H:%M:%S')
-        return dt.strftime('%Y-%m-%dT%H:%M')
+        return _as_datetime(value).strftime('%Y-%m-%d')
     except:
-        return dt_string
+        return str(value)[:10]
+
+@app.template_filter('clock')
+def clock_filter(value):
+    if not value:
+        return ''
+    try:
+        return _as_datetime(value).strftime('%H:%M')
+    except:
+        return str(value)[11:16]
 
 # ============================================================
 # PAGE ROUTES
@@ -243,6 +275,7 @@ def compose():
                          platforms=platforms,
                          post=post,
                          template=template,
+                         max_images=MAX_POST_IMAGES,
                          page='compose')
 
 @app.route('/queue')
@@ -257,12 +290,17 @@ def queue():
     return render_template('queue.html', 
                          posts=posts, 
                          platforms=platforms,
+                         projected=projected_publish_times(),
+                         defer_notice=timedelta(seconds=PUBLISH_DEFER_NOTICE_SECONDS),
                          status_filter=status_filter,
                          page='queue')
 
 @app.route('/calendar')
 def calendar():
-    scheduled = db.get_scheduled_posts()
+    days = max(1, min(request.args.get('days', 30, type=int), 366))
+    # Every scheduled post, plus series occurrences over the next `days` days
+    scheduled = calendar_entries(datetime.min, datetime.utcnow() + timedelta(days=days),
+                                 posts=db.get_scheduled_posts())
     published = db.get_posts(status='published', limit=50)
     return render_template('calendar.html',
                          scheduled=scheduled,
@@ -333,9 +371,12 @@ def blog_hub_page():
 def brand_intel_page():
     mentions = db.get_brand_mentions(limit=500)
     stats = db.get_brand_mention_stats()
+    last_deep_scan, next_deep_scan = brand_intel_scan_schedule()
     return render_template('brand_intel.html',
                          mentions=mentions,
                          stats=stats,
+                         last_deep_scan=last_deep_scan,
+                         next_deep_scan=next_deep_scan,
                          page='brand-intel')
 
 @app.route('/mash-analytics')
@@ -347,7 +388,7 @@ def mash_analytics_page():
 
 @app.route('/outreach')
 def outreach_page():
-    contacts = db.get_outreach_contacts(limit=500)
+    contacts = db.get_outreach_contacts(limit=100)
     stats = db.get_outreach_stats()
     customer_email_count = db.get_customer_email_count()
     return render_template('outreach.html',
@@ -393,15 +434,15 @@ def api_create_post():
         if hashtags:
             full_content = f"{content}\n\n{hashtags}"
         
-        # Handle image upload
-        image_path = ''
-        if 'image' in request.files:
-            file = request.files['image']
+        # Handle image uploads, in the order they were picked ('image' is the old single field)
+        media = []
+        for file in (request.files.getlist('images') + request.files.getlist('image'))[:MAX_POST_IMAGES]:
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(f"{int(time_module.time())}_{file.filename}")
+                filename = secure_filename(f"{int(time_module.time())}_{len(media)}_{file.filename}")
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
                 file.save(filepath)
-                image_path = f'/static/uploads/{filename}'
+                media.append(f'/static/uploads/{filename}')
+        image_path = media[0] if media else ''
         
         # Handle scheduled time
         if status == 'scheduled' and scheduled_at:
@@ -413,6 +454,21 @@ def api_create_post():
         elif status == 'scheduled' and not scheduled_at:
             status = 'draft'  # Can't schedule without a time
         
+        # Recurring: store the rule once and materialize the first few occurrences
+        repeat = request.form.get('repeat', '').strip()
+        if repeat and status == 'scheduled':
+            try:
+                dtstart = datetime.strptime(scheduled_at, '%Y-%m-%d %H:%M:%S')
+                RRule.parse(repeat, dtstart)
+            except (ValueError, RRuleError) as e:
+                return jsonify({'success': False, 'error': f'Invalid repeat rule: {e}'}), 400
+            series_id = db.create_post_series(repeat, scheduled_at, full_content, image_path=image_path,
+                                              hashtags=hashtags, link_url=link_url, platforms=platforms, notes=notes,
+                                              media=media)
+            created = materialize_series(db.get_post_series(series_id))
+            return jsonify({'success': True, 'post_id': created[0] if created else None,
+                            'series_id': series_id, 'status': status})
+        
         post_id = db.create_post(
             content=full_content,
             image_path=image_path,
@@ -422,7 +478,8 @@ def api_create_post():
             scheduled_at=scheduled_at if status == 'scheduled' else None,
             platforms=platforms,
             ai_generated=ai_generated,
-            notes=notes
+            notes=notes,
+            media=media
         )
         
         return jsonify({'success': True, 'post_id': post_id, 'status': status})
@@ -436,6 +493,8 @@ def api_update_post(post_id):
         data = request.get_json()
         if not data:
             return jsonify({'success': False, 'error': 'No data provided'}), 400
+        if isinstance(data.get('media'), list):
+            data['media'] = data['media'][:MAX_POST_IMAGES]
         
         db.update_post(post_id, **data)
         return jsonify({'success': True})
@@ -452,72 +511,18 @@ def api_delete_post(post_id):
 
 @app.route('/api/posts/<int:post_id>/publish', methods=['POST'])
 def api_publish_post(post_id):
-    """Publish a post to its selected platforms"""
+    """Queue a post for publishing to its selected platforms"""
     try:
         post = db.get_post(post_id)
         if not post:
             return jsonify({'success': False, 'error': 'Post not found'}), 404
         
-        results = []
-        all_platforms = db.get_platforms()
-        platform_lookup = {p['name']: p for p in all_platforms}
-        
-        target_platforms = post.get('platforms', [])
-        if not target_platforms:
+        if not post.get('platforms'):
             return jsonify({'success': False, 'error': 'No platforms selected for this post'}), 400
         
-        image_full_path = ''
-        if post.get('image_path'):
-            image_full_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
-                                           post['image_path'].lstrip('/'))
-        
-        for pp in target_platforms:
-            platform_name = pp['platform_name']
-            platform_config = platform_lookup.get(platform_name, {})
-            
-            if not platform_config.get('connected'):
-                results.append({
-                    'platform': platform_name,
-                    'success': False,
-                    'error': f'{platform_name} is not connected'
-                })
-                continue
-            
-            # Build config dict for the publisher
-            config = {
-                'api_key': platform_config.get('api_key', ''),
-                'api_secret': platform_config.get('api_secret', ''),
-                'access_token': platform_config.get('access_token', ''),
-                'refresh_token': platform_config.get('refresh_token', ''),
-                'username': platform_config.get('username', ''),
-            }
-            
-            # Add any additional config
-            try:
-                additional = json.loads(platform_config.get('additional_config', '{}'))
-                config.update(additional)
-            except:
-                pass
-            
-            result = publish_to_platform(platform_name, post['content'], image_full_path, config)
-            results.append(result.to_dict())
-            
-            if result.success:
-                db.mark_post_published(post_id, platform_name, result.post_id)
-            else:
-                db.mark_post_failed(post_id, platform_name, result.error)
-        
-        # Update post status
-        any_success = any(r['success'] for r in results)
-        all_failed = all(not r['success'] for r in results)
-        
-        if all_failed:
-            db.update_post(post_id, status='failed')
-        elif any_success:
-            db.update_post(post_id, status='published', 
-                          published_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
-        
-        return jsonify({'success': any_success, 'results': results})
+        job_id, run_at = queue_publish(post, priority=10)
+        return jsonify({'success': True, 'queued': True, 'job_id': job_id, 'run_at': run_at,
+                        'deferred': run_at > datetime.utcnow() + timedelta(seconds=PUBLISH_DEFER_NOTICE_SECONDS)})
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -538,13 +543,46 @@ def api_duplicate_post(post_id):
             hashtags=post.get('hashtags', ''),
             link_url=post.get('link_url', ''),
             platforms=platform_names,
-            notes=f"Duplicated from post #{post_id}"
+            notes=f"Duplicated from post #{post_id}",
+            media=post.get('media')
         )
         
         return jsonify({'success': True, 'post_id': new_id})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/series', methods=['GET'])
+def api_series():
+    """Recurring series with a readable rule and their next few occurrences"""
+    now = datetime.utcnow()
+    out = []
+    for series in db.get_post_series(active_only=request.args.get('all') != '1'):
+        rule = RRule.parse(series['rrule'], series['dtstart'])
+        series['description'] = rule.describe()
+        series['next_occurrences'] = rule.after(now, 5)
+        out.append(series)
+    return jsonify({'success': True, 'series': out})
+
+@app.route('/api/series/<int:series_id>', methods=['DELETE'])
+def api_end_series(series_id):
+    """Stop a series; its unpublished occurrences are removed"""
+    if not db.get_post_series(series_id):
+        return jsonify({'success': False, 'error': 'Series not found'}), 404
+    removed = db.end_post_series(series_id)
+    return jsonify({'success': True, 'removed_posts': removed})
+
+@app.route('/api/calendar', methods=['GET'])
+def api_calendar():
+    """Calendar entries for ?start=YYYY-MM-DD&end=YYYY-MM-DD, recurring occurrences included"""
+    try:
+        start = datetime.strptime(request.args.get('start', ''), '%Y-%m-%d')
+        end = datetime.strptime(request.args.get('end', ''), '%Y-%m-%d') + timedelta(days=1)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'start and end must be YYYY-MM-DD'}), 400
+    if end - start > timedelta(days=366):
+        return jsonify({'success': False, 'error': 'Range is limited to one year'}), 400
+    return jsonify({'success': True, 'entries': calendar_entries(start, end)})
+
 # ============================================================
 # API ROUTES - PLATFORMS
 # ============================================================
@@ -1192,6 +1230,111 @@ def api_activity():
     activity = db.get_activity(limit=20)
     return jsonify(activity)
 
+# ============================================================
+# LIVE CHANGE FEED (Server-Sent Events)
+# ============================================================
+
+# Each stream holds a worker thread, so streams end after a while and the
+# browser reconnects with Last-Event-ID to replay anything it missed.
+SSE_STREAM_SECONDS = 300
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 2000
+
+@app.route('/api/events')
+def api_events():
+    """Stream row-level changes (post status, new activity, new mentions)"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscription, missed = db.subscribe_changes(last_event_id)
+    
+    def format_event(change):
+        return f"id: {change['event_id']}\nevent: change\ndata: {json.dumps(change, default=str)}\n\n"
+    
+    def stream():
+        try:
+            yield f'retry: {SSE_RETRY_MS}\n\n'
+            for change in missed:
+                yield format_event(change)
+            deadline = time_module.time() + SSE_STREAM_SECONDS
+            while time_module.time() < deadline:
+                try:
+                    change = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue_module.Empty:
+                    yield ': ping\n\n'
+                    continue
+                yield format_event(change)
+        finally:
+            db.unsubscribe_changes(subscription)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# ============================================================
+# BACKGROUND JOBS API
+# ============================================================
+
+@app.route('/api/jobs', methods=['GET'])
+def api_jobs():
+    """Recent jobs, optionally filtered by state (queued/running/done/failed) or kind"""
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    job_list = db.get_jobs(state=request.args.get('state'), kind=request.args.get('kind'), limit=limit)
+    return jsonify({'success': True, 'jobs': job_list})
+
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+def api_job_status(job_id):
+    job = db.get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
+
+@app.route('/api/publish/circuits', methods=['GET'])
+def api_publish_circuits():
+    """Per-platform circuit breakers: consecutive failures and when an open one lets a publish through"""
+    now = time_module.time()
+    circuits = [{**c, 'open': c['open_until'] > now,
+                 'open_until': datetime.utcfromtimestamp(c['open_until']).strftime('%Y-%m-%d %H:%M:%S')
+                 if c['open_until'] else None}
+                for c in db.get_circuits()]
+    return jsonify({'success': True, 'circuits': circuits})
+
+
+HEALTH_MAX_BACKLOG_SECONDS = 300  # due jobs / scheduled posts waiting longer than this are unhealthy
+
+
+@app.route('/api/health/tasks', methods=['GET'])
+def api_health_tasks():
+    """Liveness of background loops and job workers, plus how far behind the backlog is.
+
+    Returns 503 when a loop has missed its heartbeat, crashed, or work is piling up,
+    so an uptime monitor can alert on it directly.
+    """
+    now = datetime.utcnow()
+    tasks = []
+    for hb in db.get_task_heartbeats():
+        silent = (now - hb['heartbeat_at']).total_seconds() if hb['heartbeat_at'] else None
+        lag = max(0, silent - hb['interval_seconds'] - TASK_HEARTBEAT_WRITE_INTERVAL) if silent is not None else None
+        hb['seconds_since_heartbeat'] = round(silent) if silent is not None else None
+        hb['lag_seconds'] = round(lag) if lag is not None else None
+        hb['healthy'] = hb['status'] == 'stopped' or (hb['status'] == 'running' and lag == 0)
+        tasks.append(hb)
+
+    backlog = db.get_backlog_stats()
+    for key in ('job', 'post'):
+        oldest = backlog[f'oldest_{key}_due_at']
+        backlog[f'{key}_lag_seconds'] = round((now - oldest).total_seconds()) if isinstance(oldest, datetime) else 0
+
+    healthy = (all(t['healthy'] for t in tasks)
+               and backlog['job_lag_seconds'] <= HEALTH_MAX_BACKLOG_SECONDS
+               and backlog['post_lag_seconds'] <= HEALTH_MAX_BACKLOG_SECONDS)
+    return jsonify({
+        'healthy': healthy,
+        'tasks': tasks,
+        'backlog': backlog,
+        'led_here': sorted(name for name, task in TASKS.items() if task.held),
+    }), 200 if healthy else 503
+
+
 # ============================================================
 # IMAGE UPLOAD
 # ============================================================
@@ -1213,66 +1356,421 @@ def api_upload_image():
     
     return jsonify({'success': False, 'error': 'File type not allowed'}), 400
 
+# ============================================================
+# BACKGROUND LOOP SUPERVISION
+# ============================================================
+
+TASK_HEARTBEAT_WRITE_INTERVAL = 30  # heartbeat rows are written at most this often per loop
+TASK_RESTART_BACKOFF = (5, 600)     # first and longest wait before restarting a crashed loop
+
+TASKS = {}
+
+
+class SupervisedTask:
+    """What a background loop is handed: its leader lease plus heartbeat reporting.
+
+    Loops run `while task.held:` and wrap each pass in `with task.run():`.
+    `interval` is the longest a healthy loop goes between passes; a loop not
+    heard from for longer than that shows up as lagging in /api/health/tasks.
+    """
+
+    def __init__(self, name, interval):
+        self.name = name
+        self.interval = interval
+        self.lease = db.LeaderLease(name)
+        self.started_at = None
+        self.last_duration = None
+        self.restarts = 0
+        self.last_error = ''
+        self._last_write = 0
+
+    @property
+    def held(self):
+        return self.lease.held
+
+    @contextmanager
+    def run(self):
+        """Time one pass of the loop and record it as a heartbeat"""
+        started = time_module.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.last_duration = round(time_module.monotonic() - started, 3)
+            self.last_error = f'{type(e).__name__}: {e}'
+            self.beat(force=True)
+            raise
+        self.last_duration = round(time_module.monotonic() - started, 3)
+        self.beat()
+
+    def beat(self, status='running', force=False):
+        if not force and time_module.monotonic() - self._last_write < TASK_HEARTBEAT_WRITE_INTERVAL:
+            return
+        try:
+            db.record_task_heartbeat(self.name, self.lease.holder, status=status, interval=self.interval,
+                                     last_duration=self.last_duration, restarts=self.restarts,
+                                     last_error=self.last_error, started_at=self.started_at)
+            self._last_write = time_module.monotonic()
+        except Exception as e:
+            print(f"[Supervisor] {self.name}: heartbeat failed: {e}")
+
+
+BACKGROUND_LOOPS = {}
+
+
+def background_loop(name, target, interval):
+    """Register a leader loop; start_background_tasks() starts it in each serving process"""
+    BACKGROUND_LOOPS[name] = (target, interval)
+
+
+def start_leader_loop(name, target, interval):
+    """Run target(task) in a daemon thread, but only while this process leads `name`.
+
+    Every gunicorn worker calls this at startup; the lease holder runs the loop
+    and the others wait to take over if it dies. target returns once
+    task.held goes False and is started again if leadership comes back; if
+    it raises, it is restarted with exponential backoff.
+    """
+    task = TASKS[name] = SupervisedTask(name, interval)
+
+    def run():
+        backoff = TASK_RESTART_BACKOFF[0]
+        while True:
+            task.lease.wait()
+            print(f"[Leader] {name} running in pid {os.getpid()}")
+            task.started_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            task.beat(force=True)
+            task._last_write = 0  # record the first pass's duration right away, too
+            started = time_module.monotonic()
+            try:
+                target(task)
+            except Exception as e:
+                task.restarts += 1
+                task.last_error = f'{type(e).__name__}: {e}'
+                if time_module.monotonic() - started > TASK_RESTART_BACKOFF[1]:
+                    backoff = TASK_RESTART_BACKOFF[0]  # it had been running fine; start over
+                task.beat('crashed', force=True)
+                print(f"[Supervisor] {name} crashed: {e}; restarting in {backoff}s")
+                time_module.sleep(backoff)
+                backoff = min(backoff * 2, TASK_RESTART_BACKOFF[1])
+
+    thread = threading.Thread(target=run, daemon=True, name=name)
+    thread.start()
+    return thread
+
 # ============================================================
 # SCHEDULER BACKGROUND THREAD
 # ============================================================
 
-def scheduler_loop():
-    """Check for due posts every 60 seconds and publish them"""
-    while True:
+SCHEDULER_RECONCILE_SECONDS = 300  # full reload in case a change notification was missed
+
+
+class PostTimer:
+    """Min-heap of (scheduled_at, post_id) that the scheduler sleeps on.
+
+    Moving a post pushes a new entry and leaves the old one behind; _due holds
+    each post's current time, so stale entries are dropped when they surface.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}
+        self._cond = threading.Condition()
+
+    def load(self, schedule):
+        """Replace everything with {post_id: scheduled_at}"""
+        with self._cond:
+            self._due = {pid: when for pid, when in schedule.items() if isinstance(when, datetime)}
+            self._heap = [(when, pid) for pid, when in self._due.items()]
+            heapq.heapify(self._heap)
+            self._cond.notify_all()
+
+    def update(self, post_id, when):
+        """Add or move one post; when=None removes it"""
+        with self._cond:
+            if isinstance(when, datetime):
+                self._due[post_id] = when
+                heapq.heappush(self._heap, (when, post_id))
+            else:
+                self._due.pop(post_id, None)
+            self._cond.notify_all()
+
+    def wait_due(self, timeout):
+        """Sleep until a post is due (or timeout); returns the ids that came due"""
+        deadline = time_module.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = datetime.utcnow()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    when, post_id = heapq.heappop(self._heap)
+                    if self._due.get(post_id) == when:
+                        del self._due[post_id]
+                        due.append(post_id)
+                if due:
+                    return due
+                remaining = deadline - time_module.monotonic()
+                if remaining <= 0:
+                    return []
+                if self._heap:
+                    remaining = min(remaining, (self._heap[0][0] - now).total_seconds())
+                self._cond.wait(remaining)
+
+
+def _follow_post_changes(timer, changes, stop):
+    """Keep the timer in step with post creates, reschedules and deletes"""
+    while not stop.is_set():
         try:
-            due_posts = db.get_due_posts()
-            for post in due_posts:
-                all_platforms = db.get_platforms()
-                platform_lookup = {p['name']: p for p in all_platforms}
-                
-                image_full_path = ''
-                if post.get('image_path'):
-                    image_full_path = os.path.join(
-                        os.path.dirname(os.path.abspath(__file__)),
-                        post['image_path'].lstrip('/')
-                    )
-                
-                for pp in post.get('platforms', []):
-                    platform_name = pp['platform_name']
-                    platform_config = platform_lookup.get(platform_name, {})
-                    
-                    if not platform_config.get('connected'):
-                        db.mark_post_failed(post['id'], platform_name, 'Platform not connected')
-                        continue
-                    
-                    config = {
-                        'api_key': platform_config.get('api_key', ''),
-                        'api_secret': platform_config.get('api_secret', ''),
-                        'access_token': platform_config.get('access_token', ''),
-                        'refresh_token': platform_config.get('refresh_token', ''),
-                        'username': platform_config.get('username', ''),
-                    }
-                    
-                    result = publish_to_platform(platform_name, post['content'], image_full_path, config)
-                    
-                    if result.success:
-                        db.mark_post_published(post['id'], platform_name, result.post_id)
-                    else:
-                        db.mark_post_failed(post['id'], platform_name, result.error)
-                
-                # Update overall post status
-                updated_post = db.get_post(post['id'])
-                if updated_post:
-                    statuses = [p['status'] for p in updated_post.get('platforms', [])]
-                    if all(s == 'published' for s in statuses):
-                        db.update_post(post['id'], status='published',
-                                      published_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
-                    elif all(s == 'failed' for s in statuses):
-                        db.update_post(post['id'], status='failed')
+            change = changes.get(timeout=5)
+        except queue_module.Empty:
+            continue
+        if change.get('table') != 'posts':
+            continue
+        row = change.get('row') or {}
+        if change.get('op') == 'DELETE' or row.get('status') != 'scheduled':
+            timer.update(row.get('id'), None)
+        else:
+            timer.update(row.get('id'), db._parse_timestamp(row.get('scheduled_at')))
+
+
+def publish_config(platform):
+    """Publisher config for a platform row: credentials plus additional_config"""
+    config = {
+        'api_key': platform.get('api_key', ''),
+        'api_secret': platform.get('api_secret', ''),
+        'access_token': platform.get('access_token', ''),
+        'refresh_token': platform.get('refresh_token', ''),
+        'username': platform.get('username', ''),
+    }
+    # additional_config was parsed once when the platform row was loaded
+    config.update(platform.config)
+    config.pop(credentials.CACHE_CONFIG_KEY, None)  # encrypted session cache, not settings
+    return config
+
+
+@jobs.handler('publish_post')
+def publish_post_now(post_id, platforms=None):
+    """Publish one post to its platforms at once (runs in the job worker).
+
+    Platforms that already published are skipped; with platforms (a retry job)
+    only those still pending are tried. Retryable failures and platforms whose
+    breaker is open get their own retry job instead of failing the post.
+    """
+    post = db.get_post(post_id)
+    if not post:
+        return {'success': False, 'error': 'Post not found'}
+    if not post.get('platforms'):
+        db.update_post(post_id, status='published',
+                      published_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
+        return {'success': True, 'results': []}
+    targets = [pp for pp in post['platforms'] if pp['status'] != 'published'
+               and (platforms is None or (pp['platform_name'] in platforms and pp['status'] == 'pending'))]
+    if not targets:
+        return {'success': True, 'results': []}
+    platform_lookup = {p['name']: p for p in db.get_platforms()}
+    
+    images = [media.local_copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), path.lstrip('/')), path)
+              for path in post.get('media', [])]
+    
+    results, publish_jobs, retry_at, deferred = [], [], {}, set()
+    for pp in targets:
+        platform_name = pp['platform_name']
+        platform_config = platform_lookup.get(platform_name, {})
+        
+        if not platform_config.get('connected'):
+            results.append(PublishResult(False, platform_name, error=f'{platform_name} is not connected'))
+            continue
+        
+        until = resilience.blocked_until(platform_name)
+        if until:
+            # Breaker open: try again once it lets a probe through, without using up an attempt
+            results.append(PublishResult(False, platform_name, error=f'{platform_name} is failing; publishing paused'))
+            retry_at[platform_name] = datetime.utcfromtimestamp(until + random.uniform(1, 30))
+            deferred.add(platform_name)
+            continue
+        
+        publish_jobs.append((platform_name, post['content'], images, publish_config(platform_config)))
+    
+    # A failed platform published again by hand starts a fresh run of attempts
+    attempts = {pp['platform_name']: (pp.get('attempts') or 0) if pp['status'] == 'pending' else 0 for pp in targets}
+    # All platforms in parallel; results and post status saved in one transaction
+    for result in publish_many(publish_jobs):
+        results.append(result)
+        attempt = attempts[result.platform] + 1
+        if resilience.record(result) == 'retry' and attempt < resilience.PUBLISH_MAX_ATTEMPTS:
+            retry_at[result.platform] = datetime.utcnow() + timedelta(
+                seconds=resilience.retry_delay(result, attempt))
+    db.record_publish_results(post_id, results, retry_at=retry_at, deferred=deferred)
+    for platform_name, at in retry_at.items():
+        queue_publish_retry(post_id, platform_name, at)
+    if post.get('series_id'):
+        materialize_series(db.get_post_series(post['series_id']))
+    return {'success': any(r.success for r in results), 'results': [r.to_dict() for r in results],
+            'retrying': {p: at.strftime('%Y-%m-%d %H:%M:%S') for p, at in retry_at.items()}}
+
+
+def queue_publish_retry(post_id, platform_name, at):
+    """Queue a publish of one platform of a post, no earlier than at (UTC) and within its quota"""
+    run_at = db.reserve_rate_slots(quotas_for([platform_name]), at=(at - datetime(1970, 1, 1)).total_seconds())
+    # Keyed by time too: the retry job queueing the next one still holds its own key
+    return jobs.enqueue('publish_post', {'post_id': post_id, 'platforms': [platform_name]}, priority=5,
+                        max_attempts=1, run_at=run_at.strftime('%Y-%m-%d %H:%M:%S'),
+                        dedupe_key=f'publish_retry:{post_id}:{platform_name}:{run_at:%Y%m%d%H%M%S}')
+
+
+PUBLISH_DEFER_NOTICE_SECONDS = 60  # report publishes pushed back further than this by quotas
+
+
+def queue_publish(post, priority):
+    """Queue a post's publish job at the earliest time every platform's quota allows.
+
+    Returns (job_id, run_at). A post that already has an active publish job
+    keeps it, so re-running the scheduler never books a second slot.
+    """
+    dedupe_key = f"publish_post:{post['id']}"
+    active = db.get_active_job(dedupe_key)
+    if active:
+        return active['id'], db._parse_timestamp(active['run_at'])
+    run_at = db.reserve_rate_slots(quotas_for(pp['platform_name'] for pp in post.get('platforms', [])))
+    job_id = jobs.enqueue('publish_post', {'post_id': post['id']}, priority=priority, max_attempts=1,
+                          run_at=run_at.strftime('%Y-%m-%d %H:%M:%S'), dedupe_key=dedupe_key)
+    if run_at > datetime.utcnow() + timedelta(seconds=PUBLISH_DEFER_NOTICE_SECONDS):
+        print(f"[Scheduler] Post {post['id']} deferred to {run_at:%Y-%m-%d %H:%M:%S} UTC by platform quotas")
+    return job_id, run_at
+
+
+def projected_publish_times():
+    """{post_id: UTC datetime it should actually go out} for scheduled posts.
+
+    Posts already queued report their booked slot; the rest are played
+    forward through a copy of the quota state in scheduled order.
+    """
+    projected = {}
+    for job in db.get_jobs(state='queued', kind='publish_post', limit=500):
+        projected[job['payload'].get('post_id')] = db._parse_timestamp(job['run_at'])
+    tats = db.get_rate_limit_state()
+    now = time_module.time()
+    for post in db.get_scheduled_posts():
+        if post['id'] in projected or not isinstance(post['scheduled_at'], datetime):
+            continue
+        at = max(now, (post['scheduled_at'] - datetime(1970, 1, 1)).total_seconds())
+        quotas = quotas_for(pp['platform_name'] for pp in post.get('platforms', []))
+        slot = max([at] + [db.rate_limit_slot(tats.get(p, 0), at, *q)[0] for p, q in quotas.items()])
+        for p, q in quotas.items():
+            tats[p] = db.rate_limit_slot(tats.get(p, 0), slot, *q)[1]
+        projected[post['id']] = datetime.utcfromtimestamp(slot)
+    return projected
+
+
+def publish_due_posts(task):
+    """Hand every post whose scheduled time has passed to the job worker, spaced to fit platform quotas"""
+    for post in db.get_due_posts():
+        if not task.held:
+            break
+        queue_publish(post, priority=5)
+
+
+def scheduler_loop(task):
+    """Publish scheduled posts the moment they fall due.
+
+    Sleeps on a PostTimer instead of polling. The change feed keeps the timer
+    current (worker.py's changes too; on SQLite they arrive within
+    db.CHANGE_FEED_POLL_SECONDS), and a full reload every
+    SCHEDULER_RECONCILE_SECONDS catches anything it missed.
+    """
+    timer = PostTimer()
+    changes, _ = db.subscribe_changes()
+    stop = threading.Event()
+    threading.Thread(target=_follow_post_changes, args=(timer, changes, stop), daemon=True).start()
+    next_reconcile = 0
+    try:
+        while task.held:
+            try:
+                # Short cap so a lost lease is noticed; waking costs no queries
+                wait = min(db.LEADER_RENEW_INTERVAL, next_reconcile - time_module.monotonic())
+                due = timer.wait_due(max(wait, 0))
+                with task.run():
+                    if time_module.monotonic() >= next_reconcile:
+                        materialize_all_series()
+                        timer.load(db.get_post_schedule())
+                        next_reconcile = time_module.monotonic() + SCHEDULER_RECONCILE_SECONDS
+                    if due:
+                        publish_due_posts(task)
+            except Exception as e:
+                print(f"Scheduler error: {e}")
+                time_module.sleep(5)
+    finally:
+        stop.set()
+        db.unsubscribe_changes(changes)
+
+background_loop('scheduler', scheduler_loop, interval=db.LEADER_RENEW_INTERVAL)
+
+
+# ============================================================
+# RECURRING POSTS
+# ============================================================
+
+SERIES_LOOKAHEAD = 3  # occurrences per series that exist as real scheduled posts
+SERIES_CATCHUP = timedelta(hours=1)  # occurrences missed by more than this (downtime) are skipped
+
+
+def materialize_series(series):
+    """Top a series up to SERIES_LOOKAHEAD scheduled posts; returns the new post ids.
+
+    Runs after each occurrence publishes and on every scheduler reconcile,
+    so the work per occurrence is constant no matter how long the series runs.
+    """
+    if not series or not series['active']:
+        return []
+    pending = db.count_pending_series_posts(series['id'])
+    if pending >= SERIES_LOOKAHEAD:
+        return []
+    rule = RRule.parse(series['rrule'], series['dtstart'])
+    after = series['last_occurrence'] or series['dtstart'] - timedelta(seconds=1)
+    occurrences = rule.after(max(after, datetime.utcnow() - SERIES_CATCHUP), SERIES_LOOKAHEAD - pending)
+    if not occurrences:
+        if not pending:
+            db.update_post_series(series['id'], active=0)  # COUNT/UNTIL reached
+        return []
+    created = [db.create_post(content=series['content'], image_path=series['image_path'], status='scheduled',
+                              hashtags=series['hashtags'], link_url=series['link_url'],
+                              scheduled_at=when.strftime('%Y-%m-%d %H:%M:%S'), platforms=series['platforms'],
+                              notes=series['notes'], series_id=series['id'], media=series['media'])
+               for when in occurrences]
+    db.update_post_series(series['id'], last_occurrence=occurrences[-1].strftime('%Y-%m-%d %H:%M:%S'))
+    return created
+
+
+def materialize_all_series():
+    for series in db.get_post_series(active_only=True):
+        try:
+            materialize_series(series)
         except Exception as e:
-            print(f"Scheduler error: {e}")
-        
-        time_module.sleep(60)
+            print(f"[Series] #{series['id']}: {e}")
 
-# Start scheduler thread
-scheduler_thread = threading.Thread(target=scheduler_loop, daemon=True)
-scheduler_thread.start()
+
+def calendar_entries(start, end, posts=None):
+    """Scheduled posts plus not-yet-materialized series occurrences in [start, end), by time.
+
+    Occurrences are computed from each rule on the fly and never stored.
+    """
+    if posts is None:
+        posts = [p for p in db.get_scheduled_posts()
+                 if isinstance(p['scheduled_at'], datetime) and start <= p['scheduled_at'] < end]
+    entries = list(posts)
+    for series in db.get_post_series(active_only=True):
+        try:
+            rule = RRule.parse(series['rrule'], series['dtstart'])
+        except RRuleError:
+            continue
+        after = series['last_occurrence'] or series['dtstart'] - timedelta(seconds=1)
+        for when in rule.between(max(start, after + timedelta(seconds=1)), end):
+            entries.append({
+                'id': None, 'series_id': series['id'], 'virtual': True,
+                'scheduled_at': when, 'content': series['content'],
+                'platforms': [{'platform_name': p} for p in series['platforms']],
+            })
+    entries.sort(key=lambda e: e['scheduled_at'])
+    return entries
 
 
 # ============================================================
@@ -1352,26 +1850,22 @@ def blog_auto_post(platform):
             reddit_pass = os.environ.get('REDDIT_PASSWORD', '')
             
             if all([client_id, client_secret, reddit_user, reddit_pass]):
-                auth_resp = req.post('https://www.reddit.com/api/v1/access_token',
-                    auth=(client_id, client_secret),
-                    data={'grant_type': 'password', 'username': reddit_user, 'password': reddit_pass},
-                    headers={'User-Agent': 'ForbiddenCommandCenter/1.0'})
+                try:
+                    pub_resp = reddit_submit((client_id, client_secret, reddit_user, reddit_pass),
+                        {'kind': 'self', 'sr': post_data.get('subreddit', subreddit),
+                         'title': post_data.get('title', ''), 'text': post_data.get('body', ''), 'api_type': 'json'})
+                except CredentialError as e:
+                    print(f"[Blog Auto] {e}")
+                    pub_resp = None
                 
-                if auth_resp.status_code == 200:
-                    reddit_token = auth_resp.json().get('access_token')
-                    pub_resp = req.post('https://oauth.reddit.com/api/submit',
-                        headers={'Authorization': f'Bearer {reddit_token}', 'User-Agent': 'ForbiddenCommandCenter/1.0'},
-                        data={'kind': 'self', 'sr': post_data.get('subreddit', subreddit),
-                              'title': post_data.get('title', ''), 'text': post_data.get('body', ''), 'api_type': 'json'})
-                    
-                    if pub_resp.status_code == 200:
-                        reddit_data = pub_resp.json().get('json', {}).get('data', {})
-                        db.update_blog_article(article_id, status='published',
-                            platform=f"reddit/r/{post_data.get('subreddit', subreddit)}",
-                            platform_url=reddit_data.get('url', ''),
-                            published_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
-                        print(f"[Blog Auto] ✓ Reddit r/{subreddit}: {post_data.get('title', '')}")
-                        return True
+                if pub_resp is not None and pub_resp.status_code == 200:
+                    reddit_data = pub_resp.json().get('json', {}).get('data', {})
+                    db.update_blog_article(article_id, status='published',
+                        platform=f"reddit/r/{post_data.get('subreddit', subreddit)}",
+                        platform_url=reddit_data.get('url', ''),
+                        published_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
+                    print(f"[Blog Auto] ✓ Reddit r/{subreddit}: {post_data.get('title', '')}")
+                    return True
             
             print(f"[Blog Auto] Reddit saved as draft (no API keys)")
             return True
@@ -1413,22 +1907,25 @@ def blog_auto_post(platform):
             
             if platform == 'medium':
                 token = os.environ.get('MEDIUM_TOKEN', '')
-                if token:
-                    user_resp = req.get('https://api.medium.com/v1/me', headers={'Authorization': f'Bearer {token}'})
-                    if user_resp.status_code == 200:
-                        user_id = user_resp.json()['data']['id']
-                        pub_resp = req.post(f'https://api.medium.com/v1/users/{user_id}/posts',
-                            headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'},
-                            json={'title': article_data.get('title', ''), 'contentFormat': 'html',
-                                  'content': article_data.get('content', ''),
-                                  'tags': [k.strip() for k in article_data.get('keywords', '').split(',')[:5]],
-                                  'publishStatus': 'public'})
-                        if pub_resp.status_code in (200, 201):
-                            pub_data = pub_resp.json()['data']
-                            db.update_blog_article(article_id, status='published', platform='medium',
-                                platform_url=pub_data.get('url', ''),
-                                published_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
-                            published = True
+                try:
+                    user_id = medium_user_id(token) if token else None
+                except CredentialError:
+                    user_id = None
+                if user_id:
+                    pub_resp = req.post(f'https://api.medium.com/v1/users/{user_id}/posts',
+                        headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'},
+                        json={'title': article_data.get('title', ''), 'contentFormat': 'html',
+                              'content': article_data.get('content', ''),
+                              'tags': [k.strip() for k in article_data.get('keywords', '').split(',')[:5]],
+                              'publishStatus': 'public'})
+                    if pub_resp.status_code in (200, 201):
+                        pub_data = pub_resp.json()['data']
+                        db.update_blog_article(article_id, status='published', platform='medium',
+                            platform_url=pub_data.get('url', ''),
+                            published_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
+                        published = True
+                    elif pub_resp.status_code == 401:
+                        credentials.forget('medium')  # token revoked; look it up again next time
             
             elif platform == 'wordpress':
                 wp_site = os.environ.get('WORDPRESS_SITE', '')
@@ -1470,99 +1967,113 @@ def blog_auto_post(platform):
         return False
 
 
-def blog_scheduler_loop():
-    """Auto-generate and post blog content on schedule"""
-    # Wait 5 min after startup before first check
-    time_module.sleep(300)
-    
-    while True:
+BLOG_POST_HOUR = 9  # UTC; each scheduled day's posts go out from this hour
+BLOG_CATCHUP_HOURS = int(os.environ.get('BLOG_CATCHUP_HOURS', 8))  # missed slots younger than this still run
+BLOG_SCHEDULER_RECHECK = 6 * 60 * 60
+
+def blog_schedule_slots(start, end):
+    """(run_date, platform, slot time) for every scheduled post in [start, end)"""
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        for i, platform in enumerate(BLOG_SCHEDULE.get(day.weekday(), [])):
+            # Same-day platforms spaced 30s apart, as when they ran inline
+            at = day + timedelta(hours=BLOG_POST_HOUR, seconds=30 * i)
+            if start <= at < end:
+                yield day.strftime('%Y-%m-%d'), platform, at
+        day += timedelta(days=1)
+
+
+def next_blog_slot(after):
+    return next(blog_schedule_slots(after, after + timedelta(days=8)), None)
+
+
+@jobs.handler('blog_auto_post')
+def run_blog_auto_post(platform, run_date=None):
+    """Job entry point; scheduled runs record their outcome in the ledger"""
+    if run_date:
+        db.update_blog_schedule_run(run_date, platform, status='running')
+    ok = blog_auto_post(platform)
+    if run_date:
+        db.update_blog_schedule_run(run_date, platform, status='done' if ok else 'failed')
+    return ok
+
+
+def blog_scheduler_loop(task):
+    """Auto-generate and post blog content on schedule.
+
+    Every (date, platform) slot is claimed once in blog_schedule_runs, so
+    restarts, extra workers and manual drafts can neither repeat nor
+    suppress a post. Slots missed during downtime still run if they are
+    less than BLOG_CATCHUP_HOURS old.
+    """
+    while task.held:
+        now = datetime.utcnow()
         try:
-            today = datetime.utcnow().weekday()  # 0=Mon
-            hour = datetime.utcnow().hour
-            
-            # Only post between 9am-5pm UTC (roughly US business hours)
-            if 9 <= hour <= 17:
-                platforms_today = BLOG_SCHEDULE.get(today, [])
-                
-                if platforms_today:
-                    # Check if we already posted today
-                    today_str = datetime.utcnow().strftime('%Y-%m-%d')
-                    recent = db.get_blog_articles(limit=5)
-                    already_posted_today = any(
-                        a.get('created_at', '').startswith(today_str) and a.get('status') != 'draft'
-                        for a in recent
-                    ) if recent else False
-                    
-                    # Also check drafts created today (auto-generated but not published)
-                    drafts_today = any(
-                        str(a.get('created_at', '')).startswith(today_str)
-                        for a in recent
-                    ) if recent else False
-                    
-                    if not drafts_today:
-                        for platform in platforms_today:
-                            print(f"[Blog Auto] Generating for {platform} (day={today}, hour={hour})")
-                            blog_auto_post(platform)
-                            time_module.sleep(30)  # Small delay between posts
-        
+            with task.run():
+                for run_date, platform, at in blog_schedule_slots(now - timedelta(hours=BLOG_CATCHUP_HOURS),
+                                                                  now + timedelta(seconds=1)):
+                    if not db.claim_blog_schedule_run(run_date, platform, at.strftime('%Y-%m-%d %H:%M:%S')):
+                        continue
+                    late = (now - at).total_seconds()
+                    print(f"[Blog Auto] Queueing {platform} for {run_date}" + (f" ({late / 60:.0f} min late)" if late > 60 else ''))
+                    try:
+                        job_id = jobs.enqueue('blog_auto_post', {'platform': platform, 'run_date': run_date},
+                                              run_at=max(at, now).strftime('%Y-%m-%d %H:%M:%S'),
+                                              dedupe_key=f'blog_auto_post:{platform}:{run_date}')
+                        db.update_blog_schedule_run(run_date, platform, job_id=job_id)
+                    except Exception as e:
+                        db.update_blog_schedule_run(run_date, platform, status='failed', error=str(e))
+                        raise
         except Exception as e:
             print(f"[Blog Scheduler] Error: {e}")
         
-        # Check every 2 hours
-        time_module.sleep(7200)
+        # Sleep until the next slot (re-checking now and then so a lost lease is noticed)
+        wait = BLOG_SCHEDULER_RECHECK
+        upcoming = next_blog_slot(now + timedelta(seconds=1))
+        if upcoming:
+            wait = min(max((upcoming[2] - datetime.utcnow()).total_seconds(), 1), wait)
+        time_module.sleep(wait)
 
 
-# Start blog scheduler
-blog_scheduler_thread = threading.Thread(target=blog_scheduler_loop, daemon=True)
-blog_scheduler_thread.start()
+background_loop('blog_scheduler', blog_scheduler_loop, interval=BLOG_SCHEDULER_RECHECK)
 
 # ============================================================
 # BRAND INTEL AUTO-SCANNER (every 10 days)
 # ============================================================
 
 BRAND_INTEL_SCAN_INTERVAL = 10 * 24 * 60 * 60  # 10 days in seconds
-
-def brand_intel_scanner_loop():
-    """Auto-run deep scan for Forbidden Bourbon mentions every 10 days"""
-    # Wait 2 min after startup before first scan
-    time_module.sleep(120)
-    
-    while True:
+BRAND_INTEL_RECHECK = 6 * 60 * 60  # re-read scan state at least this often
+
+def brand_intel_scan_schedule():
+    """(last deep scan state or None, next due time) from the persisted task state"""
+    state = db.get_task_state('brand_intel_scan:deep')
+    if not state or not state.get('last_run_at'):
+        return state, datetime.utcnow()
+    return state, state['last_run_at'] + timedelta(seconds=BRAND_INTEL_SCAN_INTERVAL)
+
+def brand_intel_scanner_loop(task):
+    """Auto-run deep scan for Forbidden Bourbon mentions every 10 days.
+
+    The last completed deep scan (auto or manual) is persisted, so restarts
+    and deploys just sleep until it is actually due again.
+    """
+    while task.held:
+        wait = BRAND_INTEL_RECHECK
         try:
-            print(f"[Brand Intel Auto] Starting deep scan at {datetime.utcnow()}")
-            results = scrape_mentions(deep=True)
-            saved = 0
-            fetched = 0
-            
-            for r in results:
-                mention_id = db.add_brand_mention(
-                    title=r['title'],
-                    url=r['url'],
-                    source=r['source'],
-                    source_type=r['source_type'],
-                    snippet=r['snippet']
-                )
-                if mention_id:
-                    saved += 1
-                    if r['source_type'] not in ('video', 'social', 'own_site') and r['url']:
-                        try:
-                            content = fetch_full_content(r['url'])
-                            if content and len(content) > 100:
-                                db.update_brand_mention(mention_id, full_content=content)
-                                fetched += 1
-                        except:
-                            pass
-            
-            print(f"[Brand Intel Auto] ✓ Deep scan complete — {len(results)} found, {saved} new, {fetched} full text fetched")
-        
+            with task.run():
+                state, next_scan = brand_intel_scan_schedule()
+                until_due = (next_scan - datetime.utcnow()).total_seconds()
+                if until_due <= 0:
+                    job_id = jobs.enqueue('brand_intel_scan', {'deep': True}, dedupe_key='brand_intel_scan:deep')
+                    print(f"[Brand Intel Auto] Queued deep scan (job #{job_id}) at {datetime.utcnow()}")
+                else:
+                    wait = min(until_due, BRAND_INTEL_RECHECK)
         except Exception as e:
             print(f"[Brand Intel Auto] Error: {e}")
         
-        # Sleep 10 days
-        time_module.sleep(BRAND_INTEL_SCAN_INTERVAL)
+        time_module.sleep(wait)
 
-brand_intel_thread = threading.Thread(target=brand_intel_scanner_loop, daemon=True)
-brand_intel_thread.start()
+background_loop('brand_intel', brand_intel_scanner_loop, interval=BRAND_INTEL_RECHECK)
 
 # ============================================================
 # BLOG HUB API
@@ -1749,12 +2260,11 @@ def api_blog_publish(article_id):
             if not token:
                 return jsonify({'success': False, 'error': 'Medium integration token required. Set MEDIUM_TOKEN in Render env vars.'}), 400
             
-            # Get Medium user ID
-            user_resp = req.get('https://api.medium.com/v1/me', 
-                              headers={'Authorization': f'Bearer {token}'})
-            if user_resp.status_code != 200:
+            # Get Medium user ID (cached per token)
+            try:
+                user_id = medium_user_id(token)
+            except CredentialError:
                 return jsonify({'success': False, 'error': 'Invalid Medium token'}), 400
-            user_id = user_resp.json()['data']['id']
             
             # Publish
             pub_resp = req.post(
@@ -1778,6 +2288,8 @@ def api_blog_publish(article_id):
                     published_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
                 return jsonify({'success': True, 'url': pub_data.get('url', '')})
             else:
+                if pub_resp.status_code == 401:
+                    credentials.forget('medium')
                 return jsonify({'success': False, 'error': f'Medium error: {pub_resp.text}'}), 500
         
         elif platform == 'wordpress':
@@ -1847,18 +2359,6 @@ def api_blog_publish(article_id):
             if not all([client_id, client_secret, reddit_user, reddit_pass]):
                 return jsonify({'success': False, 'error': 'Reddit credentials required. Set REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USERNAME, REDDIT_PASSWORD in Render env vars.'}), 400
             
-            # Get Reddit access token
-            auth_resp = req.post(
-                'https://www.reddit.com/api/v1/access_token',
-                auth=(client_id, client_secret),
-                data={'grant_type': 'password', 'username': reddit_user, 'password': reddit_pass},
-                headers={'User-Agent': 'ForbiddenCommandCenter/1.0'}
-            )
-            if auth_resp.status_code != 200:
-                return jsonify({'success': False, 'error': 'Reddit auth failed'}), 400
-            
-            reddit_token = auth_resp.json().get('access_token')
-            
             # Adapt content for Reddit (shorter, conversational)
             reddit_body = article.get('excerpt', '') + '\n\n'
             # Strip HTML from content for Reddit text post
@@ -1870,20 +2370,17 @@ def api_blog_publish(article_id):
             if len(words) > 500:
                 reddit_body += f'\n\n---\n\n*Full article and more at drinkforbidden.com*'
             
-            pub_resp = req.post(
-                'https://oauth.reddit.com/api/submit',
-                headers={
-                    'Authorization': f'Bearer {reddit_token}',
-                    'User-Agent': 'ForbiddenCommandCenter/1.0'
-                },
-                data={
+            # Uses the cached access token; logs in only when it's missing or expired
+            try:
+                pub_resp = reddit_submit((client_id, client_secret, reddit_user, reddit_pass), {
                     'kind': 'self',
                     'sr': subreddit,
                     'title': article['title'],
                     'text': reddit_body,
                     'api_type': 'json'
-                }
-            )
+                })
+            except CredentialError:
+                return jsonify({'success': False, 'error': 'Reddit auth failed'}), 400
             
             if pub_resp.status_code == 200:
                 reddit_data = pub_resp.json().get('json', {}).get('data', {})
@@ -2306,54 +2803,77 @@ def fetch_full_content(url):
         return ''
 
 
+@jobs.handler('brand_intel_scan')
+def run_brand_intel_scan(deep=False):
+    """Web scan for Forbidden Bourbon mentions; saves new ones with their full text"""
+    print(f"[Brand Intel] Starting {'deep' if deep else 'quick'} scan at {datetime.utcnow()}")
+    results = scrape_mentions(deep=deep)
+    saved = 0
+    skipped = 0
+    fetched = 0
+    fetch_errors = 0
+    
+    for r in results:
+        mention_id = db.add_brand_mention(
+            title=r['title'],
+            url=r['url'],
+            source=r['source'],
+            source_type=r['source_type'],
+            snippet=r['snippet']
+        )
+        if mention_id:
+            saved += 1
+            # Auto-fetch full content for new mentions (skip videos/social)
+            if r['source_type'] not in ('video', 'social', 'own_site') and r['url']:
+                try:
+                    content = fetch_full_content(r['url'])
+                    if content and len(content) > 100:
+                        db.update_brand_mention(mention_id, full_content=content)
+                        fetched += 1
+                except Exception:
+                    fetch_errors += 1
+        else:
+            skipped += 1
+    
+    print(f"[Brand Intel] ✓ Scan complete — {len(results)} found, {saved} new, {fetched} full text fetched")
+    db.record_task_run(f"brand_intel_scan:{'deep' if deep else 'quick'}",
+                       {'found': len(results), 'saved': saved, 'fetched_content': fetched})
+    return {
+        'success': True,
+        'found': len(results),
+        'saved': saved,
+        'fetched_content': fetched,
+        'fetch_errors': fetch_errors,
+        'skipped_duplicates': skipped,
+        'mode': 'deep' if deep else 'quick',
+        'message': f"Scan complete. Found {len(results)} results, saved {saved} new mentions, {skipped} already existed."
+    }
+
+
+@app.route('/api/brand-intel/scan-status', methods=['GET'])
+def api_brand_intel_scan_status():
+    """Last quick/deep scan results and when the next automatic deep scan is due"""
+    deep, next_scan = brand_intel_scan_schedule()
+    quick = db.get_task_state('brand_intel_scan:quick')
+    return jsonify({
+        'success': True,
+        'deep': deep,
+        'quick': quick,
+        'next_deep_scan': next_scan,
+        'active_jobs': db.get_jobs(state='running', kind='brand_intel_scan') + db.get_jobs(state='queued', kind='brand_intel_scan'),
+    })
+
+
 @app.route('/api/brand-intel/scan', methods=['POST'])
 def api_brand_intel_scan():
-    """Run a web scan for Forbidden Bourbon mentions"""
+    """Queue a web scan for Forbidden Bourbon mentions"""
     try:
         data = request.get_json() or {}
-        deep = data.get('deep', False)
-        
-        results = scrape_mentions(deep=deep)
-        saved = 0
-        skipped = 0
-        fetched = 0
-        fetch_errors = 0
-        
-        for r in results:
-            mention_id = db.add_brand_mention(
-                title=r['title'],
-                url=r['url'],
-                source=r['source'],
-                source_type=r['source_type'],
-                snippet=r['snippet']
-            )
-            if mention_id:
-                saved += 1
-                # Auto-fetch full content for new mentions (skip videos/social)
-                if r['source_type'] not in ('video', 'social', 'own_site') and r['url']:
-                    try:
-                        content = fetch_full_content(r['url'])
-                        if content and len(content) > 100:
-                            db.update_brand_mention(mention_id, full_content=content)
-                            fetched += 1
-                    except Exception:
-                        fetch_errors += 1
-            else:
-                skipped += 1
-        
-        return jsonify({
-            'success': True,
-            'found': len(results),
-            'saved': saved,
-            'fetched_content': fetched,
-            'fetch_errors': fetch_errors,
-            'skipped_duplicates': skipped,
-            'mode': 'deep' if deep else 'quick',
-            'message': f"Scan complete. Found {len(results)} results, saved {saved} new mentions, {skipped} already existed."
-        })
+        deep = bool(data.get('deep', False))
+        job_id = jobs.enqueue('brand_intel_scan', {'deep': deep}, priority=10,
+                              dedupe_key=f"brand_intel_scan:{'deep' if deep else 'quick'}")
+        return jsonify({'success': True, 'queued': True, 'job_id': job_id})
     except Exception as e:
-        import traceback
-        traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -2608,24 +3128,30 @@ def scan_bourbon_contacts():
     return contacts
 
 
+@jobs.handler('outreach_scan')
+def run_outreach_scan():
+    contacts = scan_bourbon_contacts()
+    saved = 0
+    emails_found = 0
+    for c in contacts:
+        cid = db.add_outreach_contact(
+            name=c['name'], email=c.get('email', ''), platform=c.get('platform', ''),
+            platform_handle=c.get('platform_handle', ''), platform_url=c.get('platform_url', ''),
+            followers=c.get('followers', 0), category=c.get('category', 'influencer'),
+            tier=c.get('tier', '1'), notes=c.get('notes', '')
+        )
+        if cid:
+            saved += 1
+            if c.get('email'):
+                emails_found += 1
+    return {'success': True, 'found': len(contacts), 'saved': saved, 'emails_found': emails_found}
+
+
 @app.route('/api/outreach/scan', methods=['POST'])
 def api_outreach_scan():
     try:
-        contacts = scan_bourbon_contacts()
-        saved = 0
-        emails_found = 0
-        for c in contacts:
-            cid = db.add_outreach_contact(
-                name=c['name'], email=c.get('email', ''), platform=c.get('platform', ''),
-                platform_handle=c.get('platform_handle', ''), platform_url=c.get('platform_url', ''),
-                followers=c.get('followers', 0), category=c.get('category', 'influencer'),
-                tier=c.get('tier', '1'), notes=c.get('notes', '')
-            )
-            if cid:
-                saved += 1
-                if c.get('email'):
-                    emails_found += 1
-        return jsonify({'success': True, 'found': len(contacts), 'saved': saved, 'emails_found': emails_found})
+        job_id = jobs.enqueue('outreach_scan', priority=10, dedupe_key='outreach_scan')
+        return jsonify({'success': True, 'queued': True, 'job_id': job_id})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -2679,10 +3205,22 @@ def api_customer_emails_export():
     writer.writerow(['Email', 'Orders', 'Total Spend', 'AOV', 'First Order', 'Last Order'])
     for e in emails:
         writer.writerow([e['email'], e.get('orders', 1), e.get('total_spend', 0), e.get('aov', 0), e.get('first_order', ''), e.get('last_order', '')])
-    from flask import Response
     return Response(output.getvalue(), mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=forbidden_customer_emails.csv'})
 
 
+@app.route('/api/outreach/search')
+def api_outreach_search():
+    """Typo-tolerant search over contacts (name, handle, URL, email) and customer emails"""
+    query = request.args.get('q', '').strip()
+    scope = request.args.get('scope', 'all')
+    category = request.args.get('category') or None
+    limit = max(1, min(request.args.get('limit', 25, type=int), 200))
+    
+    contacts = db.search_outreach_contacts(query, category=category, limit=limit) if scope in ('all', 'contacts') else []
+    emails = db.search_customer_emails(query, limit=limit) if scope in ('all', 'emails') else []
+    return jsonify({'success': True, 'query': query, 'contacts': contacts, 'emails': emails})
+
+
 @app.route('/api/blog/scheduler-status', methods=['GET'])
 def api_blog_scheduler_status():
     """Check blog auto-scheduler status"""
@@ -2691,6 +3229,7 @@ def api_blog_scheduler_status():
     
     # Check recent auto-posts
     recent = db.get_blog_articles(limit=10)
+    upcoming = next_blog_slot(datetime.utcnow())
     
     return jsonify({
         'active': True,
@@ -2706,14 +3245,85 @@ def api_blog_scheduler_status():
             'Sunday': 'Off'
         },
         'recent_count': len(recent),
-        'total_published': db.get_blog_stats()['published']
+        'total_published': db.get_blog_stats()['published'],
+        'post_hour_utc': BLOG_POST_HOUR,
+        'catchup_hours': BLOG_CATCHUP_HOURS,
+        'next_slot': dict(zip(('run_date', 'platform', 'at'), upcoming)) if upcoming else None,
+        'runs': db.get_blog_schedule_runs(limit=30),
     })
 
 
+# ============================================================
+# STARTUP
+# ============================================================
+# Importing this module only defines the app and its routes. Touching the
+# disk or database and starting threads are explicit steps:
+#   init_storage()            once per deploy image (the gunicorn --preload master)
+#   start_background_tasks()  once per serving process, after the fork
+# gunicorn.conf.py calls both at the right moments; anything else that
+# serves requests (flask run, a bare `gunicorn app:app`) gets them lazily
+# on its first request.
+
+_startup_lock = threading.Lock()
+_storage_ready = False
+_tasks_pid = None
+
+
+def init_storage():
+    """Create the uploads folder, tables and seed data (idempotent)"""
+    global _storage_ready
+    with _startup_lock:
+        if _storage_ready:
+            return
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        db.init_db()
+        ensure_blog_platforms()
+        ensure_brand_mentions_table()
+        # Auto-seed content library on first run
+        try:
+            from seed_content import seed
+            seed()
+        except Exception as e:
+            print(f"Seed note: {e}")
+        _storage_ready = True
+
+
+def start_background_tasks():
+    """Start every registered leader loop in this process (idempotent, fork-aware)"""
+    global _tasks_pid
+    with _startup_lock:
+        if _tasks_pid == os.getpid():
+            return
+        _tasks_pid = os.getpid()
+    for name, (target, interval) in BACKGROUND_LOOPS.items():
+        start_leader_loop(name, target, interval)
+
+
+def create_app():
+    """Application factory for gunicorn ('app:create_app()'), worker.py and local runs.
+
+    Prepares storage but starts no threads, so a --preload master can build
+    one initialized image and fork it; workers call start_background_tasks().
+    """
+    init_storage()
+    return app
+
+
+@app.before_request
+def _lazy_startup():
+    if not _storage_ready or _tasks_pid != os.getpid():
+        init_storage()
+        start_background_tasks()
+
+
 # ============================================================
 # RUN
 # ============================================================
 
 if __name__ == '__main__':
+    create_app()
+    start_background_tasks()
+    # Local dev has no separate worker process; run the job worker alongside
+    threading.Thread(target=jobs.run_worker, daemon=True).start()
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=os.environ.get('DEBUG', 'false').lower() == 'true')
@@ -0,0 +1,379 @@
+"""
+Online Backup & Restore for Forbidden Command Center
+Snapshots every table into a compressed, checksummed archive without stopping the app.
+
+How it stays online:
+- SQLite: VACUUM INTO writes a temporary snapshot from a single read
+  transaction. In WAL mode writers carry on meanwhile, and unlike the backup
+  API the copy never restarts because someone wrote to the source.
+- PostgreSQL: one REPEATABLE READ, READ ONLY transaction streams COPY TO per
+  table. MVCC gives a consistent snapshot and never blocks writers.
+
+Archive layout (.tar.gz):
+  manifest.json     backend, created_at, per-table columns / row count / sha256
+  <table>.tsv       rows in PostgreSQL COPY text format (tab separated, \\N = NULL)
+plus a <archive>.sha256 sidecar with the checksum of the whole archive.
+
+Restore verifies every checksum, then reloads all tables inside one
+transaction (COPY FROM on PostgreSQL with user triggers such as the change
+feed's NOTIFY switched off, executemany on SQLite).
+
+Usage:
+  python backup.py create [archive_path]
+  python backup.py verify <archive_path>
+  python backup.py restore <archive_path>
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import hashlib
+import tarfile
+import tempfile
+from datetime import datetime
+
+import database as db
+
+BACKUP_DIR = os.environ.get('BACKUP_DIR', 'backups')
+BACKUP_FORMAT = 1
+BATCH_SIZE = 1000
+
+# Parents first so foreign keys resolve on load; anything else follows alphabetically
+TABLE_ORDER = ['platforms', 'posts', 'post_platforms', 'content_templates', 'hashtag_groups',
+               'analytics', 'activity_log', 'ai_gallery', 'blog_articles', 'blog_topics',
+               'brand_mentions', 'outreach_contacts', 'customer_emails']
+
+
+# ============================================================
+# COPY TEXT FORMAT
+# ============================================================
+
+_ESCAPES = {'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'}
+_UNESCAPES = {'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v', '\\': '\\'}
+
+
+def encode_row(values):
+    """One row in COPY text format (no trailing newline)"""
+    fields = []
+    for v in values:
+        if v is None:
+            fields.append('\\N')
+        else:
+            if isinstance(v, bytes):
+                v = v.decode('utf-8', 'replace')
+            fields.append(''.join(_ESCAPES.get(ch, ch) for ch in str(v)))
+    return '\t'.join(fields)
+
+
+def decode_row(line):
+    """Parse one COPY text format line back into a list of str/None"""
+    values = []
+    for field in line.rstrip('\n').split('\t'):
+        if field == '\\N':
+            values.append(None)
+        elif '\\' not in field:
+            values.append(field)
+        else:
+            out = []
+            i = 0
+            while i < len(field):
+                ch = field[i]
+                if ch == '\\' and i + 1 < len(field):
+                    out.append(_UNESCAPES.get(field[i + 1], field[i + 1]))
+                    i += 2
+                else:
+                    out.append(ch)
+                    i += 1
+            values.append(''.join(out))
+    return values
+
+
+def order_tables(names):
+    known = [t for t in TABLE_ORDER if t in names]
+    return known + sorted(t for t in names if t not in TABLE_ORDER)
+
+
+# ============================================================
+# CREATE
+# ============================================================
+
+class _HashingWriter:
+    """File-like sink that hashes and counts what is written through it"""
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.sha.update(data)
+        self.size += len(data)
+        self.fileobj.write(data)
+        return len(data)
+
+
+def _sqlite_tables(conn):
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                        "AND name NOT LIKE 'sqlite_%' AND name NOT LIKE '%_fts%'").fetchall()
+    return order_tables([r[0] for r in rows])
+
+
+def _pg_tables(cur):
+    cur.execute("""SELECT table_name FROM information_schema.tables
+                   WHERE table_schema = 'public' AND table_type = 'BASE TABLE'""")
+    return order_tables([r[0] for r in cur.fetchall()])
+
+
+def _add_member(tar, name, spool, sha, size, manifest_entry):
+    spool.seek(0)
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(time.time())
+    tar.addfile(info, spool)
+    manifest_entry.update({'file': name, 'sha256': sha, 'bytes': size})
+
+
+def _dump_sqlite(tar, manifest):
+    """VACUUM INTO snapshot, then stream each table out of the snapshot"""
+    import sqlite3
+    snapshot_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(db.DB_PATH)))
+    snapshot_path = os.path.join(snapshot_dir, 'snapshot.db')
+    try:
+        src = sqlite3.connect(db.DB_PATH, timeout=30)
+        started = time.time()
+        # A reader: sees one consistent version of the database and holds no write lock
+        src.execute('VACUUM INTO ?', (snapshot_path,))
+        src.close()
+        print(f"[Backup] SQLite snapshot taken in {time.time() - started:.2f}s")
+        dst = sqlite3.connect(snapshot_path)
+
+        for table in _sqlite_tables(dst):
+            cur = dst.execute(f'SELECT * FROM "{table}"')
+            columns = [d[0] for d in cur.description]
+            rows = 0
+            with tempfile.TemporaryFile() as spool:
+                writer = _HashingWriter(spool)
+                while True:
+                    batch = cur.fetchmany(BATCH_SIZE)
+                    if not batch:
+                        break
+                    writer.write(''.join(encode_row(r) + '\n' for r in batch))
+                    rows += len(batch)
+                entry = {'columns': columns, 'rows': rows}
+                _add_member(tar, f'{table}.tsv', spool, writer.sha.hexdigest(), writer.size, entry)
+            manifest['tables'][table] = entry
+        dst.close()
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+def _dump_postgres(tar, manifest):
+    """Stream COPY TO per table inside one read-only snapshot transaction"""
+    import psycopg2.extensions
+    conn = db.get_db()
+    try:
+        conn.set_session(isolation_level=psycopg2.extensions.ISOLATION_LEVEL_REPEATABLE_READ, readonly=True)
+        cur = conn.cursor()
+        for table in _pg_tables(cur):
+            cur.execute(f'SELECT * FROM "{table}" LIMIT 0')
+            columns = [d[0] for d in cur.description]
+            with tempfile.TemporaryFile() as spool:
+                writer = _HashingWriter(spool)
+                cur.copy_expert(f'COPY "{table}" TO STDOUT', writer)
+                spool.seek(0)
+                rows = sum(1 for _ in spool)
+                entry = {'columns': columns, 'rows': rows}
+                _add_member(tar, f'{table}.tsv', spool, writer.sha.hexdigest(), writer.size, entry)
+            manifest['tables'][table] = entry
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+def _file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def create_backup(archive_path=None):
+    """Write a backup archive and its .sha256 sidecar; returns the manifest"""
+    if not archive_path:
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+        archive_path = os.path.join(BACKUP_DIR, f'command_center-{stamp}.tar.gz')
+
+    started = time.time()
+    manifest = {
+        'format': BACKUP_FORMAT,
+        'backend': 'postgres' if db.USE_POSTGRES else 'sqlite',
+        'created_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        'tables': {},
+    }
+    tmp_path = archive_path + '.partial'
+    with tarfile.open(tmp_path, 'w:gz', compresslevel=6) as tar:
+        if db.USE_POSTGRES:
+            _dump_postgres(tar, manifest)
+        else:
+            _dump_sqlite(tar, manifest)
+        data = json.dumps(manifest, indent=2).encode('utf-8')
+        info = tarfile.TarInfo('manifest.json')
+        info.size = len(data)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(data))
+    os.replace(tmp_path, archive_path)
+
+    with open(archive_path + '.sha256', 'w') as f:
+        f.write(f'{_file_sha256(archive_path)}  {os.path.basename(archive_path)}\n')
+
+    total_rows = sum(t['rows'] for t in manifest['tables'].values())
+    print(f"[Backup] ✓ {archive_path}: {len(manifest['tables'])} tables, {total_rows} rows, "
+          f"{os.path.getsize(archive_path) / 1024:.1f} KB in {time.time() - started:.2f}s")
+    manifest['path'] = archive_path
+    return manifest
+
+
+# ============================================================
+# VERIFY / RESTORE
+# ============================================================
+
+def _read_manifest(tar):
+    return json.load(tar.extractfile('manifest.json'))
+
+
+def verify_backup(archive_path):
+    """Check the archive sidecar checksum and every table checksum"""
+    sidecar = archive_path + '.sha256'
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            expected = f.read().split()[0]
+        if _file_sha256(archive_path) != expected:
+            raise ValueError(f'Archive checksum mismatch: {archive_path}')
+
+    with tarfile.open(archive_path, 'r:gz') as tar:
+        manifest = _read_manifest(tar)
+        for table, entry in manifest['tables'].items():
+            sha = hashlib.sha256()
+            f = tar.extractfile(entry['file'])
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+            if sha.hexdigest() != entry['sha256']:
+                raise ValueError(f'Checksum mismatch for table {table}')
+    return manifest
+
+
+def _current_columns(conn, table):
+    if db.USE_POSTGRES:
+        cur = conn.cursor()
+        cur.execute(f'SELECT * FROM "{table}" LIMIT 0')
+        return [d[0] for d in cur.description]
+    return [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")').fetchall()]
+
+
+def _iter_rows(member, keep):
+    """Decoded rows from a table member, projected onto the `keep` column indexes"""
+    for raw in io.TextIOWrapper(member, encoding='utf-8', newline='\n'):
+        values = decode_row(raw)
+        yield [values[i] for i in keep]
+
+
+def _reset_sequences(cur, tables):
+    for table in tables:
+        cur.execute(f"""SELECT setval(pg_get_serial_sequence('"{table}"', 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL)
+                        FROM "{table}" WHERE pg_get_serial_sequence('"{table}"', 'id') IS NOT NULL""")
+
+
+def restore_backup(archive_path):
+    """Replace the contents of every archived table in a single transaction"""
+    manifest = verify_backup(archive_path)
+    started = time.time()
+    conn = db.get_db()
+    restored = {}
+    try:
+        with tarfile.open(archive_path, 'r:gz') as tar:
+            if db.USE_POSTGRES:
+                cur = conn.cursor()
+                cur.execute("""SELECT table_name FROM information_schema.tables
+                               WHERE table_schema = 'public' AND table_type = 'BASE TABLE'""")
+                existing = {r[0] for r in cur.fetchall()}
+            else:
+                conn.isolation_level = None
+                conn.execute('BEGIN IMMEDIATE')
+                existing = set(_sqlite_tables(conn))
+            tables = [t for t in order_tables(list(manifest['tables'])) if t in existing]
+
+            if db.USE_POSTGRES:
+                cur.execute('TRUNCATE ' + ', '.join(f'"{t}"' for t in tables) + ' RESTART IDENTITY CASCADE')
+            else:
+                for table in reversed(tables):
+                    conn.execute(f'DELETE FROM "{table}"')
+
+            for table in tables:
+                entry = manifest['tables'][table]
+                current = set(_current_columns(conn, table))
+                keep = [i for i, c in enumerate(entry['columns']) if c in current]
+                columns = [entry['columns'][i] for i in keep]
+                col_sql = ', '.join(f'"{c}"' for c in columns)
+                member = tar.extractfile(entry['file'])
+
+                if db.USE_POSTGRES:
+                    # Change-feed and other user triggers would fire once per restored row
+                    cur.execute(f'ALTER TABLE "{table}" DISABLE TRIGGER USER')
+                    if len(keep) == len(entry['columns']):
+                        cur.copy_expert(f'COPY "{table}" ({col_sql}) FROM STDIN', member)
+                    else:
+                        # Archive has columns this schema dropped: re-encode without them
+                        projected = io.StringIO(''.join(encode_row(r) + '\n' for r in _iter_rows(member, keep)))
+                        cur.copy_expert(f'COPY "{table}" ({col_sql}) FROM STDIN', projected)
+                    cur.execute(f'ALTER TABLE "{table}" ENABLE TRIGGER USER')
+                else:
+                    placeholders = ', '.join('?' for _ in columns)
+                    sql = f'INSERT INTO "{table}" ({col_sql}) VALUES ({placeholders})'
+                    batch = []
+                    for row in _iter_rows(member, keep):
+                        batch.append(row)
+                        if len(batch) >= BATCH_SIZE:
+                            conn.executemany(sql, batch)
+                            batch = []
+                    if batch:
+                        conn.executemany(sql, batch)
+                restored[table] = entry['rows']
+
+            if db.USE_POSTGRES:
+                _reset_sequences(cur, tables)
+                conn.commit()
+            else:
+                conn.execute('COMMIT')
+    except Exception:
+        if db.USE_POSTGRES:
+            conn.rollback()
+        elif conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+    print(f"[Restore] ✓ {archive_path}: {len(restored)} tables, {sum(restored.values())} rows "
+          f"in {time.time() - started:.2f}s")
+    return restored
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'create'
+    path = sys.argv[2] if len(sys.argv) > 2 else None
+    if command == 'create':
+        create_backup(path)
+    elif command == 'verify' and path:
+        manifest = verify_backup(path)
+        print(f"[Backup] ✓ {path} OK — {len(manifest['tables'])} tables from {manifest['backend']} at {manifest['created_at']}")
+    elif command == 'restore' and path:
+        restore_backup(path)
+    else:
+        print(__doc__)
+        sys.exit(1)
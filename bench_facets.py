@@ -0,0 +1,95 @@
+"""
+Facet builder microbenchmark for Forbidden Command Center
+Times facets.build_facets against the old per-match prefix re-encoding on
+long, hashtag-heavy posts, and checks both produce the same offsets.
+
+- Posts mix ASCII, accented text and emoji so byte and char offsets differ
+- Mentions are resolved by a stub, so no network is used
+
+Usage:
+  python bench_facets.py
+  python bench_facets.py --sizes 300 3000 30000 --runs 5
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from statistics import median
+
+from facets import build_facets
+
+WORDS = ['bourbon', 'neat', 'oak', 'caramel', 'café', 'wheated', 'rye', '🥃', 'Kentucky', 'smooth', 'proof', '🔥']
+
+
+def legacy_facets(text):
+    """The old _parse_facets: re-encodes the text prefix for every boundary"""
+    facets = []
+    for match in re.finditer(r'https?://[^\s<>\"\']+', text):
+        start = len(text[:match.start()].encode('utf-8'))
+        end = len(text[:match.end()].encode('utf-8'))
+        facets.append({'index': {'byteStart': start, 'byteEnd': end},
+                       'features': [{'$type': 'app.bsky.richtext.facet#link', 'uri': match.group()}]})
+    for match in re.finditer(r'(?:^|\s)(#[a-zA-Z0-9_]+)', text):
+        tag = match.group(1)
+        start = len(text[:match.start(1)].encode('utf-8'))
+        end = len(text[:match.start(1) + len(tag)].encode('utf-8'))
+        facets.append({'index': {'byteStart': start, 'byteEnd': end},
+                       'features': [{'$type': 'app.bsky.richtext.facet#tag', 'tag': tag[1:]}]})
+    return facets
+
+
+def make_post(length, seed=1):
+    rng = random.Random(seed)
+    parts, size = [], 0
+    while size < length:
+        roll = rng.random()
+        if roll < 0.3:
+            part = f'#{rng.choice(WORDS[:5])}{rng.randint(0, 99)}'
+        elif roll < 0.35:
+            part = f'https://drinkforbidden.com/p/{rng.randint(0, 9999)}'
+        elif roll < 0.38:
+            part = f'@fan{rng.randint(0, 50)}.bsky.social'
+        else:
+            part = rng.choice(WORDS)
+        parts.append(part)
+        size += len(part) + 1
+    return ' '.join(parts)[:length]
+
+
+def best_time(fn, text, runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(text)
+        times.append(time.perf_counter() - started)
+    return median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Bluesky facet builder')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[300, 3000, 30000])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    resolve = lambda handles: {h: f'did:plc:{h.split(".")[0]}' for h in handles}
+    for size in args.sizes:
+        text = make_post(size)
+        new = build_facets(text, resolve=resolve)
+        old = legacy_facets(text)
+        # Same link/tag offsets (the new builder also trims trailing punctuation and adds mentions)
+        key = lambda f: (f['index']['byteStart'], f['features'][0]['$type'])
+        comparable = [f for f in new if not f['features'][0]['$type'].endswith('#mention')]
+        if sorted(map(key, comparable)) != sorted(map(key, old)):
+            print(f"[Facets] ✗ offsets differ from the old builder at {size} chars")
+            return 1
+        old_time = best_time(legacy_facets, text, args.runs)
+        new_time = best_time(lambda t: build_facets(t, resolve=resolve), text, args.runs)
+        print(f"[Facets] {size:>6} chars, {len(new):>5} facets: old {old_time * 1000:8.2f} ms  "
+              f"new {new_time * 1000:7.2f} ms  ({old_time / new_time:.1f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,188 @@
+"""
+Publish throughput benchmark for Forbidden Command Center
+Publishes posts to Bluesky, Twitter, Facebook and LinkedIn against a local
+mock API with a fixed delay per call, and reports publishes per second for
+the ways the app drives publisher.py.
+
+- sequential: one publish_to_platform call after another
+- one batch: every (post, platform) job in a single publish_many call
+- job worker: --workers posts at a time, each through publish_many (what
+  worker.py does with publish_post jobs)
+- slow LinkedIn: one batch with LinkedIn answering --slow seconds per call;
+  shows when each platform finished, so a slow API holding up the others
+  is visible at once
+
+Bluesky posts carry a mention, so the handle lookup runs on every cold start.
+Runs against a throwaway SQLite file and 127.0.0.1; nothing leaves the machine.
+
+Usage:
+  python bench_publish.py
+  python bench_publish.py --posts 100 --latency 0.04 --slow 0.3 --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PLATFORMS = ('bluesky', 'twitter', 'facebook', 'linkedin')
+CONFIGS = {
+    'bluesky': {'username': 'forbidden.bsky.social', 'api_key': 'app-password'},
+    'twitter': {'api_key': 'k', 'api_secret': 's', 'access_token': 'a', 'refresh_token': 't', 'username': 'forbidden'},
+    'facebook': {'access_token': 't', 'username': '1234'},
+    'linkedin': {'access_token': 't', 'username': 'urn:li:organization:1'},
+}
+# A far-future exp so the cached Bluesky session is reused for the whole run
+_JWT = 'e30.eyJleHAiOjQxMDI0NDQ4MDB9.sig'
+
+
+class MockAPI(BaseHTTPRequestHandler):
+    """Answers every publisher call after a delay: LATENCY, or SLOW for LinkedIn"""
+    protocol_version = 'HTTP/1.1'
+    latency = 0.04
+    slow = {}
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        platform = self.path.split('/')[1]
+        time.sleep(self.slow.get(platform, self.latency))
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if 'getProfiles' in self.path:
+            return self._reply(200, {'profiles': [{'handle': 'marianne.bsky.social', 'did': 'did:plc:marianne'}]})
+        self._reply(404, {})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if 'createSession' in self.path:
+            return self._reply(200, {'did': 'did:plc:forbidden', 'accessJwt': _JWT, 'refreshJwt': _JWT,
+                                     'handle': 'forbidden.bsky.social'})
+        if 'createRecord' in self.path:
+            return self._reply(200, {'uri': 'at://did:plc:forbidden/app.bsky.feed.post/1'})
+        if self.path.startswith('/twitter/'):
+            return self._reply(201, {'data': {'id': '1'}})
+        if self.path.startswith('/facebook/'):
+            return self._reply(200, {'id': '1234_1'})
+        if self.path.startswith('/linkedin/'):
+            return self._reply(201, {'id': 'urn:li:share:1'})
+        self._reply(404, {})
+
+
+def _jobs(posts):
+    jobs = []
+    for i in range(posts):
+        for platform in PLATFORMS:
+            text = f'Batch {i}: 95.2 proof, zero burn #bourbon'
+            if platform == 'bluesky':
+                text += ' with @marianne.bsky.social'
+            jobs.append((platform, text, None, CONFIGS[platform]))
+    return jobs
+
+
+def _check(results):
+    failed = [r for r in results if not r.success]
+    if failed:
+        raise SystemExit(f"[Bench] ✗ {len(failed)} publishes failed, e.g. {failed[0].platform}: {failed[0].error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark publish throughput against a local mock API')
+    parser.add_argument('--posts', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.04, help='seconds per mock API call')
+    parser.add_argument('--slow', type=float, default=0.3, help='LinkedIn seconds per call in the slow run')
+    parser.add_argument('--workers', type=int, default=4, help='posts the job worker publishes at a time')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DB_PATH'] = os.path.join(workdir, 'bench_publish.db')
+    os.environ['DATABASE_URL'] = ''
+    import database as db
+    import publisher
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        db.init_db()
+
+    MockAPI.latency = args.latency
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockAPI)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    publisher.BlueskyPublisher.BASE_URL = f'{base}/bluesky'
+    publisher.BlueskyPublisher.PUBLIC_API_URL = f'{base}/bluesky'
+    publisher.TwitterPublisher.API_URL = f'{base}/twitter'
+    publisher.FacebookPublisher.GRAPH_URL = f'{base}/facebook'
+    publisher.LinkedInPublisher.API_URL = f'{base}/linkedin'
+
+    jobs = _jobs(args.posts)
+    total = len(jobs)
+    caps = ', '.join(f'{p} {publisher.PLATFORM_CONCURRENCY.get(p, publisher.DEFAULT_PLATFORM_CONCURRENCY)}'
+                     for p in PLATFORMS)
+    print(f"[Bench] {args.posts} posts x {len(PLATFORMS)} platforms, {args.latency * 1000:.0f} ms per call, "
+          f"lanes: {caps}")
+    _check(publisher.publish_many(jobs[:len(PLATFORMS)]))  # log in, warm the sessions and handle cache
+
+    def report(name, started):
+        elapsed = time.perf_counter() - started
+        print(f"[Bench] {name:<34} {elapsed:6.2f} s  {total / elapsed:6.0f} publishes/s")
+
+    started = time.perf_counter()
+    _check([publisher.publish_to_platform(*job) for job in jobs])
+    report('sequential publish_to_platform', started)
+
+    started = time.perf_counter()
+    _check(publisher.publish_many(jobs))
+    report('one publish_many batch', started)
+
+    per_post = [jobs[i:i + len(PLATFORMS)] for i in range(0, total, len(PLATFORMS))]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as worker:
+        _check([r for results in worker.map(publisher.publish_many, per_post) for r in results])
+    report(f'job worker ({args.workers} posts at a time)', started)
+
+    # When did each platform finish its posts, with LinkedIn slowed down?
+    MockAPI.slow = {'linkedin': args.slow}
+    finished = {}
+    original = publisher.publish_to_platform
+
+    def timed(platform_name, *rest):
+        result = original(platform_name, *rest)
+        finished[platform_name] = time.perf_counter()
+        return result
+
+    publisher.publish_to_platform = timed
+    started = time.perf_counter()
+    try:
+        _check(publisher.publish_many(jobs))
+    finally:
+        publisher.publish_to_platform = original
+        MockAPI.slow = {}
+    print(f"[Bench] LinkedIn at {args.slow * 1000:.0f} ms per call, each platform done after: " +
+          '  '.join(f'{p} {finished[p] - started:.2f} s' for p in PLATFORMS))
+
+    server.shutdown()
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
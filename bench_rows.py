@@ -0,0 +1,123 @@
+"""
+Row model benchmark for Forbidden Command Center
+Compares plain dict rows with the slotted Post models on a large posts list:
+load time, formatting two timestamps per row as the templates do, and the
+memory the loaded list keeps alive.
+
+- Dict rows go through _fetchall and the old strptime-per-call filters
+- Models go through _fetch_models and the current filters on parsed datetimes
+- Runs against a throwaway SQLite file, never DATABASE_URL
+
+Usage:
+  python bench_rows.py
+  python bench_rows.py --rows 10000 --runs 5
+"""
+
+import os
+import sys
+import gc
+import time
+import tempfile
+import argparse
+import contextlib
+import tracemalloc
+from datetime import datetime, timedelta
+from statistics import median
+
+
+def legacy_shortdate(dt_string):
+    """The old shortdate filter: parses the text on every call"""
+    return datetime.strptime(dt_string, '%Y-%m-%d %H:%M:%S').strftime('%b %d, %I:%M %p')
+
+
+def legacy_caldate(dt_string):
+    return datetime.strptime(dt_string, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%dT%H:%M')
+
+
+def best_time(fn, runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return median(times)
+
+
+def retained(load):
+    """Bytes still allocated while the loaded list is alive"""
+    gc.collect()
+    tracemalloc.start()
+    rows = load()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del rows
+    return size
+
+
+def seed(db, count):
+    start = datetime(2026, 1, 1, 9, 0)
+    conn = db.get_db()
+    conn.executemany(
+        '''INSERT INTO posts (content, image_path, status, post_type, hashtags, created_at, scheduled_at, notes)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+        [(f'Post {i}: small batch, wheated, 95.2 proof #bourbon #forbidden', f'/static/uploads/{i}.jpg',
+          'scheduled', 'standard', '#bourbon #forbidden',
+          (start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'),
+          (start + timedelta(hours=i)).strftime('%Y-%m-%d %H:%M:%S'), '') for i in range(count)])
+    conn.commit()
+    conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dict rows against slotted row models')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DB_PATH'] = os.path.join(workdir, 'bench_rows.db')
+    os.environ['DATABASE_URL'] = ''
+    import database as db
+    from app import shortdate_filter, caldate_filter
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        db.init_db()
+    conn = db.get_db()
+    conn.execute('DELETE FROM posts')
+    conn.commit()
+    conn.close()
+    seed(db, args.rows)
+
+    sql = 'SELECT * FROM posts'
+    conn = db.get_db()
+    load_dicts = lambda: db._fetchall(conn, sql)
+    load_models = lambda: db._fetch_models(conn, db.Post, sql)
+    dicts, models = load_dicts(), load_models()
+    if len(dicts) != len(models) or shortdate_filter(models[0].created_at) != legacy_shortdate(dicts[0]['created_at']):
+        print("[Rows] ✗ models and dicts disagree")
+        return 1
+
+    results = {
+        'load': (best_time(load_dicts, args.runs), best_time(load_models, args.runs)),
+        'format 2 dates': (
+            best_time(lambda: [(legacy_shortdate(r['created_at']), legacy_caldate(r['scheduled_at']))
+                               for r in dicts], args.runs),
+            best_time(lambda: [(shortdate_filter(r.created_at), caldate_filter(r.scheduled_at))
+                               for r in models], args.runs)),
+    }
+    memory = (retained(load_dicts), retained(load_models))
+    conn.close()
+
+    print(f"[Rows] {args.rows:,} posts on SQLite, median of {args.runs}")
+    for name, (old, new) in results.items():
+        print(f"[Rows] {name:<15} dicts {old * 1000:8.1f} ms   models {new * 1000:8.1f} ms  ({old / new:.1f}x)")
+    print(f"[Rows] {'retained memory':<15} dicts {memory[0] / 1e6:8.2f} MB   models {memory[1] / 1e6:8.2f} MB  "
+          f"({memory[0] / memory[1]:.1f}x)")
+
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,121 @@
+"""
+Leader election check for Forbidden Command Center
+Starts several processes competing for one db.LeaderLease on a shared SQLite
+file and fails unless exactly one leads and a killed leader is replaced in time.
+
+- Exactly one process may report leadership, and it must stay the only one
+  for a few lease lifetimes
+- After the leader is SIGKILLed (no atexit, no release) another process must
+  take over within LEADER_LEASE_TTL plus one renew interval
+
+Runs against a throwaway SQLite file, never DATABASE_URL.
+
+Usage:
+  python check_leader.py                   # exit 1 on a split brain or slow failover
+  python check_leader.py --processes 5 --ttl 3
+"""
+
+import os
+import sys
+import time
+import queue
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+
+_CONTENDER = r'''
+import sys, time
+import database as db
+lease = db.LeaderLease('check_leader')
+lease.wait()
+print('LEADER', flush=True)
+while lease.held:
+    time.sleep(0.1)
+print('LOST', flush=True)
+'''
+
+
+def _read_lines(proc, events):
+    for line in proc.stdout:
+        events.put((time.monotonic(), proc.pid, line.strip()))
+
+
+def _leaders(events, leaders, timeout):
+    """Collect LEADER/LOST lines for up to timeout seconds; returns the current leader pids"""
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return leaders
+        try:
+            at, pid, line = events.get(timeout=remaining)
+        except queue.Empty:
+            return leaders
+        if line == 'LEADER':
+            leaders[pid] = at
+        elif line == 'LOST':
+            leaders.pop(pid, None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check single-leader election and failover across processes')
+    parser.add_argument('--processes', type=int, default=3)
+    parser.add_argument('--ttl', type=int, default=3, help='LEADER_LEASE_TTL for the contenders, in seconds')
+    args = parser.parse_args(argv)
+
+    renew = max(1, args.ttl // 3)
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, DB_PATH=os.path.join(workdir, 'leader.db'), DATABASE_URL='',
+               LEADER_LEASE_TTL=str(args.ttl), PYTHONUNBUFFERED='1')
+    here = os.path.dirname(os.path.abspath(__file__))
+    events = queue.Queue()
+    procs = []
+    problems = []
+    try:
+        for _ in range(args.processes):
+            proc = subprocess.Popen([sys.executable, '-c', _CONTENDER], cwd=here, env=env,
+                                    stdout=subprocess.PIPE, text=True)
+            threading.Thread(target=_read_lines, args=(proc, events), daemon=True).start()
+            procs.append(proc)
+
+        # Let every contender start, and the lease run through a few lifetimes
+        leaders = _leaders(events, {}, 3 * args.ttl + 2)
+        print(f"[Leader] {args.processes} processes, TTL {args.ttl}s: leaders {sorted(leaders) or 'none'}")
+        if len(leaders) != 1:
+            problems.append(f'expected exactly one leader, got {len(leaders)}')
+        else:
+            old = next(iter(leaders))
+            killed_at = time.monotonic()
+            os.kill(old, signal.SIGKILL)
+            leaders.pop(old)
+            limit = args.ttl + renew
+            leaders = _leaders(events, leaders, limit + 2 * args.ttl)
+            if len(leaders) != 1:
+                problems.append(f'expected exactly one leader after the kill, got {len(leaders)}')
+            else:
+                failover = next(iter(leaders.values())) - killed_at
+                print(f"[Leader] SIGKILLed {old}; {next(iter(leaders))} took over after {failover:.1f}s "
+                      f"(limit {limit}s)")
+                if failover > limit:
+                    problems.append(f'failover took {failover:.1f}s, over the {limit}s limit')
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+    for problem in problems:
+        print(f"[Leader] ✗ {problem}")
+    if problems:
+        return 1
+    print("[Leader] ✓ one leader, failover within the lease TTL")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,132 @@
+"""
+Publish retry safety check for Forbidden Command Center
+Runs app.publish_post_now against a local mock API and fails if a create call
+that may have reached the platform gets a retry job (a post published twice).
+
+- A read timeout on Twitter's POST /2/tweets: no retry, post may exist
+- A 502 from Bluesky's createRecord: no retry, post may exist
+- A connection refused before the tweet was sent: retried
+- A 503 from Bluesky's createSession (not a create call): retried
+
+Runs against a throwaway SQLite file and 127.0.0.1; nothing leaves the machine.
+
+Usage:
+  python check_publish_retry.py            # exit 1 when a case is handled wrongly
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import threading
+import contextlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+READ_TIMEOUT = 0.5
+_JWT = 'e30.eyJleHAiOjQxMDI0NDQ4MDB9.sig'  # far-future exp
+
+
+class MockAPI(BaseHTTPRequestHandler):
+    """Bluesky and Twitter endpoints; MODE picks how the call under test fails"""
+    protocol_version = 'HTTP/1.1'
+    mode = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if 'createSession' in self.path and self.mode.get('bluesky') == 'login503':
+            return self._reply(503, {'error': 'ServiceUnavailable'})
+        if 'createSession' in self.path:
+            return self._reply(200, {'did': 'did:plc:forbidden', 'accessJwt': _JWT, 'refreshJwt': _JWT,
+                                     'handle': 'forbidden.bsky.social'})
+        if 'createRecord' in self.path and self.mode.get('bluesky') == '502':
+            return self._reply(502, {'error': 'Bad Gateway'})
+        if 'createRecord' in self.path:
+            return self._reply(200, {'uri': 'at://did:plc:forbidden/app.bsky.feed.post/1'})
+        if self.path.startswith('/2/tweets'):
+            if self.mode.get('twitter') == 'timeout':
+                time.sleep(READ_TIMEOUT * 3)  # the tweet is "stored", the answer is late
+            return self._reply(201, {'data': {'id': '1'}})
+        self._reply(404, {})
+
+
+def _closed_port():
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def main(argv=None):
+    workdir = tempfile.mkdtemp()
+    os.environ['DB_PATH'] = os.path.join(workdir, 'check_publish_retry.db')
+    os.environ['DATABASE_URL'] = ''
+    import database as db
+    import publisher
+    import credentials
+    import app
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        db.init_db()
+    db.update_platform('twitter', api_key='k', api_secret='s', access_token='a', refresh_token='t', connected=1)
+    db.update_platform('bluesky', username='forbidden.bsky.social', api_key='app-password', connected=1)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockAPI)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    publisher.HTTP_TIMEOUT = (1.0, READ_TIMEOUT)
+    publisher.BlueskyPublisher.BASE_URL = f'{base}/xrpc'
+    publisher.TwitterPublisher.API_URL = f'{base}/2'
+
+    cases = [
+        # (name, platform, mode, expect a retry job)
+        ('tweet read timeout', 'twitter', {'twitter': 'timeout'}, False),
+        ('createRecord 502', 'bluesky', {'bluesky': '502'}, False),
+        ('tweet connection refused', 'twitter', {'refused': True}, True),
+        ('login 503', 'bluesky', {'bluesky': 'login503'}, True),
+    ]
+    problems = []
+    for name, platform, mode, expect_retry in cases:
+        MockAPI.mode = mode
+        publisher.TwitterPublisher.API_URL = f'http://127.0.0.1:{_closed_port()}/2' if mode.get('refused') \
+            else f'{base}/2'
+        db.close_circuit(platform)
+        credentials.forget('bluesky')  # log in again each time, so the login can fail
+        post_id = db.create_post(f'{name}: 95.2 proof', status='scheduled', platforms=[platform])
+        with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            outcome = app.publish_post_now(post_id)
+        retries = [j for j in db.get_jobs(kind='publish_post', limit=500)
+                   if j['payload'].get('post_id') == post_id]
+        error = outcome['results'][0]['error'] if outcome['results'] else ''
+        ok = bool(retries) == expect_retry and not outcome['success']
+        print(f"[Retry] {'✓' if ok else '✗'} {name}: {'retry queued' if retries else 'no retry'} ({error[:90]})")
+        if not ok:
+            problems.append(name)
+
+    server.shutdown()
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+    for problem in problems:
+        print(f"[Retry] ✗ {problem}: wrong retry decision")
+    if problems:
+        return 1
+    print("[Retry] ✓ create calls that may have gone through are never retried")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
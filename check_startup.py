@@ -0,0 +1,80 @@
+"""
+Startup budget check for Forbidden Command Center
+Imports app.py in fresh interpreters and fails if the import is slow or has side effects.
+
+- `import app` must stay under the budget (median of --runs)
+- The import must not start threads or create the database
+- create_app() is timed separately; that is what a gunicorn --preload
+  master pays once before forking workers
+
+Runs against a throwaway SQLite file, never DATABASE_URL.
+
+Usage:
+  python check_startup.py                  # exit 1 when over budget
+  python check_startup.py --runs 7 --budget 1.5
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from statistics import median
+
+IMPORT_BUDGET_SECONDS = float(os.environ.get('STARTUP_IMPORT_BUDGET', 2.0))
+
+_PROBE = r'''
+import json, os, sys, threading, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+threads = threading.active_count()
+db_created = os.path.exists(os.environ['DB_PATH'])
+app.create_app()
+ready = time.perf_counter()
+print(json.dumps({'import': imported - started, 'create_app': ready - imported,
+                  'threads': threads, 'db_created': db_created}))
+'''
+
+
+def probe():
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DB_PATH=os.path.join(tmp, 'startup_check.db'))
+        env.pop('DATABASE_URL', None)
+        out = subprocess.run([sys.executable, '-c', _PROBE], env=env, capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    if out.returncode != 0:
+        raise SystemExit(f'[Startup] import failed:\n{out.stderr}')
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check that importing app.py is fast and side-effect free')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_SECONDS, help='seconds for `import app`')
+    args = parser.parse_args(argv)
+
+    results = [probe() for _ in range(args.runs)]
+    import_time = median(r['import'] for r in results)
+    create_time = median(r['create_app'] for r in results)
+    print(f"[Startup] import app: {import_time * 1000:.0f} ms median of {args.runs} (budget {args.budget * 1000:.0f} ms)")
+    print(f"[Startup] create_app(): {create_time * 1000:.0f} ms on a fresh SQLite database")
+
+    problems = []
+    if import_time > args.budget:
+        problems.append(f'import took {import_time:.2f}s, over the {args.budget:.2f}s budget')
+    if any(r['threads'] > 1 for r in results):
+        problems.append('import started background threads')
+    if any(r['db_created'] for r in results):
+        problems.append('import touched the database')
+    for problem in problems:
+        print(f"[Startup] ✗ {problem}")
+    if problems:
+        return 1
+    print("[Startup] ✓ within budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,148 @@
+"""
+Credential cache for Forbidden Command Center
+Keeps short-lived API credentials between publishes instead of logging in every time.
+
+- Entries are keyed by platform and an account fingerprint (a hash of the
+  long-lived secrets), so changing a password or token is an automatic miss
+- Each entry lives in memory and, encrypted, under the 'credential_cache' key of
+  the platform's additional_config, so web workers and the job worker share one login
+- An expired entry is renewed with the platform's refresh call when there is one,
+  and by logging in again otherwise
+
+Encryption uses Fernet with a key derived from CREDENTIAL_KEY (falling back to
+SECRET_KEY). Without the cryptography package nothing is persisted and the
+cache is per process.
+
+Usage:
+  import credentials
+
+  def login():
+      ...                                  # raise CredentialError on failure
+      return {'token': token}, time.time() + expires_in
+
+  data = credentials.obtain('reddit', credentials.fingerprint(client_id, user, password), login)
+  credentials.forget('reddit')             # after the API rejects the cached token
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+
+import database as db
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    CRYPTO_AVAILABLE = True
+except ImportError:
+    CRYPTO_AVAILABLE = False
+
+CACHE_CONFIG_KEY = 'credential_cache'
+EXPIRY_MARGIN = 120  # seconds; renew a little early so a token never expires mid-publish
+
+_memory = {}  # platform -> {'account', 'data', 'expires_at'}
+_locks = {}
+_locks_guard = threading.Lock()
+_fernet = None
+
+
+class CredentialError(Exception):
+    pass
+
+
+def fingerprint(*secrets):
+    """Short stable hash identifying the account the cached credentials belong to"""
+    return hashlib.sha256('\0'.join(str(s) for s in secrets).encode('utf-8')).hexdigest()[:16]
+
+
+def obtain(platform, account, login, refresh=None):
+    """Cached credentials for an account, renewing them when missing or expired.
+
+    login() and refresh(data) return (data, expires_at) with expires_at an epoch
+    time or None for never, and raise CredentialError when they can't. One
+    thread per process renews at a time; the others wait and reuse its result.
+    """
+    with _lock_for(platform):
+        entry = _memory.get(platform)
+        if not _usable(entry, account):
+            # Another worker may already have renewed it
+            entry = _load(platform)
+        if _usable(entry, account):
+            _memory[platform] = entry
+            return entry['data']
+
+        fresh = None
+        if refresh and entry and entry['account'] == account:
+            try:
+                fresh = refresh(entry['data'])
+            except CredentialError as e:
+                print(f"[Credentials] {platform} refresh failed, logging in again: {e}")
+        if fresh is None:
+            fresh = login()
+        data, expires_at = fresh
+        entry = {'account': account, 'data': data, 'expires_at': expires_at}
+        _memory[platform] = entry
+        _save(platform, entry)
+        return data
+
+
+def forget(platform):
+    """Drop a platform's cached credentials, e.g. after the API rejected them"""
+    with _lock_for(platform):
+        _memory.pop(platform, None)
+        try:
+            db.update_platform_config(platform, **{CACHE_CONFIG_KEY: None})
+        except Exception as e:
+            print(f"[Credentials] Could not clear {platform}: {e}")
+
+
+def _usable(entry, account):
+    if not entry or entry.get('account') != account:
+        return False
+    expires_at = entry.get('expires_at')
+    return expires_at is None or expires_at - EXPIRY_MARGIN > time.time()
+
+
+def _lock_for(platform):
+    with _locks_guard:
+        return _locks.setdefault(platform, threading.Lock())
+
+
+# ------------------------------------------------------------
+# Persistence (encrypted, in platforms.additional_config)
+# ------------------------------------------------------------
+
+def _cipher():
+    global _fernet
+    if _fernet is None:
+        secret = os.environ.get('CREDENTIAL_KEY') or os.environ.get('SECRET_KEY', 'forbidden-command-center-2025')
+        _fernet = Fernet(base64.urlsafe_b64encode(hashlib.sha256(secret.encode('utf-8')).digest()))
+    return _fernet
+
+
+def _load(platform):
+    if not CRYPTO_AVAILABLE:
+        return None
+    try:
+        row = db.get_platform(platform)
+        token = row.config.get(CACHE_CONFIG_KEY) if row else None
+        if not token:
+            return None
+        return json.loads(_cipher().decrypt(token.encode('ascii')))
+    except InvalidToken:
+        return None  # written under a different key; treat as a miss
+    except Exception as e:
+        print(f"[Credentials] Could not load {platform}: {e}")
+        return None
+
+
+def _save(platform, entry):
+    if not CRYPTO_AVAILABLE:
+        return
+    try:
+        token = _cipher().encrypt(json.dumps(entry).encode('utf-8')).decode('ascii')
+        db.update_platform_config(platform, **{CACHE_CONFIG_KEY: token})
+    except Exception as e:
+        print(f"[Credentials] Could not save {platform}: {e}")
@@ -1,6 +1,17 @@
 # Forbidden Bourbon Command Center Database v12.1 — Blog tables + 6 platform seeds
 import os
 import json
+import math
+import atexit
+import queue
+import select
+import socket
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from collections.abc import Mapping
 from datetime import datetime, timedelta
 
 # ============================================================
@@ -64,6 +75,181 @@ def _fetchall(conn, sql, params=None):
     return [dict(r) for r in rows]
 
 
+def _fetch_models(conn, model, sql, params=None):
+    """Run a query on a plain tuple cursor and build model rows from it"""
+    cur = conn.cursor()
+    if USE_POSTGRES:
+        cur.execute(sql.replace('?', '%s'), params)
+    else:
+        cur.row_factory = None
+        cur.execute(sql, params or ())
+    return model.from_rows([d[0] for d in cur.description], cur.fetchall())
+
+
+def _fetch_model(conn, model, sql, params=None):
+    rows = _fetch_models(conn, model, sql, params)
+    return rows[0] if rows else None
+
+
+# ============================================================
+# ROW MODELS - slotted rows for the hot tables
+# ============================================================
+
+def _parse_timestamp(value):
+    """SQLite returns text, psycopg2 a datetime; normalize both to datetime"""
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class Row:
+    """Dict-compatible row backed by __slots__.
+
+    row['x'], row.get('x'), 'x' in row, dict(row) and Jinja's row.x all work.
+    Timestamp columns are parsed once at load time. Columns not listed in
+    FIELDS (and keys set later by callers) go to a small overflow dict.
+    """
+    __slots__ = ('_extra',)
+    FIELDS = ()
+    TIMESTAMPS = ()
+    _field_set = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+
+    @classmethod
+    def from_rows(cls, columns, rows):
+        setters = []
+        extra = []
+        for i, col in enumerate(columns):
+            if col in cls._field_set:
+                setters.append((getattr(cls, col).__set__, i, col in cls.TIMESTAMPS))
+            else:
+                extra.append((col, i))
+        new = object.__new__
+        out = []
+        for row in rows:
+            obj = new(cls)
+            for set_value, i, is_ts in setters:
+                set_value(obj, _parse_timestamp(row[i]) if is_ts else row[i])
+            obj._extra = {col: row[i] for col, i in extra} if extra else None
+            obj._loaded()
+            out.append(obj)
+        return out
+
+    def _loaded(self):
+        pass
+
+    def __getitem__(self, key):
+        try:
+            if key in self._field_set:
+                return getattr(self, key)
+            return self._extra[key]
+        except (AttributeError, KeyError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = [f for f in self.FIELDS if hasattr(self, f)]
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __contains__(self, key):
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+
+Mapping.register(Row)
+
+
+class Post(Row):
+    FIELDS = ('id', 'content', 'image_path', 'status', 'post_type', 'hashtags', 'link_url', 'ai_generated',
+              'created_at', 'scheduled_at', 'published_at', 'notes', 'series_id', 'platforms', 'media')
+    TIMESTAMPS = ('created_at', 'scheduled_at', 'published_at')
+    __slots__ = FIELDS
+
+
+class PostPlatform(Row):
+    FIELDS = ('id', 'post_id', 'platform_name', 'platform_post_id', 'status', 'published_at', 'error_message',
+              'attempts', 'last_attempt_at', 'next_attempt_at', 'attempt_log')
+    TIMESTAMPS = ('published_at', 'last_attempt_at', 'next_attempt_at')
+    __slots__ = FIELDS
+
+
+class Platform(Row):
+    FIELDS = ('id', 'name', 'display_name', 'icon', 'api_key', 'api_secret', 'access_token', 'refresh_token',
+              'additional_config', 'connected', 'username', 'created_at', 'updated_at')
+    TIMESTAMPS = ('created_at', 'updated_at')
+    __slots__ = FIELDS + ('config',)
+
+    def _loaded(self):
+        # additional_config parsed once per load instead of on every publish
+        try:
+            self.config = json.loads(self.additional_config or '{}')
+        except (AttributeError, TypeError, ValueError):
+            self.config = {}
+
+
+class BlogArticle(Row):
+    FIELDS = ('id', 'title', 'content', 'excerpt', 'topic', 'keywords', 'status', 'platform', 'platform_url',
+              'platform_post_id', 'word_count', 'ai_generated', 'published_at', 'created_at')
+    TIMESTAMPS = ('published_at', 'created_at')
+    __slots__ = FIELDS
+
+
+class BrandMention(Row):
+    FIELDS = ('id', 'title', 'url', 'source', 'source_type', 'snippet', 'full_content', 'author', 'sentiment',
+              'date_found', 'date_published', 'starred', 'notes', 'created_at')
+    TIMESTAMPS = ('date_found', 'created_at')
+    __slots__ = FIELDS
+
+
+class OutreachContact(Row):
+    FIELDS = ('id', 'name', 'email', 'platform', 'platform_handle', 'platform_url', 'followers', 'category',
+              'tier', 'status', 'notes', 'last_contacted', 'product_sent', 'responded', 'created_at')
+    TIMESTAMPS = ('created_at',)
+    __slots__ = FIELDS
+
+
 # ============================================================
 # INIT DATABASE
 # ============================================================
@@ -599,6 +785,25 @@ def init_db():
     seed_outreach_contacts()
     # Seed customer emails from Mash Networks
     seed_customer_emails()
+    # Trigram search indexes for the outreach hub
+    ensure_search_indexes()
+    # Live change feed: LISTEN/NOTIFY triggers on Postgres, the change_feed table on SQLite
+    ensure_change_feed()
+    # Durable job queue drained by worker.py
+    ensure_jobs_table()
+    # Last-run bookkeeping for recurring background tasks
+    ensure_task_state()
+    ensure_blog_schedule_runs()
+    # Per-platform publish quotas
+    ensure_rate_limits()
+    # Recurring post series (adds posts.series_id)
+    ensure_post_series()
+    # Publish attempt bookkeeping and per-platform circuit breakers
+    ensure_publish_resilience()
+    # Platform media references reused across posts
+    ensure_media_uploads()
+    # Ordered images per post (adds post_series.media)
+    ensure_post_media()
 
 
 def seed_outreach_contacts():
@@ -859,14 +1064,17 @@ def seed_brand_mentions():
 # ============================================================
 
 def create_post(content, image_path='', status='draft', hashtags='', link_url='', 
-                scheduled_at=None, platforms=None, ai_generated=0, notes=''):
+                scheduled_at=None, platforms=None, ai_generated=0, notes='', series_id=None, media=None):
+    # posts.image_path stays the first image, for thumbnails and older readers
+    media = [m for m in (media or []) if m]
+    image_path = image_path or (media[0] if media else '')
     conn = get_db()
     if USE_POSTGRES:
         cur = conn.cursor()
         cur.execute(
-            '''INSERT INTO posts (content, image_path, status, hashtags, link_url, scheduled_at, ai_generated, notes)
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id''',
-            (content, image_path, status, hashtags, link_url, scheduled_at, ai_generated, notes)
+            '''INSERT INTO posts (content, image_path, status, hashtags, link_url, scheduled_at, ai_generated, notes, series_id)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id''',
+            (content, image_path, status, hashtags, link_url, scheduled_at, ai_generated, notes, series_id)
         )
         post_id = cur.fetchone()[0]
         
@@ -879,9 +1087,9 @@ def create_post(content, image_path='', status='draft', hashtags='', link_url=''
     else:
         cursor = conn.cursor()
         cursor.execute('''
-            INSERT INTO posts (content, image_path, status, hashtags, link_url, scheduled_at, ai_generated, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (content, image_path, status, hashtags, link_url, scheduled_at, ai_generated, notes))
+            INSERT INTO posts (content, image_path, status, hashtags, link_url, scheduled_at, ai_generated, notes, series_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (content, image_path, status, hashtags, link_url, scheduled_at, ai_generated, notes, series_id))
         post_id = cursor.lastrowid
         
         if platforms:
@@ -891,18 +1099,26 @@ def create_post(content, image_path='', status='draft', hashtags='', link_url=''
                     (post_id, platform)
                 )
     
-    log_activity('post_created', f'New {status} post created', post_id)
+    if media:
+        conn.cursor().executemany(
+            f"INSERT INTO post_media (post_id, position, media_path) VALUES ({'%s, %s, %s' if USE_POSTGRES else '?, ?, ?'})",
+            [(post_id, position, path) for position, path in enumerate(media)])
     conn.commit()
     conn.close()
+    log_activity('post_created', f'New {status} post created', post_id)
+    _emit_local_change('posts', 'INSERT', {'id': post_id, 'status': status, 'scheduled_at': scheduled_at})
     return post_id
 
 
 def get_post(post_id):
     conn = get_db()
-    post = _fetchone(conn, 'SELECT * FROM posts WHERE id = ?', (post_id,))
+    post = _fetch_model(conn, Post, 'SELECT * FROM posts WHERE id = ?', (post_id,))
     if post:
-        platforms = _fetchall(conn, 'SELECT * FROM post_platforms WHERE post_id = ?', (post_id,))
+        platforms = _fetch_models(conn, PostPlatform, 'SELECT * FROM post_platforms WHERE post_id = ?', (post_id,))
         post['platforms'] = platforms
+        rows = _fetchall(conn, 'SELECT media_path FROM post_media WHERE post_id = ? ORDER BY position', (post_id,))
+        # Posts from before post_media have just their image_path
+        post['media'] = [r['media_path'] for r in rows] or ([post.image_path] if post.image_path else [])
     conn.close()
     return post
 
@@ -910,16 +1126,16 @@ def get_post(post_id):
 def get_posts(status=None, limit=50, offset=0):
     conn = get_db()
     if status:
-        posts = _fetchall(conn,
+        posts = _fetch_models(conn, Post,
             'SELECT * FROM posts WHERE status = ? ORDER BY created_at DESC LIMIT ? OFFSET ?',
             (status, limit, offset))
     else:
-        posts = _fetchall(conn,
+        posts = _fetch_models(conn, Post,
             'SELECT * FROM posts ORDER BY created_at DESC LIMIT ? OFFSET ?',
             (limit, offset))
     
     for p in posts:
-        platforms = _fetchall(conn, 'SELECT * FROM post_platforms WHERE post_id = ?', (p['id'],))
+        platforms = _fetch_models(conn, PostPlatform, 'SELECT * FROM post_platforms WHERE post_id = ?', (p.id,))
         p['platforms'] = platforms
     
     conn.close()
@@ -928,31 +1144,48 @@ def get_posts(status=None, limit=50, offset=0):
 
 def get_scheduled_posts():
     conn = get_db()
-    posts = _fetchall(conn, '''
+    posts = _fetch_models(conn, Post, '''
         SELECT * FROM posts 
         WHERE status = 'scheduled' AND scheduled_at IS NOT NULL 
         ORDER BY scheduled_at ASC
     ''')
     
     for p in posts:
-        platforms = _fetchall(conn, 'SELECT * FROM post_platforms WHERE post_id = ?', (p['id'],))
+        platforms = _fetch_models(conn, PostPlatform, 'SELECT * FROM post_platforms WHERE post_id = ?', (p.id,))
         p['platforms'] = platforms
     
     conn.close()
     return posts
 
 
+# A scheduled post with a platform waiting for a retry job is already in
+# flight; the scheduler leaves it to that job instead of publishing it again
+_NOT_AWAITING_RETRY = '''NOT EXISTS (SELECT 1 FROM post_platforms pp WHERE pp.post_id = posts.id
+                                      AND pp.status = 'pending' AND pp.next_attempt_at IS NOT NULL)'''
+
+
+def get_post_schedule():
+    """{post_id: scheduled_at} for every scheduled post (the scheduler's timer heap)"""
+    conn = get_db()
+    rows = _fetchall(conn, f'''
+        SELECT id, scheduled_at FROM posts
+        WHERE status = 'scheduled' AND scheduled_at IS NOT NULL AND {_NOT_AWAITING_RETRY}
+    ''')
+    conn.close()
+    return {r['id']: _parse_timestamp(r['scheduled_at']) for r in rows}
+
+
 def get_due_posts():
     conn = get_db()
     now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-    posts = _fetchall(conn, '''
+    posts = _fetch_models(conn, Post, f'''
         SELECT * FROM posts 
-        WHERE status = 'scheduled' AND scheduled_at <= ?
+        WHERE status = 'scheduled' AND scheduled_at <= ? AND {_NOT_AWAITING_RETRY}
         ORDER BY scheduled_at ASC
     ''', (now,))
     
     for p in posts:
-        platforms = _fetchall(conn, 'SELECT * FROM post_platforms WHERE post_id = ?', (p['id'],))
+        platforms = _fetch_models(conn, PostPlatform, 'SELECT * FROM post_platforms WHERE post_id = ?', (p.id,))
         p['platforms'] = platforms
     
     conn.close()
@@ -965,6 +1198,23 @@ def update_post(post_id, **kwargs):
                       'scheduled_at', 'published_at', 'notes']
     updates = {k: v for k, v in kwargs.items() if k in allowed_fields}
     
+    # post_media is what gets published, so it follows image edits: a media list
+    # replaces it, a changed image_path alone makes that the post's only image
+    media = None
+    if 'media' in kwargs:
+        media = [m for m in (kwargs['media'] or []) if m]
+        updates['image_path'] = media[0] if media else ''
+    elif 'image_path' in updates:
+        current = _fetchone(conn, 'SELECT image_path FROM posts WHERE id = ?', (post_id,))
+        if current and (current['image_path'] or '') != (updates['image_path'] or ''):
+            media = [updates['image_path']] if updates['image_path'] else []
+    if media is not None:
+        _execute(conn, 'DELETE FROM post_media WHERE post_id = ?', (post_id,))
+        if media:
+            conn.cursor().executemany(
+                f"INSERT INTO post_media (post_id, position, media_path) VALUES ({'%s, %s, %s' if USE_POSTGRES else '?, ?, ?'})",
+                [(post_id, position, path) for position, path in enumerate(media)])
+    
     if updates:
         if USE_POSTGRES:
             set_clause = ', '.join(f'{k} = %s' for k in updates.keys())
@@ -992,8 +1242,12 @@ def update_post(post_id, **kwargs):
                     (post_id, platform)
                 )
     
-    log_activity('post_updated', f'Post #{post_id} updated', post_id)
     conn.commit()
+    log_activity('post_updated', f'Post #{post_id} updated', post_id)
+    if not USE_POSTGRES:
+        row = _fetchone(conn, 'SELECT id, status, scheduled_at, published_at FROM posts WHERE id = ?', (post_id,))
+        if row:
+            _emit_local_change('posts', 'UPDATE', row)
     conn.close()
 
 
@@ -1003,9 +1257,10 @@ def delete_post(post_id):
         conn.cursor().execute('DELETE FROM posts WHERE id = %s', (post_id,))
     else:
         conn.execute('DELETE FROM posts WHERE id = ?', (post_id,))
-    log_activity('post_deleted', f'Post #{post_id} deleted')
     conn.commit()
     conn.close()
+    log_activity('post_deleted', f'Post #{post_id} deleted')
+    _emit_local_change('posts', 'DELETE', {'id': post_id})
 
 
 def mark_post_published(post_id, platform_name, platform_post_id=''):
@@ -1043,9 +1298,13 @@ def mark_post_published(post_id, platform_name, platform_post_id=''):
             conn.execute('UPDATE posts SET status = ?, published_at = ? WHERE id = ?',
                         ('published', now, post_id))
     
-    log_activity('post_published', f'Post #{post_id} published to {platform_name}', post_id)
     conn.commit()
     conn.close()
+    log_activity('post_published', f'Post #{post_id} published to {platform_name}', post_id)
+    _emit_local_change('post_platforms', 'UPDATE',
+                       {'post_id': post_id, 'platform_name': platform_name, 'status': 'published'})
+    if not USE_POSTGRES and pending['cnt'] == 0:
+        _emit_local_change('posts', 'UPDATE', {'id': post_id, 'status': 'published', 'published_at': now})
 
 
 def mark_post_failed(post_id, platform_name, error_message=''):
@@ -1062,6 +1321,101 @@ def mark_post_failed(post_id, platform_name, error_message=''):
         ''', (error_message, post_id, platform_name))
     conn.commit()
     conn.close()
+    _emit_local_change('post_platforms', 'UPDATE',
+                       {'post_id': post_id, 'platform_name': platform_name, 'status': 'failed'})
+
+
+ATTEMPT_LOG_SIZE = 20  # newest entries kept in post_platforms.attempt_log
+
+
+def record_publish_results(post_id, results, retry_at=None, deferred=()):
+    """Apply a whole fan-out's PublishResults to a post in one transaction.
+
+    Each result counts as an attempt on its post_platforms row and is appended
+    to the row's attempt_log. Platforms in retry_at ({platform: UTC datetime})
+    stay 'pending' until that time; platforms in deferred were not tried (their
+    breaker was open), so they are logged without using up an attempt.
+    The post becomes 'published' once any platform has published, stays
+    'scheduled' while retries are pending, and is 'failed' otherwise.
+    """
+    if not results:
+        return None
+    retry_at = retry_at or {}
+    now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+    conn = get_db()
+    try:
+        if not USE_POSTGRES:
+            conn.execute('BEGIN IMMEDIATE')
+        lock = ' FOR UPDATE' if USE_POSTGRES else ''
+        rows = {r['platform_name']: r for r in _fetchall(
+            conn, f'SELECT platform_name, attempts, attempt_log FROM post_platforms WHERE post_id = ?{lock}', (post_id,))}
+        for r in results:
+            row = rows.get(r.platform)
+            if row is None:
+                continue
+            next_at = retry_at.get(r.platform)
+            entry = {'at': now, 'ok': r.success}
+            if r.status_code:
+                entry['status'] = r.status_code
+            if not r.success:
+                entry['error'] = (r.error or '')[:300]
+            if next_at:
+                entry['retry_at'] = next_at.strftime('%Y-%m-%d %H:%M:%S')
+            tried = r.platform not in deferred
+            if not tried:
+                entry['deferred'] = True
+            try:
+                log = json.loads(row['attempt_log'] or '[]')
+            except (TypeError, ValueError):
+                log = []
+            log = (log + [entry])[-ATTEMPT_LOG_SIZE:]
+
+            if r.success:
+                status, error = 'published', ''
+            elif next_at:
+                status, error = 'pending', f"{r.error} (retrying at {next_at:%H:%M} UTC)"
+            else:
+                status, error = 'failed', r.error or ''
+            _execute(conn, '''UPDATE post_platforms SET status = ?, error_message = ?, attempts = ?, attempt_log = ?,
+                                  last_attempt_at = COALESCE(?, last_attempt_at), next_attempt_at = ?,
+                                  published_at = COALESCE(?, published_at),
+                                  platform_post_id = COALESCE(?, platform_post_id)
+                              WHERE post_id = ? AND platform_name = ?''',
+                     (status, error, (row['attempts'] or 0) + int(tried), json.dumps(log), now if tried else None,
+                      next_at.strftime('%Y-%m-%d %H:%M:%S') if next_at else None,
+                      now if r.success else None, (r.post_id or '') if r.success else None, post_id, r.platform))
+
+        # Rows not in this batch (published earlier, awaiting another retry) count too
+        states = _fetchall(conn, 'SELECT status, next_attempt_at FROM post_platforms WHERE post_id = ?', (post_id,))
+        if any(st['status'] == 'published' for st in states):
+            status = 'published'
+        elif any(st['status'] == 'pending' and st['next_attempt_at'] for st in states):
+            status = 'scheduled'
+        else:
+            status = 'failed'
+        if status == 'published':
+            _execute(conn, 'UPDATE posts SET status = ?, published_at = COALESCE(published_at, ?) WHERE id = ?',
+                     (status, now, post_id))
+        else:
+            _execute(conn, 'UPDATE posts SET status = ? WHERE id = ?', (status, post_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    for r in results:
+        if r.success:
+            log_activity('post_published', f'Post #{post_id} published to {r.platform}', post_id)
+        next_at = retry_at.get(r.platform)
+        _emit_local_change('post_platforms', 'UPDATE', {
+            'post_id': post_id, 'platform_name': r.platform,
+            'status': 'published' if r.success else 'pending' if next_at else 'failed',
+            'next_attempt_at': next_at.strftime('%Y-%m-%d %H:%M:%S') if next_at else None})
+    _emit_local_change('posts', 'UPDATE', {'id': post_id, 'status': status})
+    return status
 
 
 # ============================================================
@@ -1070,14 +1424,14 @@ def mark_post_failed(post_id, platform_name, error_message=''):
 
 def get_platforms():
     conn = get_db()
-    platforms = _fetchall(conn, 'SELECT * FROM platforms ORDER BY id')
+    platforms = _fetch_models(conn, Platform, 'SELECT * FROM platforms ORDER BY id')
     conn.close()
     return platforms
 
 
 def get_platform(name):
     conn = get_db()
-    platform = _fetchone(conn, 'SELECT * FROM platforms WHERE name = ?', (name,))
+    platform = _fetch_model(conn, Platform, 'SELECT * FROM platforms WHERE name = ?', (name,))
     conn.close()
     return platform
 
@@ -1102,6 +1456,38 @@ def update_platform(name, **kwargs):
     conn.close()
 
 
+def update_platform_config(name, **values):
+    """Set keys in a platform's additional_config (None removes one), leaving
+    the other keys alone. The row is locked so concurrent writers don't clobber
+    each other. Returns False if the platform doesn't exist."""
+    conn = get_db()
+    try:
+        if not USE_POSTGRES:
+            conn.execute('BEGIN IMMEDIATE')
+        lock = ' FOR UPDATE' if USE_POSTGRES else ''
+        row = _fetchone(conn, f'SELECT additional_config FROM platforms WHERE name = ?{lock}', (name,))
+        if not row:
+            conn.rollback()
+            return False
+        try:
+            config = json.loads(row['additional_config'] or '{}')
+        except (TypeError, ValueError):
+            config = {}
+        for key, value in values.items():
+            if value is None:
+                config.pop(key, None)
+            else:
+                config[key] = value
+        _execute(conn, 'UPDATE platforms SET additional_config = ? WHERE name = ?', (json.dumps(config), name))
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
 def add_platform(name, api_key='', connected=False):
     conn = get_db()
     display_names = {'openai': 'OpenAI (DALL-E)', 'runway': 'Runway ML'}
@@ -1122,7 +1508,7 @@ def add_platform(name, api_key='', connected=False):
 
 def get_connected_platforms():
     conn = get_db()
-    platforms = _fetchall(conn, 'SELECT * FROM platforms WHERE connected = 1')
+    platforms = _fetch_models(conn, Platform, 'SELECT * FROM platforms WHERE connected = 1')
     conn.close()
     return platforms
 
@@ -1273,12 +1659,17 @@ def log_activity(action, details='', post_id=None):
                 (action, details, post_id)
             )
         else:
-            conn.execute(
+            cursor = conn.execute(
                 'INSERT INTO activity_log (action, details, post_id) VALUES (?, ?, ?)',
                 (action, details, post_id)
             )
+            activity_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        if not USE_POSTGRES:
+            _emit_local_change('activity_log', 'INSERT', {
+                'id': activity_id, 'action': action, 'details': details, 'post_id': post_id,
+                'created_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')})
     except:
         pass
 
@@ -1349,11 +1740,11 @@ def create_blog_article(title, content, excerpt='', topic='', keywords='',
 def get_blog_articles(status=None, limit=50):
     conn = get_db()
     if status:
-        articles = _fetchall(conn, 
+        articles = _fetch_models(conn, BlogArticle,
             'SELECT * FROM blog_articles WHERE status = ? ORDER BY created_at DESC LIMIT ?',
             (status, limit))
     else:
-        articles = _fetchall(conn, 
+        articles = _fetch_models(conn, BlogArticle,
             'SELECT * FROM blog_articles ORDER BY created_at DESC LIMIT ?', (limit,))
     conn.close()
     return articles
@@ -1361,7 +1752,7 @@ def get_blog_articles(status=None, limit=50):
 
 def get_blog_article(article_id):
     conn = get_db()
-    article = _fetchone(conn, 'SELECT * FROM blog_articles WHERE id = ?', (article_id,))
+    article = _fetch_model(conn, BlogArticle, 'SELECT * FROM blog_articles WHERE id = ?', (article_id,))
     conn.close()
     return article
 
@@ -1447,25 +1838,27 @@ def add_brand_mention(title, url='', source='', source_type='article', snippet='
         mention_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    _emit_local_change('brand_mentions', 'INSERT', {
+        'id': mention_id, 'title': title, 'url': url, 'source': source, 'source_type': source_type})
     return mention_id
 
 
 def get_brand_mentions(source_type=None, starred=None, limit=100):
     conn = get_db()
     if source_type and starred is not None:
-        mentions = _fetchall(conn, 
+        mentions = _fetch_models(conn, BrandMention,
             'SELECT * FROM brand_mentions WHERE source_type = ? AND starred = ? ORDER BY created_at DESC LIMIT ?',
             (source_type, starred, limit))
     elif source_type:
-        mentions = _fetchall(conn, 
+        mentions = _fetch_models(conn, BrandMention,
             'SELECT * FROM brand_mentions WHERE source_type = ? ORDER BY created_at DESC LIMIT ?',
             (source_type, limit))
     elif starred is not None:
-        mentions = _fetchall(conn, 
+        mentions = _fetch_models(conn, BrandMention,
             'SELECT * FROM brand_mentions WHERE starred = ? ORDER BY created_at DESC LIMIT ?',
             (starred, limit))
     else:
-        mentions = _fetchall(conn, 
+        mentions = _fetch_models(conn, BrandMention,
             'SELECT * FROM brand_mentions ORDER BY created_at DESC LIMIT ?', (limit,))
     conn.close()
     return mentions
@@ -1473,7 +1866,7 @@ def get_brand_mentions(source_type=None, starred=None, limit=100):
 
 def get_brand_mention(mention_id):
     conn = get_db()
-    mention = _fetchone(conn, 'SELECT * FROM brand_mentions WHERE id = ?', (mention_id,))
+    mention = _fetch_model(conn, BrandMention, 'SELECT * FROM brand_mentions WHERE id = ?', (mention_id,))
     conn.close()
     return mention
 
@@ -1559,14 +1952,14 @@ def get_outreach_contacts(category=None, status=None, tier=None, limit=500):
         query += ' WHERE ' + ' AND '.join(conditions)
     query += ' ORDER BY followers DESC, created_at DESC LIMIT ?'
     params.append(limit)
-    contacts = _fetchall(conn, query, tuple(params))
+    contacts = _fetch_models(conn, OutreachContact, query, tuple(params))
     conn.close()
     return contacts
 
 
 def get_outreach_contact(contact_id):
     conn = get_db()
-    contact = _fetchone(conn, 'SELECT * FROM outreach_contacts WHERE id = ?', (contact_id,))
+    contact = _fetch_model(conn, OutreachContact, 'SELECT * FROM outreach_contacts WHERE id = ?', (contact_id,))
     conn.close()
     return contact
 
@@ -2251,4 +2644,1348 @@ def get_customer_email_count():
     conn = get_db()
     result = _fetchone(conn, "SELECT COUNT(*) as cnt FROM customer_emails")
     conn.close()
-    return result["cnt"] if result else 0
\ No newline at end of file
+    return result["cnt"] if result else 0
+
+# ============================================================
+# OUTREACH SEARCH (trigram, typo-tolerant)
+# ============================================================
+
+# Postgres: pg_trgm GIN indexes. SQLite: FTS5 trigram tables kept in sync by
+# triggers, with pg_trgm-style similarity computed in Python for ranking.
+OUTREACH_SEARCH_FIELDS = ('name', 'platform_handle', 'platform_url', 'email')
+SEARCH_MIN_SCORE = 0.2
+_FTS5_TRIGRAM = None  # None = not probed yet
+
+
+def ensure_search_indexes():
+    """Create trigram indexes for outreach contacts and customer emails"""
+    global _FTS5_TRIGRAM
+    conn = get_db()
+    try:
+        if USE_POSTGRES:
+            conn.autocommit = True
+            cur = conn.cursor()
+            cur.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for field in OUTREACH_SEARCH_FIELDS:
+                cur.execute(f'''CREATE INDEX IF NOT EXISTS idx_outreach_{field}_trgm
+                               ON outreach_contacts USING GIN (lower({field}) gin_trgm_ops)''')
+            cur.execute('''CREATE INDEX IF NOT EXISTS idx_customer_email_trgm
+                           ON customer_emails USING GIN (lower(email) gin_trgm_ops)''')
+        else:
+            existing = {r['name'] for r in _fetchall(conn,
+                "SELECT name FROM sqlite_master WHERE name IN ('outreach_contacts_fts', 'customer_emails_fts')")}
+            conn.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS outreach_contacts_fts USING fts5(
+                {', '.join(OUTREACH_SEARCH_FIELDS)},
+                content='outreach_contacts', content_rowid='id', tokenize='trigram')''')
+            conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS customer_emails_fts USING fts5(
+                email, content='customer_emails', content_rowid='id', tokenize='trigram')''')
+            _create_fts_triggers(conn, 'outreach_contacts', 'outreach_contacts_fts', OUTREACH_SEARCH_FIELDS)
+            _create_fts_triggers(conn, 'customer_emails', 'customer_emails_fts', ('email',))
+            # The triggers keep an existing index in step; only a new one needs filling
+            for fts_table in ('outreach_contacts_fts', 'customer_emails_fts'):
+                if fts_table not in existing:
+                    conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+            conn.commit()
+            _FTS5_TRIGRAM = True
+        print("[Startup] Outreach search indexes verified")
+    except Exception as e:
+        # Older SQLite builds lack the trigram tokenizer; search falls back to a scan
+        if not USE_POSTGRES:
+            _FTS5_TRIGRAM = False
+        print(f"Outreach search indexes: {e}")
+    finally:
+        conn.close()
+
+
+def _create_fts_triggers(conn, table, fts_table, fields):
+    cols = ', '.join(fields)
+    new_vals = ', '.join(f'new.{f}' for f in fields)
+    old_vals = ', '.join(f'old.{f}' for f in fields)
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+        INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_vals});
+    END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+        INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_vals});
+    END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE ON {table} BEGIN
+        INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_vals});
+        INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_vals});
+    END''')
+
+
+def _like_contains(text):
+    """LIKE pattern (with ESCAPE '\\') matching text anywhere; its %, _ and \\ match literally"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _has_fts5_trigram(conn):
+    """Whether this SQLite database has the FTS5 trigram tables (probed once per process)"""
+    global _FTS5_TRIGRAM
+    if _FTS5_TRIGRAM is None:
+        _FTS5_TRIGRAM = bool(_fetchone(conn,
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'outreach_contacts_fts'"))
+    return _FTS5_TRIGRAM
+
+
+def _trigrams(text):
+    """Trigram set using pg_trgm rules: lowercase alphanumeric words padded '  w '"""
+    grams = set()
+    word = []
+    for ch in (text or '').lower() + ' ':
+        if ch.isalnum():
+            word.append(ch)
+        elif word:
+            padded = '  ' + ''.join(word) + ' '
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+            word = []
+    return grams
+
+
+def _trigram_score(query, query_grams, value):
+    """Best of whole-value and per-word similarity; exact substrings score 1.0"""
+    value = (value or '').lower()
+    if not value or not query_grams:
+        return 0.0
+    if query in value:
+        return 1.0
+    best = 0.0
+    value_grams = _trigrams(value)
+    candidates = [value_grams]
+    # Score against each word too, so 'drinkhaker' finds 'editor@drinkhacker.com'
+    word = []
+    for ch in value + ' ':
+        if ch.isalnum():
+            word.append(ch)
+        elif word:
+            candidates.append(_trigrams(''.join(word)))
+            word = []
+    for grams in candidates:
+        union = len(query_grams | grams)
+        if union:
+            best = max(best, len(query_grams & grams) / union)
+    return best
+
+
+def _rank_matches(query, rows, fields, limit):
+    q = query.strip().lower()
+    q_grams = _trigrams(q)
+    scored = []
+    for row in rows:
+        score = max(_trigram_score(q, q_grams, row.get(f)) for f in fields)
+        if score >= SEARCH_MIN_SCORE:
+            row['score'] = round(score, 3)
+            scored.append(row)
+    scored.sort(key=lambda r: -r['score'])
+    return scored[:limit]
+
+
+def _fts_candidates(conn, table, fts_table, query, filters_sql='', params=()):
+    """Rows sharing at least one trigram with the query (OR of quoted trigrams)"""
+    q = query.strip().lower()
+    grams = {q[i:i + 3] for i in range(len(q) - 2)}
+    grams = [g for g in grams if '"' not in g]
+    if not grams:
+        return None
+    match = ' OR '.join(f'"{g}"' for g in grams)
+    return _fetchall(conn, f'''SELECT t.* FROM {fts_table} f JOIN {table} t ON t.id = f.rowid
+                              WHERE {fts_table} MATCH ?{filters_sql}''', (match,) + tuple(params))
+
+
+def search_outreach_contacts(query, category=None, limit=25):
+    """Typo-tolerant search over name, handle, profile URL and email"""
+    query = (query or '').strip()
+    conn = get_db()
+    filters_sql = ''
+    params = []
+    if category:
+        filters_sql = ' AND t.category = ?'
+        params.append(category)
+    if not query:
+        sql = 'SELECT * FROM outreach_contacts t'
+        if category:
+            sql += ' WHERE t.category = ?'
+        contacts = _fetchall(conn, sql + ' ORDER BY followers DESC, created_at DESC LIMIT ?',
+                             tuple(params) + (limit,))
+        conn.close()
+        return contacts
+
+    if USE_POSTGRES:
+        q = query.lower()
+        score_sql = ', '.join(f'word_similarity(%(q)s, lower({f}))' for f in OUTREACH_SEARCH_FIELDS)
+        match_sql = ' OR '.join(f"%(q)s <%% lower({f}) OR lower({f}) LIKE %(like)s ESCAPE '\\'"
+                                for f in OUTREACH_SEARCH_FIELDS)
+        sql = f'''SELECT t.*, GREATEST({score_sql}) AS score FROM outreach_contacts t
+                  WHERE ({match_sql})'''
+        args = {'q': q, 'like': _like_contains(q), 'limit': limit}
+        if category:
+            sql += ' AND t.category = %(category)s'
+            args['category'] = category
+        sql += ' ORDER BY score DESC, followers DESC LIMIT %(limit)s'
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cur.execute(sql, args)
+        contacts = [dict(r) for r in cur.fetchall()]
+        conn.close()
+        return contacts
+
+    rows = None
+    if _has_fts5_trigram(conn):
+        rows = _fts_candidates(conn, 'outreach_contacts', 'outreach_contacts_fts', query, filters_sql, params)
+    if rows is None:
+        sql = 'SELECT * FROM outreach_contacts t'
+        if category:
+            sql += ' WHERE t.category = ?'
+        rows = _fetchall(conn, sql, tuple(params))
+    conn.close()
+    return _rank_matches(query, rows, OUTREACH_SEARCH_FIELDS, limit)
+
+
+def search_customer_emails(query, limit=25):
+    """Typo-tolerant search over customer emails"""
+    query = (query or '').strip()
+    conn = get_db()
+    if not query:
+        emails = _fetchall(conn, 'SELECT * FROM customer_emails ORDER BY email LIMIT ?', (limit,))
+        conn.close()
+        return emails
+
+    if USE_POSTGRES:
+        q = query.lower()
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cur.execute('''SELECT *, word_similarity(%(q)s, lower(email)) AS score FROM customer_emails
+                       WHERE %(q)s <%% lower(email) OR lower(email) LIKE %(like)s ESCAPE '\\'
+                       ORDER BY score DESC, email LIMIT %(limit)s''',
+                    {'q': q, 'like': _like_contains(q), 'limit': limit})
+        emails = [dict(r) for r in cur.fetchall()]
+        conn.close()
+        return emails
+
+    rows = None
+    if _has_fts5_trigram(conn):
+        rows = _fts_candidates(conn, 'customer_emails', 'customer_emails_fts', query)
+    if rows is None:
+        rows = _fetchall(conn, 'SELECT * FROM customer_emails')
+    conn.close()
+    return _rank_matches(query, rows, ('email',), limit)
+
+
+# ============================================================
+# CHANGE FEED (live UI updates)
+# ============================================================
+
+# Postgres: row triggers call pg_notify('db_changes', ...) and one listener
+# thread per process fans notifications out to subscribers. SQLite: the write
+# functions above emit the same payloads in-process after commit and append
+# them to the change_feed table, which a poller thread in every subscribing
+# process reads, so worker.py's publishes reach the web process too.
+CHANGE_FEED_CHANNEL = 'db_changes'
+CHANGE_FEED_TABLES = ('posts', 'post_platforms', 'activity_log', 'brand_mentions')
+CHANGE_FEED_BACKLOG = 500
+CHANGE_FEED_POLL_SECONDS = float(os.environ.get('CHANGE_FEED_POLL_SECONDS', 1))
+CHANGE_FEED_KEEP_SECONDS = 10 * 60  # change_feed rows older than this are pruned
+CHANGE_FEED_PRUNE_EVERY = 200       # writes between prunes
+
+_feed_lock = threading.Lock()
+_feed_subscribers = []
+_feed_backlog = deque(maxlen=CHANGE_FEED_BACKLOG)
+_feed_token = uuid.uuid4().hex[:8]  # event ids are only replayable within this process
+_feed_seq = 0
+_feed_listener = None
+
+
+def ensure_change_feed():
+    """Install the NOTIFY trigger function and per-table triggers on Postgres,
+    or the change_feed table other processes poll on SQLite"""
+    conn = get_db()
+    if not USE_POSTGRES:
+        conn.execute('''CREATE TABLE IF NOT EXISTS change_feed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, payload TEXT NOT NULL,
+            created_at REAL NOT NULL)''')
+        conn.commit()
+        conn.close()
+        return
+    try:
+        cur = conn.cursor()
+        cur.execute(f'''
+            CREATE OR REPLACE FUNCTION notify_db_change() RETURNS trigger AS $$
+            DECLARE
+                rec RECORD;
+                data JSON;
+            BEGIN
+                IF TG_OP = 'DELETE' THEN rec := OLD; ELSE rec := NEW; END IF;
+                IF TG_TABLE_NAME = 'posts' THEN
+                    data := json_build_object('id', rec.id, 'status', rec.status,
+                        'scheduled_at', rec.scheduled_at, 'published_at', rec.published_at);
+                ELSIF TG_TABLE_NAME = 'post_platforms' THEN
+                    data := json_build_object('id', rec.id, 'post_id', rec.post_id,
+                        'platform_name', rec.platform_name, 'status', rec.status,
+                        'next_attempt_at', rec.next_attempt_at);
+                ELSIF TG_TABLE_NAME = 'activity_log' THEN
+                    data := json_build_object('id', rec.id, 'action', rec.action,
+                        'details', left(rec.details, 500), 'post_id', rec.post_id, 'created_at', rec.created_at);
+                ELSE
+                    data := json_build_object('id', rec.id, 'title', left(rec.title, 300), 'url', left(rec.url, 500),
+                        'source', rec.source, 'source_type', rec.source_type);
+                END IF;
+                PERFORM pg_notify('{CHANGE_FEED_CHANNEL}',
+                    json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'row', data)::text);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+        for table in CHANGE_FEED_TABLES:
+            ops = 'INSERT' if table in ('activity_log', 'brand_mentions') else 'INSERT OR UPDATE OR DELETE'
+            cur.execute(f'DROP TRIGGER IF EXISTS {table}_change_feed ON {table}')
+            cur.execute(f'''CREATE TRIGGER {table}_change_feed AFTER {ops} ON {table}
+                           FOR EACH ROW EXECUTE PROCEDURE notify_db_change()''')
+        conn.commit()
+        print("[Startup] Change feed triggers verified")
+    except Exception as e:
+        conn.rollback()
+        print(f"Change feed triggers: {e}")
+    finally:
+        conn.close()
+
+
+def _emit_change(change):
+    """Stamp a change with a feed id and fan it out to local subscribers"""
+    global _feed_seq
+    with _feed_lock:
+        _feed_seq += 1
+        change['event_id'] = f'{_feed_token}-{_feed_seq}'
+        _feed_backlog.append(change)
+        subscribers = list(_feed_subscribers)
+    for q in subscribers:
+        try:
+            q.put_nowait(change)
+        except queue.Full:
+            pass  # slow client; it will resync on reconnect
+
+
+def _emit_local_change(table, op, row):
+    """SQLite has no NOTIFY, so writers announce their own changes: to this
+    process's subscribers at once, and to other processes through change_feed"""
+    if USE_POSTGRES:
+        return
+    change = {'table': table, 'op': op, 'row': row}
+    _emit_change(change)
+    now = time.time()
+    conn = get_db()
+    try:
+        conn.execute('INSERT INTO change_feed (origin, payload, created_at) VALUES (?, ?, ?)',
+                     (_feed_token, json.dumps(change, default=str), now))
+        if _feed_seq % CHANGE_FEED_PRUNE_EVERY == 0:
+            conn.execute('DELETE FROM change_feed WHERE created_at < ?', (now - CHANGE_FEED_KEEP_SECONDS,))
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"[Change Feed] Could not record change: {e}")
+    finally:
+        conn.close()
+
+
+def _sqlite_poll_loop():
+    """Pass on changes other processes appended to change_feed since startup"""
+    last_id = None
+    while True:
+        conn = None
+        try:
+            conn = get_db()
+            if last_id is None:
+                last_id = _fetchone(conn, 'SELECT COALESCE(MAX(id), 0) AS id FROM change_feed')['id']
+            while True:
+                for r in _fetchall(conn, 'SELECT id, payload FROM change_feed WHERE id > ? AND origin != ? ORDER BY id',
+                                   (last_id, _feed_token)):
+                    last_id = r['id']
+                    try:
+                        _emit_change(json.loads(r['payload']))
+                    except ValueError:
+                        pass
+                time.sleep(CHANGE_FEED_POLL_SECONDS)
+        except Exception as e:
+            print(f"[Change Feed] Poller error: {e}")
+            time.sleep(5)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+def _pg_listen_loop():
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(DATABASE_URL)
+            conn.autocommit = True
+            conn.cursor().execute(f'LISTEN {CHANGE_FEED_CHANNEL}')
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    note = conn.notifies.pop(0)
+                    try:
+                        _emit_change(json.loads(note.payload))
+                    except ValueError:
+                        pass
+        except Exception as e:
+            print(f"[Change Feed] Listener error: {e}")
+            time.sleep(5)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+def subscribe_changes(last_event_id=None):
+    """Register a subscriber queue; returns (queue, changes missed since last_event_id)"""
+    global _feed_listener
+    q = queue.Queue(maxsize=1000)
+    with _feed_lock:
+        if _feed_listener is None:
+            _feed_listener = threading.Thread(target=_pg_listen_loop if USE_POSTGRES else _sqlite_poll_loop,
+                                              daemon=True)
+            _feed_listener.start()
+        _feed_subscribers.append(q)
+        missed = []
+        if last_event_id and last_event_id.startswith(_feed_token + '-'):
+            try:
+                last_seq = int(last_event_id.split('-', 1)[1])
+                missed = [c for c in _feed_backlog if int(c['event_id'].split('-', 1)[1]) > last_seq]
+            except ValueError:
+                pass
+    return q, missed
+
+
+def unsubscribe_changes(q):
+    with _feed_lock:
+        if q in _feed_subscribers:
+            _feed_subscribers.remove(q)
+
+
+# ============================================================
+# LEADER ELECTION (one process per background loop)
+# ============================================================
+# gunicorn runs several workers and each one imports app.py, so every
+# background loop holds a named lease and only the holder does any work.
+# PostgreSQL: session advisory lock on a dedicated connection. The server
+# drops it the moment the holder's connection dies.
+# SQLite: row in leader_leases renewed by a heartbeat thread. A dead
+# holder's lease runs out after LEADER_LEASE_TTL seconds.
+
+LEADER_LEASE_TTL = int(os.environ.get('LEADER_LEASE_TTL', 30))
+LEADER_RENEW_INTERVAL = max(1, LEADER_LEASE_TTL // 3)
+
+_leases = []
+_leases_lock = threading.Lock()
+_lease_heartbeat = None
+
+
+class LeaderLease:
+    def __init__(self, name):
+        self.name = name
+        self.holder = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self.held = False
+        self._key = zlib.crc32(f'leader:{name}'.encode())
+        self._conn = None  # PostgreSQL: the session that owns the advisory lock
+
+    def try_acquire(self):
+        """Take the lease if free, or renew it if already ours. Returns self.held"""
+        try:
+            if USE_POSTGRES:
+                self._try_acquire_postgres()
+            else:
+                self._try_acquire_sqlite()
+        except Exception as e:
+            print(f"[Leader] {self.name}: lease check failed: {e}")
+            self._drop_connection()
+            self.held = False
+        return self.held
+
+    def _try_acquire_postgres(self):
+        if self._conn is None:
+            self._conn = psycopg2.connect(DATABASE_URL)
+            self._conn.autocommit = True
+        cur = self._conn.cursor()
+        if self.held:
+            cur.execute('SELECT 1')  # the lock lives as long as this session does
+        else:
+            cur.execute('SELECT pg_try_advisory_lock(%s)', (self._key,))
+            self.held = bool(cur.fetchone()[0])
+            if not self.held:
+                self._drop_connection()
+
+    def _try_acquire_sqlite(self):
+        now = time.time()
+        conn = get_db()
+        try:
+            conn.execute('''CREATE TABLE IF NOT EXISTS leader_leases (
+                name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)''')
+            cur = conn.execute('''
+                INSERT INTO leader_leases (name, holder, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE leader_leases.holder = excluded.holder OR leader_leases.expires_at < ?
+            ''', (self.name, self.holder, now + LEADER_LEASE_TTL, now))
+            conn.commit()
+            self.held = cur.rowcount == 1
+        finally:
+            conn.close()
+
+    def wait(self):
+        """Block until this process holds the lease"""
+        while not self.try_acquire():
+            time.sleep(LEADER_RENEW_INTERVAL)
+        _track_lease(self)
+
+    def release(self):
+        if not self.held:
+            return
+        self.held = False
+        try:
+            if USE_POSTGRES:
+                self._drop_connection()
+            else:
+                conn = get_db()
+                conn.execute('DELETE FROM leader_leases WHERE name = ? AND holder = ?', (self.name, self.holder))
+                conn.commit()
+                conn.close()
+        except Exception as e:
+            print(f"[Leader] {self.name}: release failed: {e}")
+
+    def _drop_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+def _track_lease(lease):
+    global _lease_heartbeat
+    with _leases_lock:
+        if lease not in _leases:
+            _leases.append(lease)
+        if _lease_heartbeat is None:
+            _lease_heartbeat = threading.Thread(target=_lease_heartbeat_loop, daemon=True)
+            _lease_heartbeat.start()
+            atexit.register(release_leases)
+
+
+def _lease_heartbeat_loop():
+    while True:
+        time.sleep(LEADER_RENEW_INTERVAL)
+        with _leases_lock:
+            held = [l for l in _leases if l.held]
+        for lease in held:
+            if not lease.try_acquire():
+                print(f"[Leader] {lease.name}: lease lost by pid {os.getpid()}")
+
+
+def release_leases():
+    """Hand leases over right away on clean shutdown instead of waiting for expiry"""
+    with _leases_lock:
+        leases = list(_leases)
+    for lease in leases:
+        lease.release()
+
+
+# ============================================================
+# JOB QUEUE (durable background work)
+# ============================================================
+# Web processes enqueue; worker.py claims. A claim stamps locked_by with a
+# one-off token and sets a lease; a job whose worker dies is picked up
+# again once the lease runs out (or failed if it has no attempts left).
+
+JOB_ACTIVE_STATES = ('queued', 'running')
+
+
+def ensure_jobs_table():
+    conn = get_db()
+    try:
+        _execute(conn, '''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT DEFAULT '{}',
+                state TEXT DEFAULT 'queued',
+                priority INTEGER DEFAULT 0,
+                attempts INTEGER DEFAULT 0,
+                max_attempts INTEGER DEFAULT 3,
+                run_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                lease_expires_at TIMESTAMP,
+                locked_by TEXT,
+                dedupe_key TEXT,
+                result TEXT,
+                error TEXT DEFAULT '',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        _execute(conn, 'CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (state, priority, run_at)')
+        # At most one queued/running job per dedupe key
+        _execute(conn, '''CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key)
+                          WHERE state IN ('queued', 'running')''')
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Jobs table: {e}")
+    finally:
+        conn.close()
+
+
+JOB_NOTIFY_CHANNEL = 'jobs_ready'
+
+
+def _job_time(seconds=0):
+    return (datetime.utcnow() + timedelta(seconds=seconds)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _decode_job(job):
+    if job:
+        job['payload'] = json.loads(job.get('payload') or '{}')
+        job['result'] = json.loads(job['result']) if job.get('result') else None
+    return job
+
+
+def enqueue_job(kind, payload=None, priority=0, run_at=None, max_attempts=3, dedupe_key=None):
+    """Queue a job and return its id; with dedupe_key, returns the already-active job instead"""
+    conn = get_db()
+    params = (kind, json.dumps(payload or {}), priority, run_at or _job_time(), max_attempts, dedupe_key)
+    sql = '''INSERT INTO jobs (kind, payload, priority, run_at, max_attempts, dedupe_key)
+             VALUES (?, ?, ?, ?, ?, ?)
+             ON CONFLICT (dedupe_key) WHERE state IN ('queued', 'running') DO NOTHING'''
+    if USE_POSTGRES:
+        cur = _execute(conn, sql + ' RETURNING id', params)
+        row = cur.fetchone()
+        job_id = row['id'] if row else None
+    else:
+        cur = _execute(conn, sql, params)
+        job_id = cur.lastrowid if cur.rowcount == 1 else None
+    if job_id is None:
+        row = _fetchone(conn, '''SELECT id FROM jobs WHERE dedupe_key = ? AND state IN ('queued', 'running')''',
+                        (dedupe_key,))
+        job_id = row['id'] if row else None
+    elif USE_POSTGRES:
+        # Delivered at commit, so an idle worker wakes for it instead of polling
+        _execute(conn, 'SELECT pg_notify(?, ?)', (JOB_NOTIFY_CHANNEL, kind))
+    conn.commit()
+    conn.close()
+    return job_id
+
+
+def claim_job(worker_id, lease_seconds):
+    """Atomically take the most urgent due job (or one whose lease expired)"""
+    token = f'{worker_id}:{uuid.uuid4().hex[:8]}'
+    now = _job_time()
+    params = (token, _job_time(lease_seconds), now, now)
+    where = '''(state = 'queued' AND run_at <= ?)
+               OR (state = 'running' AND lease_expires_at < ? AND attempts < max_attempts)'''
+    update = '''UPDATE jobs SET state = 'running', attempts = attempts + 1, locked_by = ?, lease_expires_at = ?
+                WHERE id = (SELECT id FROM jobs WHERE {where}
+                            ORDER BY priority DESC, run_at, id LIMIT 1{lock})'''
+    conn = get_db()
+    try:
+        if USE_POSTGRES:
+            # SKIP LOCKED: concurrent workers each get a different row without waiting
+            cur = _execute(conn, update.format(where=where, lock=' FOR UPDATE SKIP LOCKED') + ' RETURNING *', params)
+            row = cur.fetchone()
+            job = dict(row) if row else None
+        else:
+            # One UPDATE is atomic under SQLite's write lock; the token finds the row again
+            _execute(conn, update.format(where=where, lock=''), params)
+            job = _fetchone(conn, "SELECT * FROM jobs WHERE locked_by = ? AND state = 'running'", (token,))
+        conn.commit()
+    finally:
+        conn.close()
+    return _decode_job(job)
+
+
+def next_job_due():
+    """Seconds until the earliest queued job (or expired lease) is claimable; None if nothing is pending"""
+    conn = get_db()
+    row = _fetchone(conn, '''SELECT MIN(due) AS due FROM (
+                                SELECT MIN(run_at) AS due FROM jobs WHERE state = 'queued'
+                                UNION ALL
+                                SELECT MIN(lease_expires_at) FROM jobs
+                                WHERE state = 'running' AND attempts < max_attempts) pending''')
+    conn.close()
+    due = _parse_timestamp(row['due']) if row else None
+    if not isinstance(due, datetime):
+        return None
+    return max(0.0, (due - datetime.utcnow()).total_seconds())
+
+
+def listen_for_jobs():
+    """A connection LISTENing for newly queued jobs (Postgres); None on SQLite"""
+    if not USE_POSTGRES:
+        return None
+    conn = psycopg2.connect(DATABASE_URL)
+    conn.autocommit = True
+    conn.cursor().execute(f'LISTEN {JOB_NOTIFY_CHANNEL}')
+    return conn
+
+
+def wait_for_jobs(listener, timeout):
+    """Block up to timeout seconds for a job notification; True if one arrived"""
+    if select.select([listener], [], [], timeout) == ([], [], []):
+        return False
+    listener.poll()
+    notified = bool(listener.notifies)
+    listener.notifies.clear()
+    return notified
+
+
+def extend_job_lease(job, lease_seconds):
+    """Keep a running job's lease alive; False if another worker has taken it over"""
+    conn = get_db()
+    cur = _execute(conn, "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND locked_by = ? AND state = 'running'",
+                   (_job_time(lease_seconds), job['id'], job['locked_by']))
+    conn.commit()
+    conn.close()
+    return cur.rowcount == 1
+
+
+def complete_job(job, result=None):
+    conn = get_db()
+    _execute(conn, '''UPDATE jobs SET state = 'done', result = ?, error = '', finished_at = ?, lease_expires_at = NULL
+                      WHERE id = ? AND locked_by = ?''',
+             (json.dumps(result, default=str), _job_time(), job['id'], job['locked_by']))
+    conn.commit()
+    conn.close()
+
+
+def fail_job(job, error, retry_in=None):
+    """Requeue after retry_in seconds while attempts remain, otherwise mark failed"""
+    # attempts is the claimed row's own count, and locked_by guarantees the row is still ours
+    retry = retry_in is not None and job['attempts'] < job['max_attempts']
+    conn = get_db()
+    _execute(conn, '''UPDATE jobs SET state = ?, finished_at = ?, run_at = ?, error = ?, lease_expires_at = NULL
+                      WHERE id = ? AND locked_by = ?''',
+             ('queued' if retry else 'failed', None if retry else _job_time(), _job_time(retry_in or 0),
+              str(error)[:2000], job['id'], job['locked_by']))
+    conn.commit()
+    conn.close()
+
+
+def reap_jobs():
+    """Fail running jobs whose worker died after their last attempt"""
+    conn = get_db()
+    now = _job_time()
+    cur = _execute(conn, '''UPDATE jobs SET state = 'failed', error = 'Worker lost (lease expired)', finished_at = ?
+                            WHERE state = 'running' AND lease_expires_at < ? AND attempts >= max_attempts''',
+                   (now, now))
+    conn.commit()
+    conn.close()
+    return cur.rowcount
+
+
+def get_job(job_id):
+    conn = get_db()
+    job = _fetchone(conn, 'SELECT * FROM jobs WHERE id = ?', (job_id,))
+    conn.close()
+    return _decode_job(job)
+
+
+def get_active_job(dedupe_key):
+    """The queued or running job holding dedupe_key, if any"""
+    conn = get_db()
+    job = _fetchone(conn, "SELECT * FROM jobs WHERE dedupe_key = ? AND state IN ('queued', 'running')", (dedupe_key,))
+    conn.close()
+    return _decode_job(job)
+
+
+def get_jobs(state=None, kind=None, limit=50):
+    conn = get_db()
+    conditions, params = [], []
+    if state:
+        conditions.append('state = ?')
+        params.append(state)
+    if kind:
+        conditions.append('kind = ?')
+        params.append(kind)
+    sql = 'SELECT * FROM jobs'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    jobs = _fetchall(conn, sql + ' ORDER BY id DESC LIMIT ?', tuple(params) + (limit,))
+    conn.close()
+    return [_decode_job(j) for j in jobs]
+
+
+# ============================================================
+# TASK STATE (persisted cadence for background loops)
+# ============================================================
+# One row per recurring task: when it last completed and what it found, so
+# a restart can work out the next run instead of starting over.
+
+def ensure_task_state():
+    conn = get_db()
+    try:
+        _execute(conn, '''
+            CREATE TABLE IF NOT EXISTS task_state (
+                name TEXT PRIMARY KEY,
+                last_run_at TIMESTAMP,
+                last_result TEXT DEFAULT '{}',
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Liveness of supervised background loops (one row per loop / job worker)
+        _execute(conn, '''
+            CREATE TABLE IF NOT EXISTS task_heartbeats (
+                name TEXT PRIMARY KEY,
+                holder TEXT,
+                status TEXT DEFAULT 'running',
+                interval_seconds REAL DEFAULT 60,
+                last_duration REAL,
+                restarts INTEGER DEFAULT 0,
+                last_error TEXT DEFAULT '',
+                started_at TIMESTAMP,
+                heartbeat_at TIMESTAMP
+            )
+        ''')
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Task state table: {e}")
+    finally:
+        conn.close()
+
+
+def get_task_state(name):
+    conn = get_db()
+    state = _fetchone(conn, 'SELECT * FROM task_state WHERE name = ?', (name,))
+    conn.close()
+    if state:
+        state['last_run_at'] = _parse_timestamp(state['last_run_at'])
+        state['last_result'] = json.loads(state.get('last_result') or '{}')
+    return state
+
+
+def record_task_run(name, result=None):
+    """Mark a recurring task as completed now"""
+    now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    conn = get_db()
+    _execute(conn, '''
+        INSERT INTO task_state (name, last_run_at, last_result, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET last_run_at = excluded.last_run_at,
+            last_result = excluded.last_result, updated_at = excluded.updated_at
+    ''', (name, now, json.dumps(result or {}, default=str), now))
+    conn.commit()
+    conn.close()
+
+
+def record_task_heartbeat(name, holder, status='running', interval=60, last_duration=None,
+                          restarts=0, last_error='', started_at=None):
+    """Upsert a loop's liveness row; interval is the longest expected gap between beats"""
+    now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    conn = get_db()
+    _execute(conn, '''
+        INSERT INTO task_heartbeats (name, holder, status, interval_seconds, last_duration, restarts,
+                                     last_error, started_at, heartbeat_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, status = excluded.status,
+            interval_seconds = excluded.interval_seconds, last_duration = excluded.last_duration,
+            restarts = excluded.restarts, last_error = excluded.last_error,
+            started_at = excluded.started_at, heartbeat_at = excluded.heartbeat_at
+    ''', (name, holder, status, interval, last_duration, restarts, last_error, started_at or now, now))
+    conn.commit()
+    conn.close()
+
+
+HEARTBEAT_SUPERSEDED_INTERVALS = 3  # a silent worker row this many intervals old is dropped once a newer one beats
+
+
+def get_task_heartbeats(max_age_hours=24):
+    """Heartbeat rows, minus ones not heard from in max_age_hours and per-process rows
+    (job_worker:<host>:<pid>) of workers that died without saying so and have since
+    been replaced by a newer one"""
+    cutoff = (datetime.utcnow() - timedelta(hours=max_age_hours)).strftime('%Y-%m-%d %H:%M:%S')
+    conn = get_db()
+    rows = _fetchall(conn, 'SELECT * FROM task_heartbeats WHERE heartbeat_at >= ? ORDER BY name', (cutoff,))
+    conn.close()
+    latest = {}
+    for row in rows:
+        row['started_at'] = _parse_timestamp(row['started_at'])
+        row['heartbeat_at'] = _parse_timestamp(row['heartbeat_at'])
+        role = row['name'].split(':', 1)[0]
+        if row['heartbeat_at'] and (role not in latest or row['heartbeat_at'] > latest[role]):
+            latest[role] = row['heartbeat_at']
+
+    def superseded(row):
+        role, beat = row['name'].split(':', 1)[0], row['heartbeat_at']
+        return (row['status'] == 'running' and role != row['name'] and beat is not None
+                and latest[role] - beat > timedelta(seconds=row['interval_seconds'] * HEARTBEAT_SUPERSEDED_INTERVALS))
+
+    return [row for row in rows if not superseded(row)]
+
+
+def get_backlog_stats():
+    """Work that should already have happened: due-but-unclaimed jobs and unpublished scheduled posts"""
+    now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    conn = get_db()
+    jobs = _fetchone(conn, '''
+        SELECT COUNT(*) AS due, MIN(run_at) AS oldest FROM jobs WHERE state = 'queued' AND run_at <= ?
+    ''', (now,))
+    running = _fetchone(conn, "SELECT COUNT(*) AS n FROM jobs WHERE state = 'running'")
+    # Posts waiting on a retry job show up as due jobs instead
+    posts = _fetchone(conn, f'''
+        SELECT COUNT(*) AS due, MIN(scheduled_at) AS oldest FROM posts
+        WHERE status = 'scheduled' AND scheduled_at <= ? AND {_NOT_AWAITING_RETRY}
+    ''', (now,))
+    conn.close()
+    return {
+        'jobs_due': jobs['due'],
+        'oldest_job_due_at': _parse_timestamp(jobs['oldest']),
+        'jobs_running': running['n'],
+        'posts_overdue': posts['due'],
+        'oldest_post_due_at': _parse_timestamp(posts['oldest']),
+    }
+
+
+# ============================================================
+# BLOG SCHEDULE LEDGER (one row per scheduled (date, platform) slot)
+# ============================================================
+
+def ensure_blog_schedule_runs():
+    conn = get_db()
+    try:
+        _execute(conn, '''
+            CREATE TABLE IF NOT EXISTS blog_schedule_runs (
+                run_date TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                status TEXT DEFAULT 'queued',
+                job_id INTEGER,
+                error TEXT DEFAULT '',
+                scheduled_for TIMESTAMP,
+                queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP,
+                PRIMARY KEY (run_date, platform)
+            )
+        ''')
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Blog schedule ledger: {e}")
+    finally:
+        conn.close()
+
+
+def claim_blog_schedule_run(run_date, platform, scheduled_for, status='queued'):
+    """Record a slot as taken; False if it is already in the ledger"""
+    conn = get_db()
+    cur = _execute(conn, '''
+        INSERT INTO blog_schedule_runs (run_date, platform, status, scheduled_for) VALUES (?, ?, ?, ?)
+        ON CONFLICT (run_date, platform) DO NOTHING
+    ''', (run_date, platform, status, scheduled_for))
+    claimed = cur.rowcount == 1
+    conn.commit()
+    conn.close()
+    return claimed
+
+
+def update_blog_schedule_run(run_date, platform, **kwargs):
+    if not kwargs:
+        return
+    if kwargs.get('status') in ('done', 'failed') and 'finished_at' not in kwargs:
+        kwargs['finished_at'] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    sets = ', '.join(f'{k} = ?' for k in kwargs)
+    conn = get_db()
+    _execute(conn, f'UPDATE blog_schedule_runs SET {sets} WHERE run_date = ? AND platform = ?',
+             tuple(kwargs.values()) + (run_date, platform))
+    conn.commit()
+    conn.close()
+
+
+def get_blog_schedule_runs(since=None, limit=30):
+    conn = get_db()
+    if since:
+        runs = _fetchall(conn, 'SELECT * FROM blog_schedule_runs WHERE run_date >= ? ORDER BY run_date DESC, platform LIMIT ?',
+                         (since, limit))
+    else:
+        runs = _fetchall(conn, 'SELECT * FROM blog_schedule_runs ORDER BY run_date DESC, platform LIMIT ?', (limit,))
+    conn.close()
+    return runs
+
+
+# ============================================================
+# PUBLISH RATE LIMITS (per-platform quotas, shared by all processes)
+# ============================================================
+# Generic cell rate algorithm: each platform keeps one number, its
+# "theoretical arrival time" (epoch seconds). With a quota of `limit`
+# publishes per `period`, a slot is free once now >= tat - (period - period/limit),
+# which allows a burst of `limit` and then one every period/limit.
+
+def ensure_rate_limits():
+    conn = get_db()
+    try:
+        _execute(conn, '''
+            CREATE TABLE IF NOT EXISTS publish_rate_limits (
+                platform TEXT PRIMARY KEY,
+                tat REAL NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Rate limit table: {e}")
+    finally:
+        conn.close()
+
+
+def rate_limit_slot(tat, at, limit, period):
+    """(earliest epoch time >= at that fits the quota, tat after using that slot)"""
+    interval = period / limit
+    allowed = max(at, tat - (period - interval))
+    return allowed, max(tat, allowed) + interval
+
+
+def get_rate_limit_state():
+    """{platform: tat} as stored"""
+    conn = get_db()
+    rows = _fetchall(conn, 'SELECT platform, tat FROM publish_rate_limits')
+    conn.close()
+    return {r['platform']: r['tat'] for r in rows}
+
+
+def reserve_rate_slots(quotas, at=None):
+    """Book one publish on every platform in {platform: (limit, period)} at the
+    earliest time all of them allow, and return that time as a UTC datetime."""
+    at = at or time.time()
+    if not quotas:
+        return datetime.utcfromtimestamp(at)
+    platforms = sorted(quotas)  # fixed lock order
+    conn = get_db()
+    try:
+        if not USE_POSTGRES:
+            conn.execute('BEGIN IMMEDIATE')
+        for platform in platforms:
+            _execute(conn, 'INSERT INTO publish_rate_limits (platform, tat) VALUES (?, 0) ON CONFLICT (platform) DO NOTHING',
+                     (platform,))
+        lock = ' FOR UPDATE' if USE_POSTGRES else ''
+        tats = {p: _fetchone(conn, f'SELECT tat FROM publish_rate_limits WHERE platform = ?{lock}', (p,))['tat']
+                for p in platforms}
+        slot = max(rate_limit_slot(tats[p], at, *quotas[p])[0] for p in platforms)
+        for p in platforms:
+            _execute(conn, 'UPDATE publish_rate_limits SET tat = ? WHERE platform = ?',
+                     (rate_limit_slot(tats[p], slot, *quotas[p])[1], p))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return datetime.utcfromtimestamp(math.ceil(slot))
+
+
+# ============================================================
+# POST SERIES (recurring posts, materialized a few at a time)
+# ============================================================
+# A series stores the post template and its RRULE once. Only the next few
+# occurrences exist as ordinary scheduled posts (posts.series_id);
+# last_occurrence is the newest one created so far.
+
+def ensure_post_series():
+    conn = get_db()
+    try:
+        _execute(conn, '''
+            CREATE TABLE IF NOT EXISTS post_series (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                rrule TEXT NOT NULL,
+                dtstart TIMESTAMP NOT NULL,
+                content TEXT NOT NULL,
+                image_path TEXT DEFAULT '',
+                hashtags TEXT DEFAULT '',
+                link_url TEXT DEFAULT '',
+                platforms TEXT DEFAULT '',
+                notes TEXT DEFAULT '',
+                active INTEGER DEFAULT 1,
+                last_occurrence TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        if USE_POSTGRES:
+            _execute(conn, 'ALTER TABLE posts ADD COLUMN IF NOT EXISTS series_id INTEGER')
+        elif 'series_id' not in [r[1] for r in conn.execute('PRAGMA table_info(posts)')]:
+            conn.execute('ALTER TABLE posts ADD COLUMN series_id INTEGER')
+        _execute(conn, 'CREATE INDEX IF NOT EXISTS idx_posts_series ON posts (series_id, status)')
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Post series table: {e}")
+    finally:
+        conn.close()
+
+
+def _decode_series(series):
+    series['dtstart'] = _parse_timestamp(series['dtstart'])
+    series['last_occurrence'] = _parse_timestamp(series['last_occurrence'])
+    series['platforms'] = [p for p in (series.get('platforms') or '').split(',') if p]
+    series['media'] = [m for m in (series.get('media') or '').split(',') if m]
+    return series
+
+
+def create_post_series(rrule, dtstart, content, image_path='', hashtags='', link_url='', platforms=None, notes='',
+                       media=None):
+    conn = get_db()
+    params = (rrule, dtstart, content, image_path, hashtags, link_url, ','.join(platforms or []), notes,
+              ','.join(media or []))
+    sql = '''INSERT INTO post_series (rrule, dtstart, content, image_path, hashtags, link_url, platforms, notes, media)
+             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+    if USE_POSTGRES:
+        series_id = _execute(conn, sql + ' RETURNING id', params).fetchone()['id']
+    else:
+        series_id = _execute(conn, sql, params).lastrowid
+    conn.commit()
+    conn.close()
+    log_activity('series_created', f'Recurring series #{series_id} created ({rrule})')
+    return series_id
+
+
+def get_post_series(series_id=None, active_only=False):
+    """One series by id, or a list of them"""
+    conn = get_db()
+    if series_id is not None:
+        series = _fetchone(conn, 'SELECT * FROM post_series WHERE id = ?', (series_id,))
+        conn.close()
+        return _decode_series(series) if series else None
+    sql = 'SELECT * FROM post_series' + (' WHERE active = 1' if active_only else '') + ' ORDER BY id'
+    rows = _fetchall(conn, sql)
+    conn.close()
+    return [_decode_series(r) for r in rows]
+
+
+def count_pending_series_posts(series_id):
+    conn = get_db()
+    row = _fetchone(conn, "SELECT COUNT(*) AS n FROM posts WHERE series_id = ? AND status = 'scheduled'", (series_id,))
+    conn.close()
+    return row['n']
+
+
+def update_post_series(series_id, **kwargs):
+    allowed = {'active', 'last_occurrence', 'content', 'image_path', 'hashtags', 'link_url', 'notes'}
+    updates = {k: v for k, v in kwargs.items() if k in allowed}
+    if not updates:
+        return
+    conn = get_db()
+    _execute(conn, f"UPDATE post_series SET {', '.join(f'{k} = ?' for k in updates)} WHERE id = ?",
+             tuple(updates.values()) + (series_id,))
+    conn.commit()
+    conn.close()
+
+
+def end_post_series(series_id):
+    """Stop a series and drop its not-yet-published occurrences"""
+    update_post_series(series_id, active=0)
+    conn = get_db()
+    pending = _fetchall(conn, "SELECT id FROM posts WHERE series_id = ? AND status IN ('scheduled', 'draft')", (series_id,))
+    conn.close()
+    for row in pending:
+        delete_post(row['id'])
+    return len(pending)
+
+
+# ============================================================
+# PUBLISH CIRCUIT BREAKERS (per platform, shared by all processes)
+# ============================================================
+# open_until is 0 while a breaker is closed. Once it passes, the next
+# publisher claims the half-open probe by pushing open_until forward; a
+# success closes the breaker, another failure reopens it for longer.
+
+def ensure_publish_resilience():
+    conn = get_db()
+    try:
+        columns = {'attempts': 'INTEGER DEFAULT 0', 'last_attempt_at': 'TIMESTAMP',
+                   'next_attempt_at': 'TIMESTAMP', 'attempt_log': "TEXT DEFAULT '[]'"}
+        if USE_POSTGRES:
+            for name, kind in columns.items():
+                _execute(conn, f'ALTER TABLE post_platforms ADD COLUMN IF NOT EXISTS {name} {kind}')
+        else:
+            existing = [r[1] for r in conn.execute('PRAGMA table_info(post_platforms)')]
+            for name, kind in columns.items():
+                if name not in existing:
+                    conn.execute(f'ALTER TABLE post_platforms ADD COLUMN {name} {kind}')
+        _execute(conn, '''
+            CREATE TABLE IF NOT EXISTS platform_circuits (
+                platform TEXT PRIMARY KEY,
+                failures INTEGER NOT NULL DEFAULT 0,
+                open_until REAL NOT NULL DEFAULT 0,
+                last_error TEXT DEFAULT '',
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Publish resilience tables: {e}")
+    finally:
+        conn.close()
+
+
+def claim_circuit(platform, now, probe_seconds):
+    """None if a publish to platform may go ahead, else the epoch time its breaker
+    next lets one through. A closed breaker costs one read."""
+    conn = get_db()
+    try:
+        row = _fetchone(conn, 'SELECT open_until FROM platform_circuits WHERE platform = ?', (platform,))
+        if not row or not row['open_until']:
+            return None
+        if row['open_until'] > now:
+            return row['open_until']
+        # Cooled down: only one caller gets to probe
+        if not USE_POSTGRES:
+            conn.execute('BEGIN IMMEDIATE')
+        lock = ' FOR UPDATE' if USE_POSTGRES else ''
+        row = _fetchone(conn, f'SELECT open_until FROM platform_circuits WHERE platform = ?{lock}', (platform,))
+        if row['open_until'] > now:
+            conn.rollback()
+            return row['open_until']
+        _execute(conn, 'UPDATE platform_circuits SET open_until = ? WHERE platform = ?', (now + probe_seconds, platform))
+        conn.commit()
+        return None
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def close_circuit(platform):
+    """Reset a platform's breaker after a success (no write when it is already closed)"""
+    conn = get_db()
+    row = _fetchone(conn, 'SELECT failures, open_until FROM platform_circuits WHERE platform = ?', (platform,))
+    if row and (row['failures'] or row['open_until']):
+        _execute(conn, '''UPDATE platform_circuits SET failures = 0, open_until = 0, last_error = '', updated_at = ?
+                          WHERE platform = ?''', (datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'), platform))
+        conn.commit()
+    conn.close()
+
+
+def record_circuit_failure(platform, now, threshold, cooldown, max_cooldown, error='', open_until=None):
+    """Count a retryable failure; returns the epoch time the breaker is open until (0 if still closed).
+
+    The breaker opens after threshold failures in a row, for cooldown seconds
+    doubling with each further failure up to max_cooldown. open_until (a
+    platform's rate-limit reset) opens it straight away.
+    """
+    conn = get_db()
+    try:
+        if not USE_POSTGRES:
+            conn.execute('BEGIN IMMEDIATE')
+        _execute(conn, 'INSERT INTO platform_circuits (platform) VALUES (?) ON CONFLICT (platform) DO NOTHING', (platform,))
+        lock = ' FOR UPDATE' if USE_POSTGRES else ''
+        row = _fetchone(conn, f'SELECT failures, open_until FROM platform_circuits WHERE platform = ?{lock}', (platform,))
+        failures = row['failures'] + 1
+        until = row['open_until'] if row['open_until'] > now else 0
+        if failures >= threshold:
+            until = max(until, now + min(max_cooldown, cooldown * 2 ** (failures - threshold)))
+        if open_until:
+            until = max(until, open_until)
+        _execute(conn, '''UPDATE platform_circuits SET failures = ?, open_until = ?, last_error = ?, updated_at = ?
+                          WHERE platform = ?''',
+                 (failures, until, (error or '')[:500], datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'), platform))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return until
+
+
+def get_circuits():
+    conn = get_db()
+    rows = _fetchall(conn, 'SELECT * FROM platform_circuits ORDER BY platform')
+    conn.close()
+    return rows
+
+
+# ============================================================
+# MEDIA UPLOAD CACHE (platform media references, reused across posts)
+# ============================================================
+# ref is whatever the platform handed back for the upload (a Bluesky blob,
+# a Twitter media_id, a LinkedIn asset URN), stored as JSON and trusted
+# until expires_at (epoch seconds).
+
+def ensure_media_uploads():
+    conn = get_db()
+    try:
+        _execute(conn, '''
+            CREATE TABLE IF NOT EXISTS media_uploads (
+                platform TEXT NOT NULL,
+                account TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                ref TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (platform, account, content_hash)
+            )
+        ''')
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Media upload cache table: {e}")
+    finally:
+        conn.close()
+
+
+def get_media_upload(platform, account, content_hash, valid_at):
+    """The cached reference if it is still valid at valid_at (epoch), else None"""
+    conn = get_db()
+    row = _fetchone(conn, '''SELECT ref FROM media_uploads
+                              WHERE platform = ? AND account = ? AND content_hash = ? AND expires_at > ?''',
+                    (platform, account, content_hash, valid_at))
+    conn.close()
+    return json.loads(row['ref']) if row else None
+
+
+def save_media_upload(platform, account, content_hash, ref, expires_at):
+    conn = get_db()
+    now = time.time()
+    _execute(conn, '''INSERT INTO media_uploads (platform, account, content_hash, ref, expires_at, updated_at)
+                      VALUES (?, ?, ?, ?, ?, ?)
+                      ON CONFLICT (platform, account, content_hash)
+                      DO UPDATE SET ref = excluded.ref, expires_at = excluded.expires_at, updated_at = excluded.updated_at''',
+             (platform, account, content_hash, json.dumps(ref), expires_at, datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')))
+    _execute(conn, 'DELETE FROM media_uploads WHERE expires_at < ?', (now,))
+    conn.commit()
+    conn.close()
+
+
+def delete_media_upload(platform, account, content_hash):
+    conn = get_db()
+    _execute(conn, 'DELETE FROM media_uploads WHERE platform = ? AND account = ? AND content_hash = ?',
+             (platform, account, content_hash))
+    conn.commit()
+    conn.close()
+
+
+# ============================================================
+# POST MEDIA (ordered images per post)
+# ============================================================
+
+def ensure_post_media():
+    conn = get_db()
+    try:
+        _execute(conn, '''
+            CREATE TABLE IF NOT EXISTS post_media (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                post_id INTEGER NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+                position INTEGER NOT NULL DEFAULT 0,
+                media_path TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        _execute(conn, 'CREATE INDEX IF NOT EXISTS idx_post_media_post ON post_media (post_id, position)')
+        if USE_POSTGRES:
+            _execute(conn, "ALTER TABLE post_series ADD COLUMN IF NOT EXISTS media TEXT DEFAULT ''")
+        elif 'media' not in [r[1] for r in conn.execute('PRAGMA table_info(post_series)')]:
+            conn.execute("ALTER TABLE post_series ADD COLUMN media TEXT DEFAULT ''")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Post media table: {e}")
+    finally:
+        conn.close()
@@ -0,0 +1,15 @@
+"""
+gunicorn settings for Forbidden Command Center (picked up automatically from the working directory)
+
+The app is imported and its storage initialized once in the master
+(create_app via --preload); workers fork from that image and only start
+their own background loops.
+"""
+
+preload_app = True
+
+
+def post_worker_init(worker):
+    # Threads don't survive fork, so each worker starts its own leader loops
+    from app import start_background_tasks
+    start_background_tasks()
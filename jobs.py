@@ -0,0 +1,191 @@
+"""
+Durable background jobs for Forbidden Command Center
+Web processes only enqueue; worker.py claims jobs from the jobs table and runs them.
+
+- Handlers are plain functions registered by kind and called with the payload as kwargs
+- A running job's lease is renewed while it runs; a crashed worker's job is
+  retried elsewhere once the lease expires
+- Failures retry with exponential backoff until max_attempts
+- An idle worker sends no queries: on Postgres it sleeps on a NOTIFY from
+  enqueue (or until the next delayed job is due); on SQLite its poll backs off
+  to JOB_IDLE_MAX_SECONDS
+
+Usage:
+  import jobs
+
+  @jobs.handler('outreach_scan')
+  def run_outreach_scan():
+      ...
+      return {'found': 12}
+
+  job_id = jobs.enqueue('outreach_scan', dedupe_key='outreach_scan')
+  db.get_job(job_id)  # {'state': 'queued' | 'running' | 'done' | 'failed', 'result': ..., ...}
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import database as db
+
+JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 4))
+JOB_POLL_SECONDS = 2             # first idle poll on SQLite, doubling up to JOB_IDLE_MAX_SECONDS
+JOB_IDLE_MAX_SECONDS = 30
+JOB_LEASE_SECONDS = 300          # renewed every third of this while a job runs
+JOB_RETRY_BASE_SECONDS = 30      # 30s, 60s, 120s, ...
+JOB_REAP_INTERVAL = 60
+
+HANDLERS = {}
+
+
+def handler(kind):
+    """Register a function as the handler for a job kind"""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, payload=None, priority=0, run_at=None, max_attempts=3, dedupe_key=None):
+    return db.enqueue_job(kind, payload, priority=priority, run_at=run_at,
+                          max_attempts=max_attempts, dedupe_key=dedupe_key)
+
+
+def _keep_leased(job, done):
+    while not done.wait(JOB_LEASE_SECONDS / 3):
+        try:
+            if not db.extend_job_lease(job, JOB_LEASE_SECONDS):
+                print(f"[Jobs] #{job['id']} {job['kind']}: lease taken over by another worker")
+                return
+        except Exception as e:
+            print(f"[Jobs] #{job['id']} lease renewal failed: {e}")
+
+
+def run_job(job):
+    """Run one claimed job and record its outcome; returns how long it took"""
+    fn = HANDLERS.get(job['kind'])
+    if fn is None:
+        db.fail_job(job, f"No handler for job kind '{job['kind']}'")
+        return 0.0
+    done = threading.Event()
+    threading.Thread(target=_keep_leased, args=(job, done), daemon=True).start()
+    started = time.time()
+    try:
+        result = fn(**job['payload'])
+        db.complete_job(job, result)
+        print(f"[Jobs] ✓ #{job['id']} {job['kind']} in {time.time() - started:.1f}s")
+    except Exception as e:
+        traceback.print_exc()
+        retry_in = JOB_RETRY_BASE_SECONDS * 2 ** (job['attempts'] - 1)
+        db.fail_job(job, f'{type(e).__name__}: {e}', retry_in=retry_in)
+        print(f"[Jobs] ✗ #{job['id']} {job['kind']} attempt {job['attempts']}/{job['max_attempts']}: {e}")
+    finally:
+        done.set()
+    return time.time() - started
+
+
+def _listen():
+    try:
+        return db.listen_for_jobs()
+    except Exception as e:
+        print(f"[Jobs] Job notifications unavailable, polling instead: {e}")
+        return None
+
+
+def _close(listener):
+    if listener is not None:
+        try:
+            listener.close()
+        except Exception:
+            pass
+
+
+def run_worker(threads=JOB_WORKER_THREADS, once=False):
+    """Claim and run jobs until SIGTERM/SIGINT (or, with once=True, until nothing is due)"""
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    stopping = threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stopping.set())
+
+    slots = threading.BoundedSemaphore(threads)
+    pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='job')
+    last_duration = None
+
+    def run_in_slot(job):
+        nonlocal last_duration
+        try:
+            last_duration = round(run_job(job), 3)
+        finally:
+            slots.release()
+
+    def beat(status='running'):
+        try:
+            db.record_task_heartbeat(f'job_worker:{worker_id}', worker_id, status=status,
+                                     interval=JOB_REAP_INTERVAL, last_duration=last_duration, started_at=started_at)
+        except Exception as e:
+            print(f"[Jobs] Heartbeat error: {e}")
+
+    started_at = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+    print(f"[Jobs] Worker {worker_id} started ({threads} threads, handlers: {', '.join(sorted(HANDLERS))})")
+    listener = _listen()
+    idle_poll = JOB_POLL_SECONDS
+    next_reap = 0
+    while not stopping.is_set():
+        if time.time() >= next_reap:
+            if listener is None and db.USE_POSTGRES:
+                listener = _listen()
+            try:
+                reaped = db.reap_jobs()
+                if reaped:
+                    print(f"[Jobs] Marked {reaped} abandoned job(s) failed")
+            except Exception as e:
+                print(f"[Jobs] Reap error: {e}")
+            next_reap = time.time() + JOB_REAP_INTERVAL
+            beat()
+        slots.acquire()
+        try:
+            job = db.claim_job(worker_id, JOB_LEASE_SECONDS)
+        except Exception as e:
+            print(f"[Jobs] Claim error: {e}")
+            job = None
+        if job is None:
+            slots.release()
+            if once:
+                break
+            # Sleep until new work is announced, a delayed job comes due or it is time to reap
+            try:
+                due = db.next_job_due()
+            except Exception as e:
+                print(f"[Jobs] Due-time lookup error: {e}")
+                due = None
+            wake_at = min(time.time() + (due if due is not None else JOB_REAP_INTERVAL), next_reap)
+            if listener is None:
+                wake_at = min(wake_at, time.time() + idle_poll)
+                idle_poll = min(idle_poll * 2, JOB_IDLE_MAX_SECONDS)
+            while not stopping.is_set() and time.time() < wake_at:
+                if listener is None:
+                    stopping.wait(wake_at - time.time())
+                    continue
+                try:
+                    # Short slices so SIGTERM is noticed promptly; waiting costs no queries
+                    if db.wait_for_jobs(listener, min(1.0, max(0.0, wake_at - time.time()))):
+                        break
+                except Exception as e:
+                    print(f"[Jobs] Job notification error: {e}")
+                    _close(listener)
+                    listener = None
+                    break
+            continue
+        idle_poll = JOB_POLL_SECONDS
+        pool.submit(run_in_slot, job)
+
+    # Let running jobs finish; anything cut off is retried after its lease expires
+    pool.shutdown(wait=True)
+    _close(listener)
+    beat('stopped')
+    print(f"[Jobs] Worker {worker_id} stopped")
@@ -0,0 +1,202 @@
+"""
+Image variants for Forbidden Command Center
+Resizes and re-encodes uploaded images to fit each platform before publishing.
+
+- Each platform has a longest-side limit, a byte cap and the formats it accepts
+- Variants are re-encoded (JPEG, or WebP/PNG when the image has transparency),
+  rotated per their EXIF orientation and written without EXIF/GPS metadata
+- Variants are cached on disk as <sha256 of the original>-<platform>-v<N>.<ext>, so
+  an image is processed once per platform no matter how many posts reuse it
+- Originals that already fit and carry no metadata are published as they are
+
+Needs Pillow; without it (or for video and GIFs) publishers get the original file.
+
+What a platform returns for an upload (blob ref, media_id, asset URN) is kept
+in the media_uploads table under the same content hash and the account it
+belongs to, so the same bytes go up once per platform while that reference
+is still valid.
+
+A job worker running as its own service doesn't share the web service's disk;
+with MEDIA_SOURCE_URL set it downloads an upload it is missing from there.
+
+Usage:
+  import media
+
+  path = media.local_copy(path, '/static/uploads/1712_barrel.jpg')
+
+  path = media.variant_for('bluesky', '/app/static/uploads/1712_barrel.jpg')
+
+  ref = media.uploaded('twitter', account, path)   # None: upload, then
+  media.remember_upload('twitter', account, path, media_id, expires_at)
+"""
+
+import io
+import os
+import time
+import hashlib
+import threading
+
+import requests
+
+import database as db
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+VARIANT_DIR = os.environ.get('MEDIA_VARIANT_DIR', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads', 'variants'))
+VARIANT_VERSION = 1  # bump when the encoding below changes, so old variants are ignored
+
+# max_side in pixels, max_bytes per image, accepted output formats (preferred first)
+PLATFORM_IMAGE_LIMITS = {
+    'bluesky': {'max_side': 2000, 'max_bytes': 976 * 1024, 'formats': ('JPEG', 'WEBP', 'PNG')},
+    'twitter': {'max_side': 4096, 'max_bytes': 5 * 1024 * 1024, 'formats': ('JPEG', 'WEBP', 'PNG')},
+    'facebook': {'max_side': 2048, 'max_bytes': 4 * 1024 * 1024, 'formats': ('JPEG', 'PNG')},
+    'linkedin': {'max_side': 4096, 'max_bytes': 5 * 1024 * 1024, 'formats': ('JPEG', 'PNG')},
+}
+RESIZABLE = {'.jpg', '.jpeg', '.png', '.webp'}  # GIFs may be animated; video is left alone
+JPEG_QUALITIES = (85, 78, 70, 60, 50)
+SHRINK_STEP = 0.8
+EXTENSIONS = {'JPEG': '.jpg', 'WEBP': '.webp', 'PNG': '.png'}
+UPLOAD_REUSE_MARGIN = 300  # seconds a cached upload must still be valid for to be reused
+MEDIA_SOURCE_URL = os.environ.get('MEDIA_SOURCE_URL', '')  # web service the uploads live on, e.g. web:10000
+FETCH_TIMEOUT = (5, 120)
+
+_hashes = {}  # path -> (mtime, size, sha256)
+_hashes_lock = threading.Lock()
+
+
+def variant_for(platform, path):
+    """Path of the file to upload to a platform: a cached variant, or the original"""
+    limits = PLATFORM_IMAGE_LIMITS.get(platform)
+    if not (PIL_AVAILABLE and limits and path and os.path.splitext(path)[1].lower() in RESIZABLE):
+        return path
+    try:
+        digest = content_hash(path)
+        for ext in EXTENSIONS.values():
+            cached = os.path.join(VARIANT_DIR, f'{digest}-{platform}-v{VARIANT_VERSION}{ext}')
+            if os.path.exists(cached):
+                return cached
+        with Image.open(path) as image:
+            if _fits(image, path, limits):
+                return path
+            data, fmt = _encode(image, limits)
+        os.makedirs(VARIANT_DIR, exist_ok=True)
+        target = os.path.join(VARIANT_DIR, f'{digest}-{platform}-v{VARIANT_VERSION}{EXTENSIONS[fmt]}')
+        tmp = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, target)  # atomic, so a concurrent publish never reads half a file
+        return target
+    except Exception as e:
+        print(f"[Media] Using original for {platform}, variant failed: {e}")
+        return path
+
+
+def local_copy(path, url_path):
+    """path, downloaded first from MEDIA_SOURCE_URL + url_path if it isn't on this disk"""
+    if not MEDIA_SOURCE_URL or not url_path.startswith('/') or os.path.exists(path):
+        return path
+    base = MEDIA_SOURCE_URL if '://' in MEDIA_SOURCE_URL else f'http://{MEDIA_SOURCE_URL}'
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with requests.get(base.rstrip('/') + url_path, stream=True, timeout=FETCH_TIMEOUT) as resp:
+            resp.raise_for_status()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'wb') as f:
+                for block in resp.iter_content(1024 * 1024):
+                    f.write(block)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[Media] Could not fetch {url_path} from {base}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+
+def uploaded(platform, account, path):
+    """The platform's still-valid reference for this file's bytes, or None"""
+    try:
+        return db.get_media_upload(platform, account, content_hash(path), time.time() + UPLOAD_REUSE_MARGIN)
+    except Exception as e:
+        print(f"[Media] Upload cache lookup failed: {e}")
+        return None
+
+
+def remember_upload(platform, account, path, ref, expires_at):
+    """Store (or extend) the reference a platform returned for this file"""
+    try:
+        db.save_media_upload(platform, account, content_hash(path), ref, expires_at)
+    except Exception as e:
+        print(f"[Media] Upload cache save failed: {e}")
+
+
+def forget_upload(platform, account, path):
+    """Drop a reference the platform no longer accepts"""
+    try:
+        db.delete_media_upload(platform, account, content_hash(path))
+    except Exception as e:
+        print(f"[Media] Upload cache delete failed: {e}")
+
+
+def content_hash(path):
+    """sha256 of the file, remembered while its mtime and size are unchanged"""
+    stat = os.stat(path)
+    with _hashes_lock:
+        known = _hashes.get(path)
+    if known and known[:2] == (stat.st_mtime, stat.st_size):
+        return known[2]
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+    with _hashes_lock:
+        _hashes[path] = (stat.st_mtime, stat.st_size, sha.hexdigest())
+    return sha.hexdigest()
+
+
+def _fits(image, path, limits):
+    return (max(image.size) <= limits['max_side']
+            and os.path.getsize(path) <= limits['max_bytes']
+            and image.format in limits['formats']
+            and not image.getexif())
+
+
+def _encode(image, limits):
+    """(bytes, format) of the image scaled to max_side and squeezed under max_bytes:
+    lower quality first, then smaller dimensions"""
+    image = ImageOps.exif_transpose(image)
+    icc_profile = image.info.get('icc_profile')
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        fmt = 'WEBP' if 'WEBP' in limits['formats'] else 'PNG'
+        image = image.convert('RGBA')
+    else:
+        fmt = 'JPEG'
+        image = image.convert('RGB')
+
+    scale = min(1.0, limits['max_side'] / max(image.size))
+    while True:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        resized = image.resize(size, Image.LANCZOS) if size != image.size else image
+        for quality in (JPEG_QUALITIES if fmt != 'PNG' else (None,)):
+            data = _save(resized, fmt, quality, icc_profile)
+            if len(data) <= limits['max_bytes'] or max(size) <= 256:
+                return data, fmt
+        scale *= SHRINK_STEP
+
+
+def _save(image, fmt, quality, icc_profile):
+    # No exif= argument: EXIF (camera, GPS) is dropped; the colour profile is kept
+    options = {'optimize': True}
+    if quality:
+        options['quality'] = quality
+    if fmt == 'JPEG':
+        options['progressive'] = True
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    buf = io.BytesIO()
+    image.save(buf, fmt, **options)
+    return buf.getvalue()
@@ -0,0 +1,292 @@
+"""
+Cross-backend data migration for Forbidden Command Center
+Streams every table between SQLite (DB_PATH) and PostgreSQL (DATABASE_URL).
+
+- Batched reads (server-side cursor on PostgreSQL, fetchmany on SQLite)
+- Chunked loads: COPY FROM STDIN into PostgreSQL, executemany into SQLite,
+  all inside one target transaction
+- Target tables are emptied first and ids are copied as-is, then SERIAL
+  sequences / sqlite_sequence are moved past the highest id
+- A --tables subset must include every table whose rows reference it
+  (post_platforms, activity_log, ... for posts); otherwise nothing is touched
+- Progress and rows/s printed per table
+
+The target schema must already exist (start the app against it once).
+
+Usage:
+  python migrate_data.py sqlite-to-postgres [--sqlite command_center.db] [--postgres URL]
+  python migrate_data.py postgres-to-sqlite [--postgres URL] [--sqlite command_center.db]
+  options: --batch-size N   --tables posts,post_platforms
+"""
+
+import os
+import io
+import sys
+import time
+import sqlite3
+import argparse
+from datetime import datetime, date
+
+from backup import encode_row, order_tables
+
+BATCH_SIZE = 5000
+PROGRESS_INTERVAL = 1.0  # seconds between progress lines
+
+
+# ============================================================
+# CONNECTIONS
+# ============================================================
+
+def _postgres_url(url):
+    url = url or os.environ.get('DATABASE_URL', '')
+    if url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    if not url.startswith('postgresql://'):
+        raise SystemExit('A PostgreSQL URL is required (--postgres or DATABASE_URL)')
+    return url
+
+
+def _connect_postgres(url):
+    import psycopg2
+    conn = psycopg2.connect(_postgres_url(url))
+    conn.autocommit = False
+    return conn
+
+
+def _connect_sqlite(path):
+    conn = sqlite3.connect(path or os.environ.get('DB_PATH', 'command_center.db'))
+    conn.isolation_level = None  # explicit BEGIN/COMMIT below
+    return conn
+
+
+def _sqlite_columns(conn):
+    tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                         "AND name NOT LIKE 'sqlite_%' AND name NOT LIKE '%_fts%'")]
+    return {t: [r[1] for r in conn.execute(f'PRAGMA table_info("{t}")')] for t in tables}
+
+
+def _sqlite_foreign_keys(conn, tables):
+    """(child, parent) table pairs"""
+    return {(t, r[2]) for t in tables for r in conn.execute(f'PRAGMA foreign_key_list("{t}")')}
+
+
+def _pg_columns(conn):
+    cur = conn.cursor()
+    cur.execute("""SELECT c.table_name, c.column_name, c.data_type FROM information_schema.columns c
+                   JOIN information_schema.tables t ON t.table_name = c.table_name AND t.table_schema = c.table_schema
+                   WHERE c.table_schema = 'public' AND t.table_type = 'BASE TABLE'
+                   ORDER BY c.table_name, c.ordinal_position""")
+    columns, types = {}, {}
+    for table, column, data_type in cur.fetchall():
+        columns.setdefault(table, []).append(column)
+        types[(table, column)] = data_type
+    conn.rollback()
+    return columns, types
+
+
+def _pg_foreign_keys(conn):
+    """(child, parent) table pairs"""
+    cur = conn.cursor()
+    cur.execute("""SELECT child.relname, parent.relname FROM pg_constraint k
+                   JOIN pg_class child ON child.oid = k.conrelid
+                   JOIN pg_class parent ON parent.oid = k.confrelid
+                   JOIN pg_namespace n ON n.oid = k.connamespace
+                   WHERE k.contype = 'f' AND n.nspname = 'public'""")
+    pairs = set(cur.fetchall())
+    conn.rollback()
+    return pairs
+
+
+# ============================================================
+# VALUE CONVERSION
+# ============================================================
+
+def _to_sqlite(value):
+    """Match what the app itself writes to SQLite ('%Y-%m-%d %H:%M:%S' timestamps)"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+_NON_TEXT_TYPES = ('timestamp', 'date', 'integer', 'bigint', 'smallint', 'real', 'double precision', 'numeric',
+                   'boolean')
+
+
+def _blank_to_null(value):
+    return None if value == '' else value
+
+
+def _pg_converters(table, columns, pg_types):
+    """SQLite happily stores '' in typed columns; PostgreSQL COPY rejects it"""
+    return [_blank_to_null if pg_types.get((table, c), '').startswith(_NON_TEXT_TYPES) else None
+            for c in columns]
+
+
+# ============================================================
+# MIGRATION
+# ============================================================
+
+class _Progress:
+    def __init__(self, table, total):
+        self.table = table
+        self.total = total
+        self.done = 0
+        self.started = time.time()
+        self.last_print = self.started
+
+    def advance(self, n):
+        self.done += n
+        now = time.time()
+        if now - self.last_print >= PROGRESS_INTERVAL:
+            self.last_print = now
+            print(f"[Migrate] {self.table}: {self.done:,}/{self.total:,} rows "
+                  f"({self.done / max(now - self.started, 1e-6):,.0f} rows/s)")
+
+    def finish(self):
+        elapsed = max(time.time() - self.started, 1e-6)
+        print(f"[Migrate] ✓ {self.table}: {self.done:,} rows in {elapsed:.2f}s ({self.done / elapsed:,.0f} rows/s)")
+        return elapsed
+
+
+def sqlite_to_postgres(sqlite_path=None, postgres_url=None, batch_size=BATCH_SIZE, only_tables=None):
+    src = _connect_sqlite(sqlite_path)
+    dst = _connect_postgres(postgres_url)
+    src_columns = _sqlite_columns(src)
+    dst_columns, pg_types = _pg_columns(dst)
+    tables = _plan(src_columns, dst_columns, only_tables, _pg_foreign_keys(dst))
+    stats = {}
+    try:
+        cur = dst.cursor()
+        # No CASCADE: _plan already includes every referencing table, and anything
+        # it missed should fail here rather than be emptied without being copied back
+        cur.execute('TRUNCATE ' + ', '.join(f'"{t}"' for t in tables) + ' RESTART IDENTITY')
+        for table in tables:
+            columns = [c for c in src_columns[table] if c in dst_columns[table]]
+            col_sql = ', '.join(f'"{c}"' for c in columns)
+            converters = _pg_converters(table, columns, pg_types)
+            total = src.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            progress = _Progress(table, total)
+            # Change-feed and other user triggers would fire once per copied row
+            cur.execute(f'ALTER TABLE "{table}" DISABLE TRIGGER USER')
+            reader = src.execute(f'SELECT {col_sql} FROM "{table}"')
+            while True:
+                rows = reader.fetchmany(batch_size)
+                if not rows:
+                    break
+                buf = io.StringIO()
+                for row in rows:
+                    values = [conv(v) if conv else v for conv, v in zip(converters, row)]
+                    buf.write(encode_row(values))
+                    buf.write('\n')
+                buf.seek(0)
+                cur.copy_expert(f'COPY "{table}" ({col_sql}) FROM STDIN', buf)
+                progress.advance(len(rows))
+            cur.execute(f'ALTER TABLE "{table}" ENABLE TRIGGER USER')
+            if 'id' in columns:
+                cur.execute(f"""SELECT setval(pg_get_serial_sequence('"{table}"', 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL)
+                                FROM "{table}" WHERE pg_get_serial_sequence('"{table}"', 'id') IS NOT NULL""")
+            stats[table] = (progress.done, progress.finish())
+        dst.commit()
+    except Exception:
+        dst.rollback()
+        raise
+    finally:
+        src.close()
+        dst.close()
+    return stats
+
+
+def postgres_to_sqlite(postgres_url=None, sqlite_path=None, batch_size=BATCH_SIZE, only_tables=None):
+    src = _connect_postgres(postgres_url)
+    dst = _connect_sqlite(sqlite_path)
+    src_columns, _ = _pg_columns(src)
+    dst_columns = _sqlite_columns(dst)
+    tables = _plan(src_columns, dst_columns, only_tables, _sqlite_foreign_keys(dst, dst_columns))
+    stats = {}
+    try:
+        dst.execute('PRAGMA foreign_keys = OFF')
+        dst.execute('BEGIN IMMEDIATE')
+        for table in reversed(tables):
+            dst.execute(f'DELETE FROM "{table}"')
+        for table in tables:
+            columns = [c for c in src_columns[table] if c in dst_columns[table]]
+            col_sql = ', '.join(f'"{c}"' for c in columns)
+            insert_sql = f'INSERT INTO "{table}" ({col_sql}) VALUES ({", ".join("?" for _ in columns)})'
+            count_cur = src.cursor()
+            count_cur.execute(f'SELECT COUNT(*) FROM "{table}"')
+            progress = _Progress(table, count_cur.fetchone()[0])
+            # Named cursor = server-side; rows arrive batch_size at a time
+            reader = src.cursor(name=f'migrate_{table}')
+            reader.itersize = batch_size
+            reader.execute(f'SELECT {col_sql} FROM "{table}"')
+            while True:
+                rows = reader.fetchmany(batch_size)
+                if not rows:
+                    break
+                dst.executemany(insert_sql, [tuple(_to_sqlite(v) for v in row) for row in rows])
+                progress.advance(len(rows))
+            reader.close()
+            if 'id' in columns:
+                dst.execute('UPDATE sqlite_sequence SET seq = (SELECT COALESCE(MAX(id), 0) FROM "{0}") '
+                            'WHERE name = ?'.format(table), (table,))
+            stats[table] = (progress.done, progress.finish())
+        dst.execute('COMMIT')
+        # Search tables were kept in sync by triggers, but rebuild to be safe after bulk loads
+        for fts in ('outreach_contacts_fts', 'customer_emails_fts'):
+            try:
+                dst.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            except sqlite3.OperationalError:
+                pass
+    except Exception:
+        if dst.in_transaction:
+            dst.execute('ROLLBACK')
+        raise
+    finally:
+        dst.execute('PRAGMA foreign_keys = ON')
+        src.rollback()
+        src.close()
+        dst.close()
+    return stats
+
+
+def _plan(src_columns, dst_columns, only_tables, foreign_keys):
+    """Tables to copy, parents first. Refuses a set that leaves out a target table
+    referencing one of them: emptying the parent would orphan or delete its rows."""
+    missing = [t for t in src_columns if t not in dst_columns]
+    if missing:
+        print(f"[Migrate] Skipping tables missing on target (start the app against it once): {', '.join(missing)}")
+    tables = [t for t in src_columns if t in dst_columns]
+    if only_tables:
+        tables = [t for t in tables if t in only_tables]
+    left_out = sorted({child for child, parent in foreign_keys
+                       if parent in tables and child not in tables and child != parent})
+    if left_out:
+        raise SystemExit(f"[Migrate] {', '.join(left_out)} reference tables being replaced but would "
+                         f"not be copied; include them in --tables")
+    return order_tables(tables)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Copy all data between SQLite and PostgreSQL')
+    parser.add_argument('direction', choices=['sqlite-to-postgres', 'postgres-to-sqlite'])
+    parser.add_argument('--sqlite', default=None, help='SQLite path (default: DB_PATH or command_center.db)')
+    parser.add_argument('--postgres', default=None, help='PostgreSQL URL (default: DATABASE_URL)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--tables', default='', help='Comma-separated subset of tables')
+    args = parser.parse_args(argv)
+
+    only = {t.strip() for t in args.tables.split(',') if t.strip()} or None
+    started = time.time()
+    if args.direction == 'sqlite-to-postgres':
+        stats = sqlite_to_postgres(args.sqlite, args.postgres, args.batch_size, only)
+    else:
+        stats = postgres_to_sqlite(args.postgres, args.sqlite, args.batch_size, only)
+    rows = sum(n for n, _ in stats.values())
+    elapsed = time.time() - started
+    print(f"[Migrate] Done: {len(stats)} tables, {rows:,} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-6):,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,27 +1,48 @@
 """
 Social Media Publisher Module
 Handles API integrations for each platform.
-Each publisher follows the same interface: publish(content, image_path, platform_config) -> result dict
+Each publisher follows the same interface: publish(content, images, platform_config) -> result dict
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
 import json
 import base64
 import hashlib
 import hmac
 import time
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from urllib.parse import quote, urlencode
-from datetime import datetime
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import credentials
+from credentials import CredentialError
+from facets import build_facets
+import media
 
 
 class PublishResult:
-    def __init__(self, success, platform, post_id='', url='', error=''):
+    def __init__(self, success, platform, post_id='', url='', error='', status_code=None, retry_after=None,
+                 transient=False, maybe_created=False):
         self.success = success
         self.platform = platform
         self.post_id = post_id
         self.url = url
         self.error = error
+        # For retry decisions (see resilience.py): the failing HTTP status, how
+        # long the platform asked us to wait, and whether the request never
+        # got an answer (timeout, dropped connection). maybe_created: the create
+        # request itself failed after it was sent, so the post may exist anyway
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.transient = transient
+        self.maybe_created = maybe_created
     
     def to_dict(self):
         return {
@@ -33,10 +54,202 @@ class PublishResult:
         }
 
 
+# ============================================================
+# HTTP SESSIONS
+# ============================================================
+
+# One pooled session per platform, shared by every publish in the process,
+# so connections (and their TLS handshakes) are reused between posts. Every
+# request gets a timeout: a hung API fails the publish instead of holding
+# a worker thread forever.
+HTTP_TIMEOUT = (float(os.environ.get('PUBLISH_CONNECT_TIMEOUT', 5)),
+                float(os.environ.get('PUBLISH_READ_TIMEOUT', 30)))
+UPLOAD_TIMEOUT = (HTTP_TIMEOUT[0], 120)  # media uploads
+
+# Connection failures are retried for every method (nothing was sent yet);
+# 502/503/504 only for idempotent ones, so a POST never creates a post twice.
+HTTP_RETRY = Retry(total=3, connect=2, read=0, status=2, backoff_factor=0.5,
+                   status_forcelist=(502, 503, 504),
+                   allowed_methods=frozenset({'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}),
+                   respect_retry_after_header=True, raise_on_status=False)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class PlatformSession(requests.Session):
+    """requests.Session that applies HTTP_TIMEOUT unless a call passes its own"""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', HTTP_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+def http_session(platform_name):
+    """The shared session for a platform's API calls"""
+    with _sessions_lock:
+        session = _sessions.get(platform_name)
+        if session is None:
+            # Enough kept-alive connections for every concurrent publish to the platform,
+            # each with its images uploading side by side
+            size = max(4, UPLOADS_PER_PUBLISH * PLATFORM_CONCURRENCY.get(platform_name, DEFAULT_PLATFORM_CONCURRENCY))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=size, max_retries=HTTP_RETRY)
+            session = PlatformSession()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['User-Agent'] = 'ForbiddenCommandCenter/1.0'
+            _sessions[platform_name] = session
+        return session
+
+
+def retry_after_seconds(resp):
+    """Seconds the platform asked us to wait before trying again, or None.
+    Retry-After (seconds or an HTTP date) on any response; on a 429 also the
+    rate-limit reset headers (x-rate-limit-reset on Twitter, ratelimit-reset on Bluesky)."""
+    value = resp.headers.get('Retry-After')
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    if resp.status_code == 429:
+        for name in ('x-rate-limit-reset', 'ratelimit-reset'):
+            try:
+                reset = float(resp.headers.get(name, ''))
+            except ValueError:
+                continue
+            # An epoch time, or (on some APIs) seconds from now
+            return max(0.0, reset - time.time()) if reset > 1e9 else reset
+    return None
+
+
+def http_failure(platform_name, resp, prefix=''):
+    """PublishResult for an error response, keeping what the retry logic needs"""
+    return PublishResult(False, platform_name, error=f"{prefix}HTTP {resp.status_code}: {resp.text}",
+                         status_code=resp.status_code, retry_after=retry_after_seconds(resp))
+
+
+_GONE = ('not found', 'could not find', 'notfound', 'does not exist', 'expired')
+
+
+def media_gone(resp, noun, gone=_GONE):
+    """True when an error response says an uploaded file (blob, media ID,
+    asset) no longer exists, rather than rejecting the post itself"""
+    text = resp.text.lower()
+    return noun in text and any(word in text for word in gone)
+
+
+class CreateRequestError(Exception):
+    """A request that creates the post failed; it may have reached the platform"""
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+@contextmanager
+def create_step():
+    """Wrap the non-idempotent call that creates a post, so exception_failure
+    knows a timeout there is not safe to retry"""
+    try:
+        yield
+    except requests.RequestException as e:
+        raise CreateRequestError(e) from e
+
+
+def _never_sent(e):
+    """True for failures to connect at all: the request never left this machine"""
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    if not isinstance(e, requests.ConnectionError) or isinstance(e, requests.ReadTimeout):
+        return False
+    reason = e.args[0] if e.args else None
+    reason = getattr(reason, 'reason', reason)  # requests wraps urllib3's MaxRetryError
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def _maybe_created(platform_name, error, status_code=None, retry_after=None):
+    return PublishResult(False, platform_name, status_code=status_code, retry_after=retry_after, maybe_created=True,
+                         error=f'{error} (the post may have gone through; check {platform_name} before publishing again)')
+
+
+def create_failure(platform_name, resp):
+    """http_failure for the create call: a 5xx there (a gateway timing out, say)
+    doesn't mean the platform didn't store the post"""
+    if resp.status_code >= 500:
+        return _maybe_created(platform_name, f'HTTP {resp.status_code}: {resp.text}', resp.status_code,
+                              retry_after_seconds(resp))
+    return http_failure(platform_name, resp)
+
+
+def exception_failure(platform_name, e):
+    """PublishResult for an exception. Timeouts and connection errors are transient,
+    except on the create call, where only a connection never made is: a read
+    timeout or reset there may come after the platform stored the post."""
+    if isinstance(e, CreateRequestError):
+        if _never_sent(e.error):
+            return PublishResult(False, platform_name, error=str(e), transient=True)
+        return _maybe_created(platform_name, e)
+    return PublishResult(False, platform_name, error=str(e),
+                         transient=isinstance(e, (requests.ConnectionError, requests.Timeout)))
+
+
+def _jwt_expiry(token, default=None):
+    """The exp claim of a JWT as an epoch time (the signature is not checked)"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return default
+
+
 # ============================================================
 # BLUESKY PUBLISHER
 # ============================================================
 
+# handle -> (did or None, expires_at); shared by every post in the process
+HANDLE_BATCH = 25               # getProfiles accepts up to 25 actors
+HANDLE_CACHE_TTL = 24 * 3600
+HANDLE_MISS_TTL = 600           # unknown handles are retried sooner
+HANDLE_CACHE_SIZE = 5000
+_handle_cache = {}
+_handle_cache_lock = threading.Lock()
+_lookups = None
+
+
+def _lookup_pool():
+    # Side lookups that overlap a publish; never the publish lanes themselves,
+    # so a full lane can't wait on its own queue
+    global _lookups
+    with _handle_cache_lock:
+        if _lookups is None:
+            _lookups = ThreadPoolExecutor(max_workers=4, thread_name_prefix='publish-lookup')
+        return _lookups
+
+
+# A post's images upload side by side, so a multi-image publish takes about
+# as long as its slowest upload. The pool is shared by every publish lane.
+UPLOADS_PER_PUBLISH = 4
+UPLOAD_WORKERS = 8
+_uploads = None
+_uploads_lock = threading.Lock()
+
+
+def upload_all(upload, paths):
+    """[upload(path) for path in paths], run at once on the shared upload pool"""
+    global _uploads
+    if len(paths) < 2:
+        return [upload(path) for path in paths]
+    with _uploads_lock:
+        if _uploads is None:
+            _uploads = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='publish-upload')
+    futures = [_uploads.submit(upload, path) for path in paths]
+    return [f.result() for f in futures]
+
+
 class BlueskyPublisher:
     """
     Bluesky AT Protocol publisher.
@@ -45,12 +258,19 @@ class BlueskyPublisher:
     """
     
     BASE_URL = 'https://bsky.social/xrpc'
+    PUBLIC_API_URL = 'https://public.api.bsky.app/xrpc'  # AppView, no auth needed
+    
+    # A blob no record points to is cleaned up by the PDS before long; one used
+    # in a post stays in the repo for as long as that post exists
+    BLOB_UNUSED_TTL = 1800
+    BLOB_REUSE_TTL = 30 * 86400
+    MAX_IMAGES = 4
     
     @staticmethod
     def authenticate(handle, app_password):
         """Create a session and return access tokens"""
         try:
-            resp = requests.post(f'{BlueskyPublisher.BASE_URL}/com.atproto.server.createSession', json={
+            resp = http_session('bluesky').post(f'{BlueskyPublisher.BASE_URL}/com.atproto.server.createSession', json={
                 'identifier': handle,
                 'password': app_password
             })
@@ -64,9 +284,52 @@ class BlueskyPublisher:
                     'handle': data['handle']
                 }
             else:
-                return {'success': False, 'error': resp.text}
+                return {'success': False, 'error': resp.text, 'status_code': resp.status_code,
+                        'retry_after': retry_after_seconds(resp)}
         except Exception as e:
-            return {'success': False, 'error': str(e)}
+            return {'success': False, 'error': str(e),
+                    'transient': isinstance(e, (requests.ConnectionError, requests.Timeout))}
+    
+    @staticmethod
+    def session(handle, app_password):
+        """Like authenticate(), but reuses the cached session while its accessJwt
+        is valid and renews it with refreshSession, so createSession (which Bluesky
+        rate-limits tightly) only runs when the refresh token is gone too"""
+        failure = {}
+        
+        def login():
+            auth = BlueskyPublisher.authenticate(handle, app_password)
+            if not auth['success']:
+                failure.update(auth)
+                raise CredentialError(auth['error'])
+            return BlueskyPublisher._cacheable(auth)
+
+        def refresh(cached):
+            if _jwt_expiry(cached['refresh_jwt'], default=0) <= time.time():
+                raise CredentialError('refresh token expired')
+            resp = http_session('bluesky').post(
+                f'{BlueskyPublisher.BASE_URL}/com.atproto.server.refreshSession',
+                headers={'Authorization': f"Bearer {cached['refresh_jwt']}"})
+            if resp.status_code != 200:
+                raise CredentialError(resp.text)
+            data = resp.json()
+            return BlueskyPublisher._cacheable({'success': True, 'did': data['did'], 'access_jwt': data['accessJwt'],
+                                                'refresh_jwt': data['refreshJwt'], 'handle': data['handle']})
+
+        try:
+            return credentials.obtain('bluesky', credentials.fingerprint(handle, app_password), login, refresh)
+        except Exception as e:
+            return {**failure, 'success': False, 'error': str(e)}  # keeps createSession's status for retries
+    
+    @staticmethod
+    def _auth_failure(auth):
+        return PublishResult(False, 'bluesky', error=f"Auth failed: {auth['error']}", status_code=auth.get('status_code'),
+                             retry_after=auth.get('retry_after'), transient=auth.get('transient', False))
+    
+    @staticmethod
+    def _cacheable(auth):
+        # accessJwt lasts about two hours; fall back to 30 minutes if it can't be read
+        return auth, _jwt_expiry(auth['access_jwt'], default=time.time() + 1800)
     
     @staticmethod
     def upload_image(access_jwt, image_path):
@@ -80,13 +343,14 @@ class BlueskyPublisher:
             mime_types = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png', '.gif': 'image/gif', '.webp': 'image/webp'}
             mime_type = mime_types.get(ext, 'image/jpeg')
             
-            resp = requests.post(
+            resp = http_session('bluesky').post(
                 f'{BlueskyPublisher.BASE_URL}/com.atproto.repo.uploadBlob',
                 headers={
                     'Authorization': f'Bearer {access_jwt}',
                     'Content-Type': mime_type
                 },
-                data=image_data
+                data=image_data,
+                timeout=UPLOAD_TIMEOUT
             )
             
             if resp.status_code == 200:
@@ -97,8 +361,8 @@ class BlueskyPublisher:
             return {'success': False, 'error': str(e)}
     
     @staticmethod
-    def publish(content, image_path='', config=None):
-        """Publish a post to Bluesky"""
+    def publish(content, images=None, config=None):
+        """Publish a post to Bluesky with up to MAX_IMAGES images"""
         if not config:
             return PublishResult(False, 'bluesky', error='No Bluesky configuration provided')
         
@@ -109,10 +373,13 @@ class BlueskyPublisher:
             return PublishResult(False, 'bluesky', error='Bluesky handle and app password required')
         
         try:
-            # Authenticate
-            auth = BlueskyPublisher.authenticate(handle, app_password)
+            # Mentions need a handle lookup; let it run while we log in and upload
+            pending_facets = _lookup_pool().submit(BlueskyPublisher._parse_facets, content) if '@' in content else None
+            
+            # Authenticate (cached session when possible)
+            auth = BlueskyPublisher.session(handle, app_password)
             if not auth['success']:
-                return PublishResult(False, 'bluesky', error=f"Auth failed: {auth['error']}")
+                return BlueskyPublisher._auth_failure(auth)
             
             # Build the post record
             now = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.000Z')
@@ -122,35 +389,39 @@ class BlueskyPublisher:
                 '$type': 'app.bsky.feed.post'
             }
             
+            # Upload the images at once (or reuse blobs from earlier posts)
+            images = images or []
+            blobs = upload_all(lambda path: BlueskyPublisher._image_blob(auth, path), images)
+            BlueskyPublisher._embed_images(record, blobs)
+            
             # Parse facets (links, mentions, hashtags)
-            facets = BlueskyPublisher._parse_facets(content)
+            facets = pending_facets.result() if pending_facets else BlueskyPublisher._parse_facets(content)
             if facets:
                 record['facets'] = facets
             
-            # Upload image if provided
-            if image_path and os.path.exists(image_path):
-                img_result = BlueskyPublisher.upload_image(auth['access_jwt'], image_path)
-                if img_result['success']:
-                    record['embed'] = {
-                        '$type': 'app.bsky.embed.images',
-                        'images': [{
-                            'alt': 'Forbidden Bourbon',
-                            'image': img_result['blob']
-                        }]
-                    }
-            
             # Create the post
-            resp = requests.post(
-                f'{BlueskyPublisher.BASE_URL}/com.atproto.repo.createRecord',
-                headers={'Authorization': f'Bearer {auth["access_jwt"]}'},
-                json={
-                    'repo': auth['did'],
-                    'collection': 'app.bsky.feed.post',
-                    'record': record
-                }
-            )
+            resp = BlueskyPublisher._create_record(auth, record)
+            if BlueskyPublisher._token_rejected(resp):
+                # The cached session was revoked or expired early: log in once more
+                credentials.forget('bluesky')
+                auth = BlueskyPublisher.session(handle, app_password)
+                if not auth['success']:
+                    return BlueskyPublisher._auth_failure(auth)
+                resp = BlueskyPublisher._create_record(auth, record)
+            if resp.status_code == 400 and any(reused for _, reused in blobs) and media_gone(resp, 'blob'):
+                # A cached blob is gone (say its first post was deleted): upload again
+                for path, (_, reused) in zip(images, blobs):
+                    if reused:
+                        media.forget_upload('bluesky', auth['did'], path)
+                blobs = upload_all(lambda path: BlueskyPublisher._image_blob(auth, path), images)
+                BlueskyPublisher._embed_images(record, blobs)
+                resp = BlueskyPublisher._create_record(auth, record)
             
             if resp.status_code == 200:
+                for path, (blob, _) in zip(images, blobs):
+                    if blob:
+                        media.remember_upload('bluesky', auth['did'], path, blob,
+                                              time.time() + BlueskyPublisher.BLOB_REUSE_TTL)
                 data = resp.json()
                 post_uri = data.get('uri', '')
                 # Build a web URL from the URI
@@ -158,40 +429,96 @@ class BlueskyPublisher:
                 web_url = f"https://bsky.app/profile/{auth['handle']}/post/{rkey}"
                 return PublishResult(True, 'bluesky', post_id=post_uri, url=web_url)
             else:
-                return PublishResult(False, 'bluesky', error=resp.text)
+                return create_failure('bluesky', resp)
                 
         except Exception as e:
-            return PublishResult(False, 'bluesky', error=str(e))
+            return exception_failure('bluesky', e)
+    
+    @staticmethod
+    def _image_blob(auth, image_path):
+        """(blob ref or None, whether it came from the upload cache)"""
+        blob = media.uploaded('bluesky', auth['did'], image_path)
+        if blob:
+            return blob, True
+        img_result = BlueskyPublisher.upload_image(auth['access_jwt'], image_path)
+        if not img_result['success']:
+            return None, False
+        media.remember_upload('bluesky', auth['did'], image_path, img_result['blob'],
+                              time.time() + BlueskyPublisher.BLOB_UNUSED_TTL)
+        return img_result['blob'], False
+    
+    @staticmethod
+    def _embed_images(record, blobs):
+        """Embed the uploaded blobs (from _image_blob) in order; failed uploads are left out"""
+        images = [{'alt': 'Forbidden Bourbon', 'image': blob} for blob, _ in blobs if blob]
+        if images:
+            record['embed'] = {'$type': 'app.bsky.embed.images', 'images': images}
+        else:
+            record.pop('embed', None)
+    
+    @staticmethod
+    def _create_record(auth, record):
+        with create_step():
+            return http_session('bluesky').post(
+                f'{BlueskyPublisher.BASE_URL}/com.atproto.repo.createRecord',
+                headers={'Authorization': f'Bearer {auth["access_jwt"]}'},
+                json={
+                    'repo': auth['did'],
+                    'collection': 'app.bsky.feed.post',
+                    'record': record
+                }
+            )
+    
+    @staticmethod
+    def _token_rejected(resp):
+        if resp.status_code not in (400, 401):
+            return False
+        try:
+            return resp.json().get('error') in ('ExpiredToken', 'InvalidToken', 'AuthenticationRequired')
+        except ValueError:
+            return resp.status_code == 401
     
     @staticmethod
     def _parse_facets(text):
         """Parse URLs, mentions, and hashtags into Bluesky facets"""
-        import re
-        facets = []
-        
-        # URL detection
-        url_pattern = re.compile(r'https?://[^\s<>\"\']+')
-        for match in url_pattern.finditer(text):
-            start = len(text[:match.start()].encode('utf-8'))
-            end = len(text[:match.end()].encode('utf-8'))
-            facets.append({
-                'index': {'byteStart': start, 'byteEnd': end},
-                'features': [{'$type': 'app.bsky.richtext.facet#link', 'uri': match.group()}]
-            })
-        
-        # Hashtag detection
-        hashtag_pattern = re.compile(r'(?:^|\s)(#[a-zA-Z0-9_]+)')
-        for match in hashtag_pattern.finditer(text):
-            tag = match.group(1)
-            tag_start = match.start(1)
-            start = len(text[:tag_start].encode('utf-8'))
-            end = len(text[:tag_start + len(tag)].encode('utf-8'))
-            facets.append({
-                'index': {'byteStart': start, 'byteEnd': end},
-                'features': [{'$type': 'app.bsky.richtext.facet#tag', 'tag': tag[1:]}]
-            })
+        return build_facets(text, resolve=BlueskyPublisher.resolve_handles)
+    
+    @staticmethod
+    def resolve_handles(handles):
+        """{handle: did} for the handles that exist. Lookups are cached and the
+        misses go out in batches of HANDLE_BATCH through getProfiles."""
+        now = time.time()
+        dids, missing = {}, []
+        with _handle_cache_lock:
+            for handle in handles:
+                cached = _handle_cache.get(handle)
+                if cached and cached[1] > now:
+                    if cached[0]:
+                        dids[handle] = cached[0]
+                else:
+                    missing.append(handle)
         
-        return facets
+        for i in range(0, len(missing), HANDLE_BATCH):
+            batch = missing[i:i + HANDLE_BATCH]
+            try:
+                resp = http_session('bluesky').get(f'{BlueskyPublisher.PUBLIC_API_URL}/app.bsky.actor.getProfiles',
+                                                   params={'actors': batch})
+                if resp.status_code != 200:
+                    print(f"[Bluesky] Handle lookup failed: HTTP {resp.status_code}")
+                    continue
+                found = {p['handle'].lower(): p['did'] for p in resp.json().get('profiles', [])}
+            except Exception as e:
+                print(f"[Bluesky] Handle lookup failed: {e}")
+                continue  # not cached; mentions stay plain text this time
+            with _handle_cache_lock:
+                for handle in batch:
+                    did = found.get(handle)
+                    _handle_cache[handle] = (did, now + (HANDLE_CACHE_TTL if did else HANDLE_MISS_TTL))
+                    if did:
+                        dids[handle] = did
+                while len(_handle_cache) > HANDLE_CACHE_SIZE:
+                    del _handle_cache[next(iter(_handle_cache))]  # oldest first
+        return dids
 
 
 # ============================================================
@@ -210,6 +537,18 @@ class TwitterPublisher:
     API_URL = 'https://api.twitter.com/2'
     UPLOAD_URL = 'https://upload.twitter.com/1.1'
     
+    # Video and GIFs go through the chunked INIT / APPEND / FINALIZE flow
+    CHUNKED_MEDIA = {
+        '.mp4': ('video/mp4', 'tweet_video'),
+        '.mov': ('video/quicktime', 'tweet_video'),
+        '.gif': ('image/gif', 'tweet_gif'),
+    }
+    CHUNK_SIZE = 4 * 1024 * 1024    # APPEND takes at most 5 MB per segment
+    PROCESSING_TIMEOUT = 300        # seconds to wait for Twitter to transcode
+    STATUS_MAX_DELAY = 30
+    MEDIA_TTL = 86400               # a media_id can be attached for 24h unless upload says otherwise
+    MAX_IMAGES = 4                  # photos; a video or GIF goes out on its own
+    
     @staticmethod
     def _oauth1_header(method, url, params, api_key, api_secret, access_token, token_secret):
         """Generate OAuth 1.0a header"""
@@ -243,8 +582,8 @@ class TwitterPublisher:
         return auth_header
     
     @staticmethod
-    def publish(content, image_path='', config=None):
-        """Publish a tweet"""
+    def publish(content, images=None, config=None):
+        """Publish a tweet with up to MAX_IMAGES photos or one video/GIF"""
         if not config:
             return PublishResult(False, 'twitter', error='No Twitter configuration provided')
         
@@ -256,39 +595,34 @@ class TwitterPublisher:
         if not all([api_key, api_secret, access_token, token_secret]):
             return PublishResult(False, 'twitter', error='Twitter API credentials incomplete')
         
+        creds = (api_key, api_secret, access_token, token_secret)
         try:
             tweet_data = {'text': content}
             
-            # Upload image if provided
-            if image_path and os.path.exists(image_path):
-                # Upload media via v1.1 endpoint
-                upload_url = f'{TwitterPublisher.UPLOAD_URL}/media/upload.json'
-                
-                with open(image_path, 'rb') as f:
-                    files = {'media': f}
-                    auth_header = TwitterPublisher._oauth1_header(
-                        'POST', upload_url, {}, api_key, api_secret, access_token, token_secret
-                    )
-                    resp = requests.post(upload_url, headers={'Authorization': auth_header}, files=files)
-                
-                if resp.status_code == 200:
-                    media_id = resp.json()['media_id_string']
-                    tweet_data['media'] = {'media_ids': [media_id]}
+            # Twitter doesn't mix them: a leading video/GIF goes alone, otherwise the photos
+            images = images or []
+            if images and TwitterPublisher._is_chunked(images[0]):
+                images = images[:1]
+            else:
+                images = [path for path in images if not TwitterPublisher._is_chunked(path)]
             
-            # Post the tweet
-            tweet_url = f'{TwitterPublisher.API_URL}/tweets'
-            auth_header = TwitterPublisher._oauth1_header(
-                'POST', tweet_url, {}, api_key, api_secret, access_token, token_secret
-            )
+            # Upload media at once (or reuse media_ids from earlier tweets)
+            uploads = TwitterPublisher._attach_media(tweet_data, images, creds)
+            if isinstance(uploads, PublishResult):
+                return uploads
             
-            resp = requests.post(
-                tweet_url,
-                headers={
-                    'Authorization': auth_header,
-                    'Content-Type': 'application/json'
-                },
-                json=tweet_data
-            )
+            # Post the tweet
+            resp = TwitterPublisher._create_tweet(tweet_data, creds)
+            if (resp.status_code == 400 and any(u.get('reused') for u in uploads)
+                    and media_gone(resp, 'media', _GONE + ('invalid',))):
+                # Twitter no longer honours a cached media_id ("Your media IDs are invalid."): upload again
+                for path, upload in zip(images, uploads):
+                    if upload.get('reused'):
+                        media.forget_upload('twitter', TwitterPublisher._account(creds), path)
+                uploads = TwitterPublisher._attach_media(tweet_data, images, creds)
+                if isinstance(uploads, PublishResult):
+                    return uploads
+                resp = TwitterPublisher._create_tweet(tweet_data, creds)
             
             if resp.status_code in [200, 201]:
                 data = resp.json()
@@ -297,10 +631,139 @@ class TwitterPublisher:
                 tweet_url = f'https://twitter.com/{username}/status/{tweet_id}' if username else ''
                 return PublishResult(True, 'twitter', post_id=tweet_id, url=tweet_url)
             else:
-                return PublishResult(False, 'twitter', error=f"HTTP {resp.status_code}: {resp.text}")
+                return create_failure('twitter', resp)
                 
         except Exception as e:
-            return PublishResult(False, 'twitter', error=str(e))
+            return exception_failure('twitter', e)
+    
+    @staticmethod
+    def _create_tweet(tweet_data, creds):
+        tweet_url = f'{TwitterPublisher.API_URL}/tweets'
+        with create_step():
+            return http_session('twitter').post(
+                tweet_url,
+                headers={
+                    'Authorization': TwitterPublisher._oauth1_header('POST', tweet_url, {}, *creds),
+                    'Content-Type': 'application/json'
+                },
+                json=tweet_data
+            )
+    
+    @staticmethod
+    def _is_chunked(path):
+        return os.path.splitext(path)[1].lower() in TwitterPublisher.CHUNKED_MEDIA
+    
+    @staticmethod
+    def _attach_media(tweet_data, paths, creds):
+        """Upload paths side by side and put their media_ids on the tweet. Returns the
+        uploads, or a failed PublishResult if a video didn't make it: unlike a
+        missing photo, a tweet without its video isn't worth posting."""
+        uploads = upload_all(lambda path: TwitterPublisher.upload_media(path, creds), paths)
+        for path, upload in zip(paths, uploads):
+            if not upload['success'] and TwitterPublisher._is_chunked(path):
+                return PublishResult(False, 'twitter', error=f"Media upload failed: {upload['error']}",
+                                     transient=upload.get('transient', False))
+        media_ids = [upload['media_id'] for upload in uploads if upload['success']]
+        if media_ids:
+            tweet_data['media'] = {'media_ids': media_ids}
+        else:
+            tweet_data.pop('media', None)
+        return uploads
+    
+    @staticmethod
+    def _account(creds):
+        return credentials.fingerprint(creds[0], creds[2])
+    
+    @staticmethod
+    def upload_media(path, creds):
+        """media_id for an image, GIF or video, reusing one uploaded earlier while
+        Twitter still honours it. Returns the upload dict, with 'reused' when cached."""
+        account = TwitterPublisher._account(creds)
+        media_id = media.uploaded('twitter', account, path)
+        if media_id:
+            return {'success': True, 'media_id': media_id, 'reused': True}
+        if TwitterPublisher._is_chunked(path):
+            upload = TwitterPublisher.upload_chunked(path, creds)
+        else:
+            upload = TwitterPublisher.upload_image(path, creds)
+        if upload['success']:
+            media.remember_upload('twitter', account, path, upload['media_id'], upload['expires_at'])
+        return upload
+    
+    @staticmethod
+    def upload_image(path, creds):
+        """Upload an image in one request via the v1.1 endpoint"""
+        upload_url = f'{TwitterPublisher.UPLOAD_URL}/media/upload.json'
+        try:
+            with open(path, 'rb') as f:
+                resp = http_session('twitter').post(
+                    upload_url, headers={'Authorization': TwitterPublisher._oauth1_header('POST', upload_url, {}, *creds)},
+                    files={'media': f}, timeout=UPLOAD_TIMEOUT)
+            if resp.status_code != 200:
+                return {'success': False, 'error': f"HTTP {resp.status_code}: {resp.text[:300]}"}
+            data = resp.json()
+            return {'success': True, 'media_id': data['media_id_string'],
+                    'expires_at': time.time() + data.get('expires_after_secs', TwitterPublisher.MEDIA_TTL)}
+        except Exception as e:
+            return {'success': False, 'error': str(e),
+                    'transient': isinstance(e, (requests.ConnectionError, requests.Timeout))}
+    
+    @staticmethod
+    def upload_chunked(path, creds):
+        """Upload a video or GIF with INIT / APPEND / FINALIZE, reading CHUNK_SIZE
+        pieces from disk so memory stays flat whatever the file size, then wait
+        for processing. creds is (api_key, api_secret, access_token, token_secret)."""
+        url = f'{TwitterPublisher.UPLOAD_URL}/media/upload.json'
+        session = http_session('twitter')
+        
+        def signed(method, params):
+            return {'Authorization': TwitterPublisher._oauth1_header(method, url, params, *creds)}
+        
+        def check(resp, step):
+            if resp.status_code not in (200, 201, 202, 204):
+                raise RuntimeError(f"{step} failed: HTTP {resp.status_code}: {resp.text[:300]}")
+            return resp.json() if resp.content else {}
+        
+        try:
+            media_type, category = TwitterPublisher.CHUNKED_MEDIA[os.path.splitext(path)[1].lower()]
+            init = {'command': 'INIT', 'total_bytes': str(os.path.getsize(path)),
+                    'media_type': media_type, 'media_category': category}
+            media_id = check(session.post(url, data=init, headers=signed('POST', init)), 'INIT')['media_id_string']
+            
+            # Multipart fields aren't part of the OAuth signature
+            with open(path, 'rb') as f:
+                for index, chunk in enumerate(iter(lambda: f.read(TwitterPublisher.CHUNK_SIZE), b'')):
+                    check(session.post(url, headers=signed('POST', {}), timeout=UPLOAD_TIMEOUT,
+                                       data={'command': 'APPEND', 'media_id': media_id, 'segment_index': str(index)},
+                                       files={'media': chunk}), f'APPEND segment {index}')
+            
+            finalize = {'command': 'FINALIZE', 'media_id': media_id}
+            info = check(session.post(url, data=finalize, headers=signed('POST', finalize)), 'FINALIZE')
+            TwitterPublisher._wait_for_processing(url, media_id, info.get('processing_info'), signed, check)
+            return {'success': True, 'media_id': media_id,
+                    'expires_at': time.time() + info.get('expires_after_secs', TwitterPublisher.MEDIA_TTL)}
+        except Exception as e:
+            return {'success': False, 'error': str(e),
+                    'transient': isinstance(e, (requests.ConnectionError, requests.Timeout))}
+    
+    @staticmethod
+    def _wait_for_processing(url, media_id, processing, signed, check):
+        """Poll STATUS until the media is usable, honouring check_after_secs and
+        doubling the wait between polls otherwise"""
+        deadline = time.time() + TwitterPublisher.PROCESSING_TIMEOUT
+        delay = 1
+        while processing and processing.get('state') in ('pending', 'in_progress'):
+            wait = max(processing.get('check_after_secs') or 0, delay)
+            if time.time() + wait > deadline:
+                raise RuntimeError(f"Media still processing after {TwitterPublisher.PROCESSING_TIMEOUT}s")
+            time.sleep(wait)
+            delay = min(delay * 2, TwitterPublisher.STATUS_MAX_DELAY)
+            status = {'command': 'STATUS', 'media_id': media_id}
+            processing = check(http_session('twitter').get(url, params=status, headers=signed('GET', status)),
+                               'STATUS').get('processing_info')
+        if processing and processing.get('state') == 'failed':
+            error = processing.get('error') or {}
+            raise RuntimeError(f"Media processing failed: {error.get('message') or error.get('name') or 'unknown error'}")
 
 
 # ============================================================
@@ -316,9 +779,10 @@ class FacebookPublisher:
     """
     
     GRAPH_URL = 'https://graph.facebook.com/v19.0'
+    MAX_IMAGES = 10  # more than one goes out as an album post
     
     @staticmethod
-    def publish(content, image_path='', config=None):
+    def publish(content, images=None, config=None):
         """Publish a post to a Facebook Page"""
         if not config:
             return PublishResult(False, 'facebook', error='No Facebook configuration provided')
@@ -330,21 +794,31 @@ class FacebookPublisher:
             return PublishResult(False, 'facebook', error='Facebook Page ID and Access Token required')
         
         try:
-            if image_path and os.path.exists(image_path):
+            images = images or []
+            if len(images) > 1:
+                # Album: upload every photo unpublished at once, then one feed post attaching them
+                photos = upload_all(lambda path: FacebookPublisher._upload_photo(page_id, access_token, path,
+                                                                                 published=False), images)
+                for photo in photos:
+                    if photo.status_code != 200:
+                        return http_failure('facebook', photo, prefix='Photo upload failed: ')
+                data = {'message': content, 'access_token': access_token}
+                for i, photo in enumerate(photos):
+                    data[f'attached_media[{i}]'] = json.dumps({'media_fbid': photo.json()['id']})
+                with create_step():
+                    resp = http_session('facebook').post(f'{FacebookPublisher.GRAPH_URL}/{page_id}/feed', data=data)
+            elif images:
                 # Post with photo
-                url = f'{FacebookPublisher.GRAPH_URL}/{page_id}/photos'
-                with open(image_path, 'rb') as f:
-                    resp = requests.post(url, data={
-                        'caption': content,
-                        'access_token': access_token
-                    }, files={'source': f})
+                with create_step():
+                    resp = FacebookPublisher._upload_photo(page_id, access_token, images[0], caption=content)
             else:
                 # Text-only post
                 url = f'{FacebookPublisher.GRAPH_URL}/{page_id}/feed'
-                resp = requests.post(url, data={
-                    'message': content,
-                    'access_token': access_token
-                })
+                with create_step():
+                    resp = http_session('facebook').post(url, data={
+                        'message': content,
+                        'access_token': access_token
+                    })
             
             if resp.status_code == 200:
                 data = resp.json()
@@ -352,10 +826,21 @@ class FacebookPublisher:
                 post_url = f'https://facebook.com/{post_id}' if post_id else ''
                 return PublishResult(True, 'facebook', post_id=post_id, url=post_url)
             else:
-                return PublishResult(False, 'facebook', error=f"HTTP {resp.status_code}: {resp.text}")
+                return create_failure('facebook', resp)
                 
         except Exception as e:
-            return PublishResult(False, 'facebook', error=str(e))
+            return exception_failure('facebook', e)
+    
+    @staticmethod
+    def _upload_photo(page_id, access_token, path, caption='', published=True):
+        data = {'access_token': access_token}
+        if caption:
+            data['caption'] = caption
+        if not published:
+            data['published'] = 'false'
+        with open(path, 'rb') as f:
+            return http_session('facebook').post(f'{FacebookPublisher.GRAPH_URL}/{page_id}/photos', data=data,
+                                                 files={'source': f}, timeout=UPLOAD_TIMEOUT)
 
 
 # ============================================================
@@ -369,9 +854,16 @@ class LinkedInPublisher:
     """
     
     API_URL = 'https://api.linkedin.com/v2'
+    MAX_IMAGES = 9                  # images; a video goes out on its own
+    ASSET_TTL = 30 * 86400          # an uploaded asset URN is reused for this long
+    RECIPES = {
+        'IMAGE': 'urn:li:digitalmediaRecipe:feedshare-image',
+        'VIDEO': 'urn:li:digitalmediaRecipe:feedshare-video',
+    }
+    VIDEO_EXTENSIONS = {'.mp4', '.mov'}
     
     @staticmethod
-    def publish(content, image_path='', config=None):
+    def publish(content, images=None, config=None):
         """Publish a post to LinkedIn"""
         if not config:
             return PublishResult(False, 'linkedin', error='No LinkedIn configuration provided')
@@ -403,24 +895,157 @@ class LinkedInPublisher:
                 }
             }
             
-            # Image upload for LinkedIn is more complex - skip for initial version
-            # TODO: Implement LinkedIn image upload via registerUpload + upload flow
+            # A leading video goes alone, otherwise the images
+            images = images or []
+            if images and LinkedInPublisher._is_video(images[0]):
+                images = images[:1]
+            else:
+                images = [path for path in images if not LinkedInPublisher._is_video(path)]
             
-            resp = requests.post(
-                f'{LinkedInPublisher.API_URL}/ugcPosts',
-                headers=headers,
-                json=post_data
-            )
+            # registerUpload + PUT per file, side by side (or reuse assets from earlier posts)
+            uploads = LinkedInPublisher._attach_media(post_data, images, access_token, author_urn)
+            if isinstance(uploads, PublishResult):
+                return uploads
+            
+            resp = LinkedInPublisher._create_post(post_data, headers)
+            if (resp.status_code in (400, 422) and any(u.get('reused') for u in uploads)
+                    and media_gone(resp, 'asset')):
+                # LinkedIn no longer accepts a cached asset: upload again
+                for path, upload in zip(images, uploads):
+                    if upload.get('reused'):
+                        media.forget_upload('linkedin', author_urn, path)
+                uploads = LinkedInPublisher._attach_media(post_data, images, access_token, author_urn)
+                if isinstance(uploads, PublishResult):
+                    return uploads
+                resp = LinkedInPublisher._create_post(post_data, headers)
             
             if resp.status_code in [200, 201]:
                 data = resp.json()
                 post_id = data.get('id', '')
                 return PublishResult(True, 'linkedin', post_id=post_id)
             else:
-                return PublishResult(False, 'linkedin', error=f"HTTP {resp.status_code}: {resp.text}")
+                return create_failure('linkedin', resp)
                 
         except Exception as e:
-            return PublishResult(False, 'linkedin', error=str(e))
+            return exception_failure('linkedin', e)
+    
+    @staticmethod
+    def _create_post(post_data, headers):
+        with create_step():
+            return http_session('linkedin').post(
+                f'{LinkedInPublisher.API_URL}/ugcPosts',
+                headers=headers,
+                json=post_data
+            )
+    
+    @staticmethod
+    def _is_video(path):
+        return os.path.splitext(path)[1].lower() in LinkedInPublisher.VIDEO_EXTENSIONS
+    
+    @staticmethod
+    def _attach_media(post_data, paths, access_token, owner):
+        """Upload paths side by side and put their assets on the share. Returns the
+        uploads, or a failed PublishResult if a video didn't make it (failed
+        images are left out, as on the other platforms)."""
+        uploads = upload_all(lambda path: LinkedInPublisher.upload_asset(path, access_token, owner), paths)
+        for path, upload in zip(paths, uploads):
+            if not upload['success'] and LinkedInPublisher._is_video(path):
+                return PublishResult(False, 'linkedin', error=f"Media upload failed: {upload['error']}",
+                                     transient=upload.get('transient', False))
+        share = post_data['specificContent']['com.linkedin.ugc.ShareContent']
+        assets = [upload['asset'] for upload in uploads if upload['success']]
+        if assets:
+            share['shareMediaCategory'] = 'VIDEO' if LinkedInPublisher._is_video(paths[0]) else 'IMAGE'
+            share['media'] = [{'status': 'READY', 'media': asset} for asset in assets]
+        else:
+            share['shareMediaCategory'] = 'NONE'
+            share.pop('media', None)
+        return uploads
+    
+    @staticmethod
+    def upload_asset(path, access_token, owner):
+        """Asset URN for an image or video: registerUpload, then PUT the file
+        streamed from disk. An asset already uploaded for the same bytes is reused."""
+        cached = media.uploaded('linkedin', owner, path)
+        if cached:
+            return {'success': True, 'asset': cached, 'reused': True}
+        session = http_session('linkedin')
+        kind = 'VIDEO' if LinkedInPublisher._is_video(path) else 'IMAGE'
+        try:
+            resp = session.post(
+                f'{LinkedInPublisher.API_URL}/assets?action=registerUpload',
+                headers={'Authorization': f'Bearer {access_token}', 'X-Restli-Protocol-Version': '2.0.0'},
+                json={'registerUploadRequest': {
+                    'recipes': [LinkedInPublisher.RECIPES[kind]],
+                    'owner': owner,
+                    'serviceRelationships': [{'relationshipType': 'OWNER',
+                                              'identifier': 'urn:li:userGeneratedContent'}],
+                }})
+            if resp.status_code not in (200, 201):
+                return {'success': False, 'error': f"registerUpload failed: HTTP {resp.status_code}: {resp.text[:300]}"}
+            value = resp.json()['value']
+            upload_url = value['uploadMechanism'][
+                'com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
+            
+            # A file object is sent in blocks with its Content-Length, never read into memory whole
+            with open(path, 'rb') as f:
+                resp = session.put(upload_url, data=f, timeout=UPLOAD_TIMEOUT, headers={
+                    'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/octet-stream'})
+            if resp.status_code not in (200, 201):
+                return {'success': False, 'error': f"Upload failed: HTTP {resp.status_code}: {resp.text[:300]}"}
+            
+            media.remember_upload('linkedin', owner, path, value['asset'], time.time() + LinkedInPublisher.ASSET_TTL)
+            return {'success': True, 'asset': value['asset']}
+        except Exception as e:
+            return {'success': False, 'error': str(e),
+                    'transient': isinstance(e, (requests.ConnectionError, requests.Timeout))}
+
+
+# ============================================================
+# BLOG PLATFORM AUTH (Reddit, Medium)
+# ============================================================
+# Blog articles are published from app.py; these keep the Reddit bearer token
+# and the Medium user id in the credential cache between articles.
+
+def reddit_access_token(client_id, client_secret, username, password):
+    """A password-grant bearer token, reused until shortly before it expires"""
+    def login():
+        resp = http_session('reddit').post('https://www.reddit.com/api/v1/access_token',
+                                           auth=(client_id, client_secret),
+                                           data={'grant_type': 'password', 'username': username, 'password': password})
+        data = resp.json() if resp.status_code == 200 else {}
+        # A wrong password is a 200 with {'error': 'invalid_grant'}
+        if not data.get('access_token'):
+            raise CredentialError(f'Reddit auth failed: {resp.text[:200]}')
+        return {'access_token': data['access_token']}, time.time() + float(data.get('expires_in', 3600))
+
+    account = credentials.fingerprint(client_id, client_secret, username, password)
+    return credentials.obtain('reddit', account, login)['access_token']
+
+
+def reddit_submit(reddit_auth, data):
+    """POST /api/submit with the cached token, logging in again once if Reddit rejects it.
+    reddit_auth is (client_id, client_secret, username, password)."""
+    def submit():
+        return http_session('reddit').post('https://oauth.reddit.com/api/submit', data=data, headers={
+            'Authorization': f'Bearer {reddit_access_token(*reddit_auth)}'})
+
+    resp = submit()
+    if resp.status_code == 401:
+        credentials.forget('reddit')
+        resp = submit()
+    return resp
+
+
+def medium_user_id(token):
+    """The user id behind a Medium integration token, looked up once per token"""
+    def login():
+        resp = http_session('medium').get('https://api.medium.com/v1/me', headers={'Authorization': f'Bearer {token}'})
+        if resp.status_code != 200:
+            raise CredentialError('Invalid Medium token')
+        return {'user_id': resp.json()['data']['id']}, None
+
+    return credentials.obtain('medium', credentials.fingerprint(token), login)['user_id']
 
 
 # ============================================================
@@ -434,22 +1059,104 @@ PUBLISHERS = {
     'linkedin': LinkedInPublisher,
 }
 
-def publish_to_platform(platform_name, content, image_path='', config=None):
-    """Dispatch to the appropriate publisher"""
+def publish_to_platform(platform_name, content, images=None, config=None):
+    """Dispatch to the appropriate publisher.
+    images is a list of file paths (or a single path); missing files are
+    dropped and the rest capped at the platform's MAX_IMAGES, in order."""
     publisher = PUBLISHERS.get(platform_name)
     if not publisher:
         return PublishResult(False, platform_name, error=f'Unknown platform: {platform_name}')
     
-    return publisher.publish(content, image_path, config)
+    if isinstance(images, str):
+        images = [images]
+    images = [path for path in images or [] if path and os.path.exists(path)][:publisher.MAX_IMAGES]
+    # Resized/re-encoded to the platform's limits (cached); the original if it already fits
+    images = [media.variant_for(platform_name, path) for path in images]
+    return publisher.publish(content, images, config)
 
-def publish_to_all(content, image_path='', platforms_config=None):
+def publish_to_all(content, images=None, platforms_config=None):
     """Publish to all specified platforms and return results"""
     if not platforms_config:
         return []
     
-    results = []
-    for platform_name, config in platforms_config.items():
-        result = publish_to_platform(platform_name, content, image_path, config)
-        results.append(result.to_dict())
-    
-    return results
+    jobs = [(platform_name, content, images, config) for platform_name, config in platforms_config.items()]
+    return [result.to_dict() for result in publish_many(jobs)]
+
+
+# ============================================================
+# CONCURRENT FAN-OUT
+# ============================================================
+
+# Each platform publishes in its own lane: a small pool sized to the
+# platform's cap, shared by every caller in the process. A backlog for one
+# API queues in its lane without holding threads the other platforms need,
+# and no API sees more than its cap of parallel requests.
+PLATFORM_CONCURRENCY = {'bluesky': 2, 'twitter': 2, 'facebook': 2, 'linkedin': 2}
+DEFAULT_PLATFORM_CONCURRENCY = 2
+
+_lanes = {}
+_lanes_lock = threading.Lock()
+
+
+def _lane(platform_name):
+    with _lanes_lock:
+        lane = _lanes.get(platform_name)
+        if lane is None:
+            limit = PLATFORM_CONCURRENCY.get(platform_name, DEFAULT_PLATFORM_CONCURRENCY)
+            lane = ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f'publish-{platform_name}')
+            _lanes[platform_name] = lane
+        return lane
+
+
+def _publish_safely(platform_name, content, images, config):
+    try:
+        return publish_to_platform(platform_name, content, images, config)
+    except Exception as e:
+        return exception_failure(platform_name, e)
+
+
+def publish_many(jobs):
+    """Run (platform_name, content, images, config) jobs in parallel.
+
+    Returns PublishResults in job order. Wall time is roughly the slowest
+    platform instead of the sum of all of them.
+    """
+    futures = [_lane(job[0]).submit(_publish_safely, *job) for job in jobs]
+    return [f.result() for f in futures]
+
+
+# ============================================================
+# PUBLISH QUOTAS
+# ============================================================
+
+# (publishes, per seconds) for one account. The scheduler books a slot
+# against these before queueing a publish, so bursts get spread out
+# instead of failing. Override with PUBLISH_QUOTAS="twitter=17/86400,reddit=1/600".
+DEFAULT_PUBLISH_QUOTAS = {
+    'twitter': (17, 24 * 3600),      # X API free tier
+    'bluesky': (1666, 3600),         # createRecord: 5000 points/hour at 3 per post
+    'reddit': (1, 10 * 60),
+    'instagram': (25, 24 * 3600),    # content publishing limit
+    'facebook': (25, 3600),
+    'linkedin': (150, 24 * 3600),
+}
+
+
+def _parse_quotas(spec):
+    quotas = dict(DEFAULT_PUBLISH_QUOTAS)
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            platform, rate = item.split('=', 1)
+            limit, period = rate.split('/', 1)
+            quotas[platform.strip()] = (int(limit), float(period))
+        except ValueError:
+            print(f"[Publisher] Ignoring bad PUBLISH_QUOTAS entry: {item!r}")
+    return {p: q for p, q in quotas.items() if q[0] > 0}
+
+
+PUBLISH_QUOTAS = _parse_quotas(os.environ.get('PUBLISH_QUOTAS', ''))
+
+
+def quotas_for(platform_names):
+    """{platform: (limit, period)} for the given platforms that have a quota"""
+    return {p: PUBLISH_QUOTAS[p] for p in platform_names if p in PUBLISH_QUOTAS}
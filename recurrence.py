@@ -0,0 +1,214 @@
+"""
+Recurrence rules for Forbidden Command Center
+A small RFC 5545 RRULE subset for recurring post series, expanded lazily.
+
+Supported parts: FREQ=DAILY|WEEKLY|MONTHLY, INTERVAL, BYDAY (MO..SU, or
+1MO / -1FR style ordinals with MONTHLY), BYMONTHDAY, COUNT, UNTIL.
+Weeks start on Monday. Occurrences keep DTSTART's time of day.
+
+Rules without COUNT jump straight to the period containing the requested
+start, so finding the next occurrence costs the same on day 1 and day 1000.
+
+Usage:
+  from recurrence import RRule
+
+  rule = RRule.parse('FREQ=WEEKLY;BYDAY=TU,TH', dtstart=datetime(2025, 3, 4, 15, 0))
+  rule.after(datetime.utcnow(), 3)       # next 3 occurrences
+  rule.between(start, end)               # every occurrence in [start, end)
+  rule.describe()                        # 'Weekly on Tue, Thu'
+"""
+
+import calendar
+from datetime import datetime, timedelta
+
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+WEEKDAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY')
+MAX_EMPTY_PERIODS = 400  # e.g. BYMONTHDAY=31 only hits 7 months a year; give up on impossible rules
+
+
+class RRuleError(ValueError):
+    pass
+
+
+class RRule:
+    def __init__(self, freq, dtstart, interval=1, byday=None, bymonthday=None, count=None, until=None):
+        if freq not in FREQUENCIES:
+            raise RRuleError(f'Unsupported FREQ: {freq}')
+        if interval < 1:
+            raise RRuleError('INTERVAL must be at least 1')
+        self.freq = freq
+        self.dtstart = dtstart.replace(microsecond=0)
+        self.interval = interval
+        self.byday = byday or []            # [(ordinal or None, weekday 0-6)]
+        self.bymonthday = bymonthday or []  # [1..31 or -31..-1]
+        self.count = count
+        self.until = until
+
+    @classmethod
+    def parse(cls, text, dtstart):
+        """Parse 'FREQ=WEEKLY;BYDAY=MO,WE' (an optional 'RRULE:' prefix is fine)"""
+        text = (text or '').strip()
+        if text.upper().startswith('RRULE:'):
+            text = text[6:]
+        parts = {}
+        for item in filter(None, text.split(';')):
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise RRuleError(f'Bad rule part: {item}')
+            parts[key.strip().upper()] = value.strip().upper()
+        if 'FREQ' not in parts:
+            raise RRuleError('FREQ is required')
+        if 'COUNT' in parts and 'UNTIL' in parts:
+            raise RRuleError('Use COUNT or UNTIL, not both')
+        unknown = set(parts) - {'FREQ', 'INTERVAL', 'BYDAY', 'BYMONTHDAY', 'COUNT', 'UNTIL', 'WKST'}
+        if unknown:
+            raise RRuleError(f"Unsupported rule parts: {', '.join(sorted(unknown))}")
+        try:
+            byday = [_parse_byday(d) for d in parts['BYDAY'].split(',')] if parts.get('BYDAY') else []
+            bymonthday = [int(d) for d in parts['BYMONTHDAY'].split(',')] if parts.get('BYMONTHDAY') else []
+            count = int(parts['COUNT']) if 'COUNT' in parts else None
+            interval = int(parts.get('INTERVAL', 1))
+        except ValueError as e:
+            raise RRuleError(str(e)) from None
+        if any(n is not None for n, _ in byday) and parts['FREQ'] != 'MONTHLY':
+            raise RRuleError('Numbered BYDAY (e.g. 1MO) only works with FREQ=MONTHLY')
+        if any(not 1 <= abs(d) <= 31 for d in bymonthday):
+            raise RRuleError('BYMONTHDAY must be between 1 and 31 (or -31 and -1)')
+        return cls(parts['FREQ'], dtstart, interval=interval, byday=byday, bymonthday=bymonthday,
+                   count=count, until=_parse_until(parts['UNTIL']) if 'UNTIL' in parts else None)
+
+    # ------------------------------------------------------------
+    # Expansion
+    # ------------------------------------------------------------
+
+    def occurrences(self, start=None):
+        """Yield occurrences >= start (default: from DTSTART) in order"""
+        start = max(start or self.dtstart, self.dtstart)
+        # COUNT is numbered from DTSTART, so those rules are walked from the beginning
+        period = 0 if self.count else self._period_index(start)
+        emitted = 0
+        empty = 0
+        while True:
+            days = self._period_days(period)
+            empty = 0 if days else empty + 1
+            if empty > MAX_EMPTY_PERIODS:
+                return
+            for day in days:
+                when = datetime.combine(day, self.dtstart.time())
+                if when < self.dtstart:
+                    continue
+                if self.until and when > self.until:
+                    return
+                emitted += 1
+                if when >= start:
+                    yield when
+                if self.count and emitted >= self.count:
+                    return
+            period += 1
+
+    def after(self, moment, limit):
+        """The next `limit` occurrences strictly after moment"""
+        out = []
+        for when in self.occurrences(moment):
+            if when > moment:
+                out.append(when)
+                if len(out) >= limit:
+                    break
+        return out
+
+    def between(self, start, end):
+        out = []
+        for when in self.occurrences(start):
+            if when >= end:
+                break
+            out.append(when)
+        return out
+
+    def _period_index(self, moment):
+        first = self.dtstart.date()
+        if self.freq == 'DAILY':
+            elapsed = (moment.date() - first).days
+        elif self.freq == 'WEEKLY':
+            elapsed = (_monday(moment.date()) - _monday(first)).days // 7
+        else:
+            elapsed = (moment.year - first.year) * 12 + moment.month - first.month
+        return max(0, elapsed // self.interval)
+
+    def _period_days(self, period):
+        first = self.dtstart.date()
+        step = period * self.interval
+        if self.freq == 'DAILY':
+            day = first + timedelta(days=step)
+            return [day] if not self.byday or day.weekday() in {wd for _, wd in self.byday} else []
+        if self.freq == 'WEEKLY':
+            monday = _monday(first) + timedelta(weeks=step)
+            weekdays = sorted({wd for _, wd in self.byday}) or [first.weekday()]
+            return [monday + timedelta(days=wd) for wd in weekdays]
+        month_index = first.year * 12 + first.month - 1 + step
+        year, month = divmod(month_index, 12)
+        return self._month_days(year, month + 1)
+
+    def _month_days(self, year, month):
+        ndays = calendar.monthrange(year, month)[1]
+        days = set()
+        for d in self.bymonthday:
+            d = d if d > 0 else ndays + d + 1
+            if 1 <= d <= ndays:
+                days.add(d)
+        for ordinal, weekday in self.byday:
+            matches = [d for d in range(1, ndays + 1) if calendar.weekday(year, month, d) == weekday]
+            if ordinal is None:
+                days.update(matches)
+            elif 1 <= abs(ordinal) <= len(matches):
+                days.add(matches[ordinal - 1] if ordinal > 0 else matches[ordinal])
+        if not self.bymonthday and not self.byday and self.dtstart.day <= ndays:
+            days.add(self.dtstart.day)  # months without that day are skipped, as in RFC 5545
+        return [datetime(year, month, d).date() for d in sorted(days)]
+
+    # ------------------------------------------------------------
+    # Display
+    # ------------------------------------------------------------
+
+    def describe(self):
+        unit = {'DAILY': 'day', 'WEEKLY': 'week', 'MONTHLY': 'month'}[self.freq]
+        text = self.freq.capitalize() if self.interval == 1 else f'Every {self.interval} {unit}s'
+        if self.byday:
+            names = []
+            for ordinal, weekday in self.byday:
+                prefix = '' if ordinal is None else ('last ' if ordinal == -1 else f'{_ordinal(ordinal)} ')
+                names.append(prefix + WEEKDAY_NAMES[weekday])
+            text += ' on ' + ', '.join(names)
+        if self.bymonthday:
+            text += ' on day ' + ', '.join(str(d) for d in self.bymonthday)
+        if self.count:
+            text += f', {self.count} times'
+        elif self.until:
+            text += f" until {self.until:%b %d, %Y}"
+        return text
+
+
+def _parse_byday(value):
+    value = value.strip()
+    code, ordinal = value[-2:], value[:-2]
+    if code not in WEEKDAYS:
+        raise RRuleError(f'Bad BYDAY value: {value}')
+    return (int(ordinal) if ordinal else None), WEEKDAYS.index(code)
+
+
+def _parse_until(value):
+    for fmt in ('%Y%m%dT%H%M%SZ', '%Y%m%dT%H%M%S', '%Y%m%d'):
+        try:
+            until = datetime.strptime(value, fmt)
+            return until.replace(hour=23, minute=59, second=59) if fmt == '%Y%m%d' else until
+        except ValueError:
+            continue
+    raise RRuleError(f'Bad UNTIL value: {value}')
+
+
+def _monday(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _ordinal(n):
+    return {1: '1st', 2: '2nd', 3: '3rd'}.get(n, f'{n}th')
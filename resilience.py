@@ -0,0 +1,86 @@
+"""
+Publish retries and circuit breakers for Forbidden Command Center
+Decides what happens after a platform publish fails, so a 429 or a 5xx
+becomes a later attempt instead of a permanently failed post.
+
+- Timeouts, dropped connections, 408/425/429 and 5xx are retryable; other
+  errors (bad credentials, rejected content) fail the platform for good
+- Except on the call that creates the post: a timeout or 5xx there may come
+  after the platform stored it, so it is 'unknown' and never retried
+  automatically (only a connection that was never made is)
+- Retries wait for the platform's Retry-After / rate-limit reset when it sends
+  one, and otherwise back off exponentially with jitter, up to PUBLISH_MAX_ATTEMPTS
+- Each platform has a circuit breaker in the database: after CIRCUIT_THRESHOLD
+  retryable failures in a row (or any 429) publishes to it are deferred until
+  its cool-down ends, then a single probe decides whether it closes again
+
+Usage:
+  import resilience
+
+  until = resilience.blocked_until('bluesky')     # None, or epoch seconds
+  resilience.record(result)                        # after every PublishResult
+  if resilience.classify(result) == 'retry':
+      delay = resilience.retry_delay(result, attempt)
+"""
+
+import os
+import time
+import random
+
+import database as db
+
+PUBLISH_MAX_ATTEMPTS = int(os.environ.get('PUBLISH_MAX_ATTEMPTS', 5))  # per platform, per post
+RETRY_BASE_SECONDS = 30          # 30s, 60s, 120s, ... before jitter
+RETRY_MAX_SECONDS = 1800
+RETRY_AFTER_MAX_SECONDS = 6 * 3600  # a platform asking us to wait longer than this is treated as a hard failure
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+CIRCUIT_THRESHOLD = 5            # retryable failures in a row before a platform's breaker opens
+CIRCUIT_COOLDOWN = 60            # doubles with each failed probe
+CIRCUIT_MAX_COOLDOWN = 1800
+CIRCUIT_PROBE_SECONDS = 120      # how long the half-open probe keeps everyone else waiting
+
+
+def classify(result):
+    """'ok', 'retry', 'unknown' (the post may exist; don't publish it again) or 'fatal'"""
+    if result.success:
+        return 'ok'
+    if result.maybe_created:
+        return 'unknown'
+    if result.retry_after is not None and result.retry_after > RETRY_AFTER_MAX_SECONDS:
+        return 'fatal'
+    status = result.status_code or 0
+    if result.transient or status in RETRYABLE_STATUS or status >= 500:
+        return 'retry'
+    return 'fatal'
+
+
+def retry_delay(result, attempt):
+    """Seconds to wait before trying again after the attempt-th failure (1-based)"""
+    if result.retry_after is not None:
+        # What the platform asked for, plus a little so waiting publishers don't all return at once
+        return result.retry_after + 1 + random.uniform(0, min(30, result.retry_after * 0.1))
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def blocked_until(platform):
+    """None if the platform's breaker lets a publish through, else the epoch time it might"""
+    return db.claim_circuit(platform, time.time(), CIRCUIT_PROBE_SECONDS)
+
+
+def record(result):
+    """Feed a publish outcome to the platform's breaker. Fatal errors say nothing
+    about the platform's health, so they leave it alone; an 'unknown' timeout or
+    5xx still counts against it."""
+    outcome = classify(result)
+    if outcome == 'ok':
+        db.close_circuit(result.platform)
+    elif outcome in ('retry', 'unknown'):
+        now = time.time()
+        rate_limited = result.status_code == 429
+        db.record_circuit_failure(
+            result.platform, now, CIRCUIT_THRESHOLD, CIRCUIT_COOLDOWN, CIRCUIT_MAX_COOLDOWN, error=result.error,
+            open_until=now + (result.retry_after if result.retry_after is not None else CIRCUIT_COOLDOWN)
+            if rate_limited else None)
+    return outcome
@@ -0,0 +1,19 @@
+"""
+Job worker entry point for Forbidden Command Center
+Runs queued background jobs (publishes, blog auto-posts, brand intel and outreach scans).
+What it writes reaches the web process's /api/events stream and scheduler through the
+change feed (pg_notify on Postgres, the polled change_feed table on SQLite).
+
+Usage:
+  python worker.py           # run until stopped (Procfile: worker)
+  python worker.py --once    # drain due jobs, then exit
+"""
+
+import sys
+
+import app  # registers the job handlers
+import jobs
+
+if __name__ == '__main__':
+    app.create_app()
+    jobs.run_worker(once='--once' in sys.argv[1:])